@@ -0,0 +1,77 @@
+"""compress_summary_content_at_rest
+
+Revision ID: 3b7d9e1c4a52
+Revises: 90f137c451f9
+Create Date: 2026-10-19 09:12:44.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.compression import compress_text, decompress_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b7d9e1c4a52'
+down_revision: Union[str, None] = '90f137c451f9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# Plain table definition so we read and write the raw stored values, not the ORM's decoded ones.
+summaries = sa.table(
+    'summaries',
+    sa.column('id', sa.Integer),
+    sa.column('content', sa.Text),
+    sa.column('sources', sa.Text),
+)
+
+
+def _rewrite_in_batches(transform) -> None:
+    # Keyset pagination by id keeps each batch small and the transaction short.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(summaries.c.id, summaries.c.content, summaries.c.sources)
+            .where(summaries.c.id > last_id)
+            .order_by(summaries.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            new_content = transform(row.content)
+            new_sources = transform(row.sources)
+            if new_content is not row.content or new_sources is not row.sources:
+                bind.execute(
+                    summaries.update()
+                    .where(summaries.c.id == row.id)
+                    .values(content=new_content, sources=new_sources)
+                )
+        last_id = rows[-1].id
+
+
+def _compress(value):
+    if isinstance(value, str):
+        compressed = compress_text(value)
+        return value if compressed == value else compressed
+    return value
+
+
+def _decompress(value):
+    if value is None or isinstance(value, str):
+        return value
+    return decompress_text(value)
+
+
+def upgrade() -> None:
+    # Data-only migration: the column type stays TEXT, compressed values are stored as tagged blobs.
+    _rewrite_in_batches(_compress)
+
+
+def downgrade() -> None:
+    _rewrite_in_batches(_decompress)
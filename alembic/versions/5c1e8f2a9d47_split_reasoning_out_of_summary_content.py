@@ -0,0 +1,73 @@
+"""split_reasoning_out_of_summary_content
+
+Revision ID: 5c1e8f2a9d47
+Revises: 3b7d9e1c4a52
+Create Date: 2026-10-19 11:40:02.561930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.compression import compress_text, decompress_text
+from utils.reasoning_utils import split_reasoning, REASONING_SEPARATOR
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c1e8f2a9d47'
+down_revision: Union[str, None] = '3b7d9e1c4a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+summaries = sa.table(
+    'summaries',
+    sa.column('id', sa.Integer),
+    sa.column('content', sa.Text),
+    sa.column('reasoning', sa.Text),
+)
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('summaries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reasoning', sa.Text(), nullable=True))
+
+    # Move <think> blocks of existing rows into the new column, in id-ordered batches.
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(summaries.c.id, summaries.c.content)
+            .where(summaries.c.id > last_id)
+            .order_by(summaries.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        for row in rows:
+            content = decompress_text(row.content)
+            answer, reasoning = split_reasoning(content)
+            if reasoning is not None:
+                bind.execute(
+                    summaries.update()
+                    .where(summaries.c.id == row.id)
+                    .values(content=compress_text(answer), reasoning=compress_text(reasoning))
+                )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    # Fold reasoning back into content as a leading <think> block before dropping the column.
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(summaries.c.id, summaries.c.content, summaries.c.reasoning)
+        .where(summaries.c.reasoning.isnot(None))
+    ).all()
+    for row in rows:
+        merged = f"<think>\n{decompress_text(row.reasoning)}\n</think>{REASONING_SEPARATOR}{decompress_text(row.content)}"
+        bind.execute(summaries.update().where(summaries.c.id == row.id).values(content=compress_text(merged)))
+
+    with op.batch_alter_table('summaries', schema=None) as batch_op:
+        batch_op.drop_column('reasoning')
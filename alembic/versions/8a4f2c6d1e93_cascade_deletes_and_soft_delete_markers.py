@@ -0,0 +1,77 @@
+"""cascade_deletes_and_soft_delete_markers
+
+Revision ID: 8a4f2c6d1e93
+Revises: 5c1e8f2a9d47
+Create Date: 2026-10-19 14:05:31.274810
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4f2c6d1e93'
+down_revision: Union[str, None] = '5c1e8f2a9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# The original foreign keys were created unnamed; this convention lets batch mode find and drop them.
+naming_convention = {
+    "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
+}
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('topic_streams', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.add_column(sa.Column('deleted_at', sa.DateTime(), nullable=True))
+        batch_op.drop_constraint('fk_topic_streams_user_id_users', type_='foreignkey')
+        batch_op.create_foreign_key('fk_topic_streams_user_id_users', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index(batch_op.f('ix_topic_streams_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('summaries', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint('fk_summaries_topic_stream_id_topic_streams', type_='foreignkey')
+        batch_op.create_foreign_key('fk_summaries_topic_stream_id_topic_streams', 'topic_streams', ['topic_stream_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_index('ix_summaries_topic_stream_id_created_at', ['topic_stream_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('deep_dive_messages', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_constraint('fk_deep_dive_messages_user_id_users', type_='foreignkey')
+        batch_op.drop_constraint('fk_deep_dive_messages_topic_stream_id_topic_streams', type_='foreignkey')
+        batch_op.drop_constraint('fk_deep_dive_messages_summary_id_summaries', type_='foreignkey')
+        batch_op.create_foreign_key('fk_deep_dive_messages_user_id_users', 'users', ['user_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_foreign_key('fk_deep_dive_messages_topic_stream_id_topic_streams', 'topic_streams', ['topic_stream_id'], ['id'], ondelete='CASCADE')
+        batch_op.create_foreign_key('fk_deep_dive_messages_summary_id_summaries', 'summaries', ['summary_id'], ['id'], ondelete='SET NULL')
+        batch_op.create_index(batch_op.f('ix_deep_dive_messages_user_id'), ['user_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_deep_dive_messages_topic_stream_id'), ['topic_stream_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_deep_dive_messages_summary_id'), ['summary_id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('deep_dive_messages', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_deep_dive_messages_summary_id'))
+        batch_op.drop_index(batch_op.f('ix_deep_dive_messages_topic_stream_id'))
+        batch_op.drop_index(batch_op.f('ix_deep_dive_messages_user_id'))
+        batch_op.drop_constraint('fk_deep_dive_messages_summary_id_summaries', type_='foreignkey')
+        batch_op.drop_constraint('fk_deep_dive_messages_topic_stream_id_topic_streams', type_='foreignkey')
+        batch_op.drop_constraint('fk_deep_dive_messages_user_id_users', type_='foreignkey')
+        batch_op.create_foreign_key('fk_deep_dive_messages_user_id_users', 'users', ['user_id'], ['id'])
+        batch_op.create_foreign_key('fk_deep_dive_messages_topic_stream_id_topic_streams', 'topic_streams', ['topic_stream_id'], ['id'])
+        batch_op.create_foreign_key('fk_deep_dive_messages_summary_id_summaries', 'summaries', ['summary_id'], ['id'])
+
+    with op.batch_alter_table('summaries', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_index('ix_summaries_topic_stream_id_created_at')
+        batch_op.drop_constraint('fk_summaries_topic_stream_id_topic_streams', type_='foreignkey')
+        batch_op.create_foreign_key('fk_summaries_topic_stream_id_topic_streams', 'topic_streams', ['topic_stream_id'], ['id'])
+
+    with op.batch_alter_table('topic_streams', schema=None, naming_convention=naming_convention) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_topic_streams_user_id'))
+        batch_op.drop_constraint('fk_topic_streams_user_id_users', type_='foreignkey')
+        batch_op.create_foreign_key('fk_topic_streams_user_id_users', 'users', ['user_id'], ['id'])
+        batch_op.drop_column('deleted_at')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('deleted_at')
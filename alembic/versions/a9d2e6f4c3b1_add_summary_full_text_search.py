@@ -0,0 +1,56 @@
+"""add_summary_full_text_search
+
+Revision ID: a9d2e6f4c3b1
+Revises: f1a8c3e5b7d2
+Create Date: 2026-10-19 21:48:33.170462
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.compression import decompress_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9d2e6f4c3b1'
+down_revision: Union[str, None] = 'f1a8c3e5b7d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # The triggers (and the backfill below) read content through tp_decompress
+    bind.connection.driver_connection.create_function("tp_decompress", 1, decompress_text, deterministic=True)
+
+    op.execute(
+        "CREATE VIRTUAL TABLE summaries_fts USING fts5("
+        "content, stream, content='', tokenize='unicode61 remove_diacritics 2')"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_insert AFTER INSERT ON summaries BEGIN "
+        "INSERT INTO summaries_fts(rowid, content, stream) VALUES (new.id, tp_decompress(new.content), 's' || new.topic_stream_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_delete AFTER DELETE ON summaries BEGIN "
+        "INSERT INTO summaries_fts(summaries_fts, rowid, content, stream) VALUES ('delete', old.id, tp_decompress(old.content), 's' || old.topic_stream_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_update AFTER UPDATE OF content, topic_stream_id ON summaries BEGIN "
+        "INSERT INTO summaries_fts(summaries_fts, rowid, content, stream) VALUES ('delete', old.id, tp_decompress(old.content), 's' || old.topic_stream_id); "
+        "INSERT INTO summaries_fts(rowid, content, stream) VALUES (new.id, tp_decompress(new.content), 's' || new.topic_stream_id); END"
+    )
+    # Backfill in the same transaction, so an interrupted upgrade leaves no half-built index
+    op.execute(
+        "INSERT INTO summaries_fts(rowid, content, stream) "
+        "SELECT id, tp_decompress(content), 's' || topic_stream_id FROM summaries"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_update")
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_insert")
+    op.execute("DROP TABLE IF EXISTS summaries_fts")
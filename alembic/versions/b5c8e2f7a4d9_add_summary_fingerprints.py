@@ -0,0 +1,60 @@
+"""add_summary_fingerprints
+
+Revision ID: b5c8e2f7a4d9
+Revises: a9d2e6f4c3b1
+Create Date: 2026-10-19 22:31:05.284417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.compression import decompress_text
+from utils.simhash import simhash
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5c8e2f7a4d9'
+down_revision: Union[str, None] = 'a9d2e6f4c3b1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def upgrade() -> None:
+    # Existing streams keep every summary, as before; only new streams get the FLAG default
+    with op.batch_alter_table('topic_streams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('duplicate_policy', sa.Enum('KEEP', 'FLAG', 'COLLAPSE', 'DROP', name='duplicatepolicy_enum', native_enum=False), server_default='KEEP', nullable=False))
+
+    with op.batch_alter_table('summaries', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('fingerprint', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('duplicate_of_id', sa.Integer(), nullable=True))
+        batch_op.create_index('ix_summaries_topic_stream_id_fingerprint', ['topic_stream_id', 'fingerprint'], unique=False)
+
+    # Fingerprint existing summaries so the first new summary of each stream has something to compare with
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.text("SELECT id, content FROM summaries WHERE id > :last_id ORDER BY id LIMIT :limit"),
+            {"last_id": last_id, "limit": BACKFILL_BATCH_SIZE}
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            sa.text("UPDATE summaries SET fingerprint = :fingerprint WHERE id = :id"),
+            [{"id": row.id, "fingerprint": simhash(decompress_text(row.content) or "")} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('summaries', schema=None) as batch_op:
+        batch_op.drop_index('ix_summaries_topic_stream_id_fingerprint')
+        batch_op.drop_column('duplicate_of_id')
+        batch_op.drop_column('fingerprint')
+
+    with op.batch_alter_table('topic_streams', schema=None) as batch_op:
+        batch_op.drop_column('duplicate_policy')
@@ -0,0 +1,34 @@
+"""add_listing_version_counters
+
+Revision ID: c4e9a7b1f2d6
+Revises: 8a4f2c6d1e93
+Create Date: 2026-10-19 16:42:08.513027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e9a7b1f2d6'
+down_revision: Union[str, None] = '8a4f2c6d1e93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('data_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+    with op.batch_alter_table('topic_streams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('topic_streams', schema=None) as batch_op:
+        batch_op.drop_column('version')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('data_version')
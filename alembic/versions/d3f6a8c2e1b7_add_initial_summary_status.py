@@ -0,0 +1,29 @@
+"""add_initial_summary_status
+
+Revision ID: d3f6a8c2e1b7
+Revises: b5c8e2f7a4d9
+Create Date: 2026-10-20 09:12:44.631027
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f6a8c2e1b7'
+down_revision: Union[str, None] = 'b5c8e2f7a4d9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing streams already had their first summary fetched inline at creation
+    with op.batch_alter_table('topic_streams', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('initial_summary_status', sa.Enum('PENDING', 'RUNNING', 'READY', 'FAILED', name='initialsummarystatus_enum', native_enum=False), server_default='READY', nullable=False))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('topic_streams', schema=None) as batch_op:
+        batch_op.drop_column('initial_summary_status')
@@ -0,0 +1,73 @@
+"""queue_search_index_updates
+
+Revision ID: e7a1c4b9d2f3
+Revises: d3f6a8c2e1b7
+Create Date: 2026-10-20 14:03:27.518342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from utils.compression import decompress_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a1c4b9d2f3'
+down_revision: Union[str, None] = 'd3f6a8c2e1b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The old triggers called tp_decompress, which only exists on app connections, so any other
+    # connection could no longer write summaries. The new ones only queue the change for the app.
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_insert")
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_delete")
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_update")
+    op.execute(
+        "CREATE TABLE summaries_fts_queue ("
+        "seq INTEGER PRIMARY KEY, summary_id INTEGER NOT NULL, old_content, old_topic_stream_id INTEGER)"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_queue_insert AFTER INSERT ON summaries BEGIN "
+        "INSERT INTO summaries_fts_queue(summary_id) VALUES (new.id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_queue_delete AFTER DELETE ON summaries BEGIN "
+        "INSERT INTO summaries_fts_queue(summary_id, old_content, old_topic_stream_id) VALUES (old.id, old.content, old.topic_stream_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_queue_update AFTER UPDATE OF content, topic_stream_id ON summaries BEGIN "
+        "INSERT INTO summaries_fts_queue(summary_id, old_content, old_topic_stream_id) VALUES (old.id, old.content, old.topic_stream_id); END"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_queue_update")
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_queue_delete")
+    op.execute("DROP TRIGGER IF EXISTS summaries_fts_queue_insert")
+    op.execute("DROP TABLE IF EXISTS summaries_fts_queue")
+
+    bind = op.get_bind()
+    bind.connection.driver_connection.create_function("tp_decompress", 1, decompress_text, deterministic=True)
+    op.execute(
+        "CREATE TRIGGER summaries_fts_insert AFTER INSERT ON summaries BEGIN "
+        "INSERT INTO summaries_fts(rowid, content, stream) VALUES (new.id, tp_decompress(new.content), 's' || new.topic_stream_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_delete AFTER DELETE ON summaries BEGIN "
+        "INSERT INTO summaries_fts(summaries_fts, rowid, content, stream) VALUES ('delete', old.id, tp_decompress(old.content), 's' || old.topic_stream_id); END"
+    )
+    op.execute(
+        "CREATE TRIGGER summaries_fts_update AFTER UPDATE OF content, topic_stream_id ON summaries BEGIN "
+        "INSERT INTO summaries_fts(summaries_fts, rowid, content, stream) VALUES ('delete', old.id, tp_decompress(old.content), 's' || old.topic_stream_id); "
+        "INSERT INTO summaries_fts(rowid, content, stream) VALUES (new.id, tp_decompress(new.content), 's' || new.topic_stream_id); END"
+    )
+    # Changes still queued were never indexed, so rebuild rather than trust the index
+    op.execute("INSERT INTO summaries_fts(summaries_fts) VALUES ('delete-all')")
+    op.execute(
+        "INSERT INTO summaries_fts(rowid, content, stream) "
+        "SELECT id, tp_decompress(content), 's' || topic_stream_id FROM summaries"
+    )
@@ -0,0 +1,41 @@
+"""add_event_outbox
+
+Revision ID: e7b3d5a9c810
+Revises: c4e9a7b1f2d6
+Create Date: 2026-10-19 18:21:47.902344
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3d5a9c810'
+down_revision: Union[str, None] = 'c4e9a7b1f2d6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('event_outbox',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('event_outbox', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_event_outbox_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_event_outbox_user_id_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('event_outbox', schema=None) as batch_op:
+        batch_op.drop_index('ix_event_outbox_user_id_id')
+        batch_op.drop_index(batch_op.f('ix_event_outbox_created_at'))
+
+    op.drop_table('event_outbox')
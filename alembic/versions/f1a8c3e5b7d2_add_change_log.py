@@ -0,0 +1,43 @@
+"""add_change_log
+
+Revision ID: f1a8c3e5b7d2
+Revises: e7b3d5a9c810
+Create Date: 2026-10-19 20:07:15.336120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1a8c3e5b7d2'
+down_revision: Union[str, None] = 'e7b3d5a9c810'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('change_log',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('entity', sa.String(), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('topic_stream_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sqlite_autoincrement=True
+    )
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_change_log_created_at'), ['created_at'], unique=False)
+        batch_op.create_index('ix_change_log_user_id_id', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('change_log', schema=None) as batch_op:
+        batch_op.drop_index('ix_change_log_user_id_id')
+        batch_op.drop_index(batch_op.f('ix_change_log_created_at'))
+
+    op.drop_table('change_log')
@@ -1,12 +1,13 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, status, Request, BackgroundTasks, Header
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import text
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import set_committed_value
+from sqlalchemy import text, func
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import Dict, List, Optional
 from enum import Enum
 import jwt
-from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 from dotenv import load_dotenv
 import os
@@ -17,24 +18,50 @@ from fastapi.middleware.cors import CORSMiddleware
 import json
 import asyncio
 import re
-from utils.tokenizer_utils import count_tokens, truncate_text_by_tokens
-from models import Base, User, TopicStream, Summary, UpdateFrequency, DetailLevel, ModelType, ContextHistoryLevel
+import secrets
+import time
+from utils.tokenizer_utils import count_tokens, prewarm_encoding
+from utils.reasoning_utils import split_reasoning
+from utils.simhash import simhash
+from context_history import build_history_context
+from models import Base, User, TopicStream, Summary, UpdateFrequency, DetailLevel, ModelType, ContextHistoryLevel, DuplicatePolicy, InitialSummaryStatus
 from scheduler import TopicStreamScheduler
 from perplexity_api import PerplexityAPI
+from write_coalescer import summary_writer
+from cpu_executor import cpu_executor, loop_lag_monitor
+from password_hashing import password_hasher, rehash_user_password, HashingPoolFull
+from auth_cache import auth_cache, AuthenticatedUser
+from fast_response import fast_response, streaming_array_response, summary_columns, summary_row_to_dict, listing_etag, etag_matches, not_modified, conditional_headers
+from versioning import bump_stream_versions, bump_user_version
+from change_log import record_changes, read_changes, STREAM, SUMMARY, UPSERT, DELETE
+from near_duplicates import find_near_duplicate, collapse_into, touch_last_updated, DEFAULT_DUPLICATE_POLICY
+from related_index import related_index, vectorize, index_new_summaries, index_summary, RELATED_DEFAULT_LIMIT, RELATED_MAX_LIMIT
+from export import export_response, EXPORT_MEDIA_TYPES
+from initial_summary import produce_initial_summary
+from bulk import gather_bounded, BULK_MAX_ITEMS, BULK_REFRESH_CONCURRENCY
+from trends import trend_counters, count_summaries, count_new_summaries, save_trends_snapshot, unix_time, WINDOWS, TERM, ENTITY
+from search import search_summaries, decode_cursor, sync_search_index, sync_after_flush, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE
+from events import event_bus, sse_stream, publish_event, publish_summaries_created, publish_stream_updated, publish_job_status, SUMMARY_CREATED
+from archive import fetch_archived_summaries, get_archived_summary
+from deletion import purge_topic_stream, purge_user, released_email
 from database import SessionLocal, engine
 import models  # Add missing models import
 from contextlib import asynccontextmanager
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# Tables are created/upgraded by migrate.py, not at import
 
 # Security
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 1440  # Increase to 24 hours for better user experience
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
+# /events also accepts ?ticket=, since browser EventSource cannot send an Authorization header
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
+# Lifetime of an /events ticket. Query strings end up in access logs, so EventSource clients pass a
+# short-lived, single-use ticket from POST /events/ticket instead of their access token
+EVENTS_TICKET_SECONDS = int(os.getenv("EVENTS_TICKET_SECONDS", "30"))
+EVENTS_TICKET_PURPOSE = "events"
 
 # Initialize logger
 logger = logging.getLogger(__name__)
@@ -62,6 +89,10 @@ def get_scheduler() -> TopicStreamScheduler | None:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global scheduler # Ensure you're using the global scheduler variable
+    # Load the tokenizer in the background so startup doesn't wait on it
+    prewarm_encoding()
+    loop_lag_monitor.start()
+    await event_bus.start()
     # db_for_startup = SessionLocal() # No longer pass db here, scheduler will manage its own sessions per job
     try:
         logger.info("Application startup: Initializing TopicStreamScheduler...")
@@ -84,9 +115,30 @@ async def lifespan(app: FastAPI):
     else:
         logger.warning("Scheduler was not initialized, nothing to shut down.")
 
+    # In-flight first summaries stay claimed and are resumed by the scheduler on the next start
+    for task in list(background_tasks):
+        task.cancel()
+    # Flush any summary writes still waiting in the coalescer
+    summary_writer.shutdown()
+    # After the writer's last flush, so its summaries are in the snapshot
+    save_trends_snapshot()
+    await event_bus.stop()
+    await loop_lag_monitor.stop()
+    cpu_executor.shutdown()
+    password_hasher.shutdown()
+
 # Move the FastAPI app initialization BEFORE middleware and routes
 app = FastAPI(title="TrendPulse Dashboard API", lifespan=lifespan) # Ensure lifespan is used here
 
+# Push a summary.created event to /events subscribers for every summary the coalescer commits
+summary_writer.add_listener(publish_summaries_created)
+# Embed every committed summary into the related-summaries index
+summary_writer.add_listener(index_new_summaries)
+# Count every committed summary's terms for GET /trends
+summary_writer.add_listener(count_new_summaries)
+# Add every committed summary to the GET /search index
+summary_writer.add_listener(sync_after_flush)
+
 # Configure CORS - Move this down below app initialization
 origins = [
     "http://localhost:3000",
@@ -99,6 +151,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag"],
 )
 
 # Pydantic models
@@ -120,6 +173,7 @@ class TopicStreamCreate(BaseModel):
     temperature: float = 0.7
     context_history_level: Optional[str] = ContextHistoryLevel.LAST_ONE.value
     auto_update_enabled: Optional[bool] = True
+    duplicate_policy: Optional[str] = None # keep | flag | collapse | drop; DEFAULT_DUPLICATE_POLICY when omitted
 
 class TopicStreamResponse(BaseModel):
     id: int
@@ -134,6 +188,8 @@ class TopicStreamResponse(BaseModel):
     context_history_level: str
     total_stored_est_tokens: int = 0
     auto_update_enabled: bool
+    duplicate_policy: str = DuplicatePolicy.FLAG.value
+    initial_summary_status: str = InitialSummaryStatus.READY.value # pending/running until the first summary is in
     
     class Config:
         orm_mode = True
@@ -159,6 +215,20 @@ class SummaryResponse(BaseModel):
     completion_tokens: Optional[int] = None
     total_tokens: Optional[int] = None
     estimated_content_tokens: Optional[int] = None
+    has_reasoning: bool = False
+    reasoning: Optional[str] = None # Only populated when the client explicitly asks for it
+    archived: bool = False
+    duplicate_of_id: Optional[int] = None # Set when this summary was flagged as a near-duplicate of that one
+
+class SummaryPreviewResponse(SummaryResponse):
+    content_truncated: bool = False # content was cut to the dashboard's preview length
+
+class DashboardStreamResponse(TopicStreamResponse):
+    summaries: List[SummaryPreviewResponse] = [] # Latest first
+
+class SummaryReasoningResponse(BaseModel):
+    summary_id: int
+    reasoning: Optional[str] = None
 
 class SummaryCreate(BaseModel):
     content: str
@@ -177,6 +247,30 @@ class DeepDiveResponse(BaseModel):
 class UpdateNowOptions(BaseModel):
     ignore_all_previous_summaries_override: Optional[bool] = False
 
+class BulkTopicStreamCreate(BaseModel):
+    items: List[TopicStreamCreate]
+    refresh: bool = True # Fetch each new stream's first summary, as POST /topic-streams/ does
+
+class TopicStreamPatch(BaseModel):
+    id: int
+    query: Optional[str] = None
+    update_frequency: Optional[str] = None
+    detail_level: Optional[str] = None
+    model_type: Optional[str] = None
+    recency_filter: Optional[str] = None
+    system_prompt: Optional[str] = None
+    temperature: Optional[float] = None
+    context_history_level: Optional[str] = None
+    auto_update_enabled: Optional[bool] = None # false pauses scheduled updates, true resumes them
+    duplicate_policy: Optional[str] = None
+
+class BulkTopicStreamPatch(BaseModel):
+    items: List[TopicStreamPatch] # Only the fields present in an item are changed
+
+class BulkRefreshRequest(BaseModel):
+    ids: List[int]
+    ignore_all_previous_summaries_override: Optional[bool] = False
+
 # Define this constant near the top of app.py or in a config file
 MAX_PREV_CONTEXT_TOKENS_SMART_LIMIT = 20000 # Example: Approx 20k tokens for history
 
@@ -194,11 +288,19 @@ def model_to_dict(obj):
     return obj
 
 # Security functions
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+def hashing_busy_exception(error: HashingPoolFull) -> HTTPException:
+    logger.warning(f"Rejecting request: password hashing pool is full ({error})")
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def hash_password_or_503(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except HashingPoolFull as e:
+        raise hashing_busy_exception(e)
 
 def create_access_token(data: dict):
     to_encode = data.copy()
@@ -214,10 +316,16 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    # Most requests are answered from the principal cache: no JWT decode and no users-table query
+    cached_user = auth_cache.get(token)
+    if cached_user is not None:
+        return cached_user
+
     try:
         logger.debug(f"Decoding JWT token")
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         email: str = payload.get("sub")
+        user_id = payload.get("uid")
         if email is None:
             logger.warning("Token payload does not contain 'sub' field")
             raise credentials_exception
@@ -237,14 +345,21 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
         logger.error(f"Unexpected error decoding token: {str(e)}", exc_info=True)
         raise credentials_exception
     
-    # Get user from database
+    # Confirm the user still exists; tokens with a uid claim use a primary-key lookup of just the id
     try:
-        user = db.query(User).filter(User.email == email).first()
-        if user is None:
+        if user_id is not None:
+            row = db.query(User.id, User.email).filter(User.id == user_id, User.deleted_at.is_(None)).first()
+        else:
+            row = db.query(User.id, User.email).filter(User.email == email, User.deleted_at.is_(None)).first()
+        if row is None:
             logger.warning(f"User not found for email: {email}")
             raise credentials_exception
-        logger.debug(f"User found: ID={user.id}, Email={user.email}")
+        logger.debug(f"User found: ID={row.id}, Email={row.email}")
+        user = AuthenticatedUser(id=row.id, email=row.email)
+        auth_cache.put(token, user, payload.get("exp"))
         return user
+    except HTTPException:
+        raise
     except Exception as db_error:
         logger.error(f"Database error in get_current_user: {str(db_error)}", exc_info=True)
         raise HTTPException(
@@ -284,48 +399,15 @@ async def perform_search_and_create_summary(
             logger.info(f"Stream {topic_stream.id}: Configured to include up to {num_summaries_to_fetch} (level: {history_level_setting.value}) previous summaries.")
 
         if num_summaries_to_fetch > 0:
-            # Fetch summaries (content and creation date), newest first
-            recent_summaries_from_db = db.query(models.Summary.content, models.Summary.created_at).filter(
-                models.Summary.topic_stream_id == topic_stream.id
-            ).order_by(models.Summary.created_at.desc()).limit(num_summaries_to_fetch).all()
-
-            if recent_summaries_from_db:
-                # Reverse to process oldest first for concatenation to build chronological context
-                summaries_content_chronological = [data.content for data in reversed(recent_summaries_from_db)]
-
-                concatenated_parts = []
-                current_total_tokens_for_history = 0
-                separator = "\n\n---\n[End of Previous Update]\n---\n\n"
-                separator_tokens = count_tokens(separator)
-
-                for i, content_item in enumerate(summaries_content_chronological):
-                    item_tokens = count_tokens(content_item)
-                    effective_separator_tokens = separator_tokens if concatenated_parts else 0
-
-                    if current_total_tokens_for_history + item_tokens + effective_separator_tokens <= MAX_PREV_CONTEXT_TOKENS_SMART_LIMIT:
-                        if concatenated_parts: # Add separator if not the first part
-                            concatenated_parts.append(separator)
-                        concatenated_parts.append(content_item)
-                        current_total_tokens_for_history += item_tokens + effective_separator_tokens
-                    else:
-                        remaining_token_budget = MAX_PREV_CONTEXT_TOKENS_SMART_LIMIT - (current_total_tokens_for_history + effective_separator_tokens)
-                        if remaining_token_budget > 50: # Only add if a meaningful chunk can be added
-                            if concatenated_parts:
-                                concatenated_parts.append(separator)
-                            truncated_item_content = truncate_text_by_tokens(content_item, remaining_token_budget)
-                            concatenated_parts.append(truncated_item_content)
-                            # No need to update current_total_tokens_for_history further as we break
-                            logger.info(f"Stream {topic_stream.id}: Truncated content of summary part {i+1} to fit token limit.")
-                        else:
-                            logger.info(f"Stream {topic_stream.id}: Could not fit summary part {i+1} or a meaningful portion into context due to token limit.")
-                        break
-
-                if concatenated_parts:
-                    prev_summaries_concatenated_content = "".join(concatenated_parts)
-                    final_history_tokens = count_tokens(prev_summaries_concatenated_content) # Recalculate final token count precisely
-                    logger.info(f"Stream {topic_stream.id}: Using {len(recent_summaries_from_db)} fetched, effectively {len(concatenated_parts) // 2 + (1 if len(concatenated_parts) % 2 != 0 else 0) if separator_tokens > 0 else len(concatenated_parts)} summaries in concatenated context. Total est. tokens for history: {final_history_tokens}.")
-                else:
-                    logger.info(f"Stream {topic_stream.id}: No previous summaries fit within token limit for context.")
+            # Token counting/truncation of the history is CPU work, so it runs in the CPU pool
+            history = await cpu_executor.run(build_history_context, db, topic_stream.id, num_summaries_to_fetch, MAX_PREV_CONTEXT_TOKENS_SMART_LIMIT)
+            if history.text:
+                prev_summaries_concatenated_content = history.text
+                if history.truncated:
+                    logger.info(f"Stream {topic_stream.id}: Truncated content of summary part {history.summaries_included} to fit token limit.")
+                logger.info(f"Stream {topic_stream.id}: Using {history.summaries_fetched} fetched, effectively {history.summaries_included} summaries in concatenated context. Total est. tokens for history: {history.tokens}.")
+            elif history.summaries_fetched:
+                logger.info(f"Stream {topic_stream.id}: No previous summaries fit within token limit for context.")
             else:
                 logger.info(f"Stream {topic_stream.id}: No previous summaries found in DB to include in context.")
         else:
@@ -363,7 +445,10 @@ async def perform_search_and_create_summary(
             custom_system_prompt=stream_custom_system_prompt
         )
 
-        content = result.get("answer", "No content available")
+        # Split <think> segments out of the answer so they are stored separately and never re-fed as history
+        content, reasoning = await cpu_executor.run(split_reasoning, result.get("answer", "No content available"))
+        if reasoning:
+            logger.debug(f"Stream {topic_stream.id}: Split {len(reasoning)} chars of reasoning out of the answer.")
         if not content or content == "No content available" or ("no new information" in content.lower() and len(content) < 100) :
             if prev_summaries_concatenated_content: # Only say "no new info" if there was context
                 content = "No new information is available since the last update."
@@ -374,25 +459,50 @@ async def perform_search_and_create_summary(
         summary_model_used = result.get("model", model)
 
         usage_stats = result.get("usage", {})
-        content_tokens_est = count_tokens(content)
+        content_tokens_est = await cpu_executor.run_tokenizer(count_tokens, content)
+        fingerprint = await cpu_executor.run(simhash, content)
 
-        summary = models.Summary(
+        summary_values = dict(
             topic_stream_id=topic_stream.id,
             content=content,
             sources=sources_json,
+            reasoning=reasoning,
             created_at=datetime.utcnow(),
             model=summary_model_used,
             prompt_tokens=usage_stats.get("prompt_tokens"),
             completion_tokens=usage_stats.get("completion_tokens"),
             total_tokens=usage_stats.get("total_tokens"),
-            estimated_content_tokens=content_tokens_est
+            estimated_content_tokens=content_tokens_est,
+            fingerprint=fingerprint
         )
 
-        topic_stream.last_updated = datetime.utcnow()
-        db.add(summary)
-        db.commit()
-        db.refresh(summary)
-        db.refresh(topic_stream)
+        duplicate_policy = topic_stream.duplicate_policy
+        duplicate_of_id = None
+        if duplicate_policy != DuplicatePolicy.KEEP:
+            # Collapsing rewrites the match's content and created_at, so only a recent summary may be the match
+            duplicate_of_id = find_near_duplicate(db, topic_stream.id, fingerprint,
+                                                  exact_repeats=duplicate_policy != DuplicatePolicy.COLLAPSE)
+        if duplicate_of_id is not None:
+            logger.info(f"Stream {topic_stream.id}: New summary nearly duplicates summary {duplicate_of_id} (policy: {duplicate_policy.value}).")
+            if duplicate_policy == DuplicatePolicy.DROP:
+                touch_last_updated(db, topic_stream.id, summary_values["created_at"])
+                set_committed_value(topic_stream, "last_updated", summary_values["created_at"])
+                publish_stream_updated(topic_stream.user_id, topic_stream.id, "duplicate_dropped")
+                return db.get(models.Summary, duplicate_of_id)
+            if duplicate_policy == DuplicatePolicy.COLLAPSE:
+                summary = collapse_into(db, duplicate_of_id, summary_values)
+                set_committed_value(topic_stream, "last_updated", summary_values["created_at"])
+                index_summary(summary.id, topic_stream.id, summary.content)
+                sync_search_index()
+                publish_stream_updated(topic_stream.user_id, topic_stream.id, "summary_collapsed")
+                return summary
+            summary_values["duplicate_of_id"] = duplicate_of_id
+
+        # The coalescer batches this insert and the last_updated bump with other concurrent updates
+        # into one transaction and hands back the new id (INSERT ... RETURNING), so no refreshes are needed.
+        summary_id = await summary_writer.write_summary(summary_values)
+        summary = models.Summary(id=summary_id, **summary_values)
+        set_committed_value(topic_stream, "last_updated", summary_values["created_at"])
         logger.debug(f"Created summary ID {summary.id} for topic stream {topic_stream.id}")
         return summary
 
@@ -404,11 +514,17 @@ async def perform_search_and_create_summary(
 
 # Routes
 @app.post("/users/", response_model=UserResponse)
-def create_user(user: UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: UserCreate, db: Session = Depends(get_db)):
     db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+    if db_user and db_user.deleted_at is None:
         raise HTTPException(status_code=400, detail="Email already registered")
-    hashed_password = get_password_hash(user.password)
+    if db_user:
+        # Deleted before deletion released the address, and not purged yet
+        db_user.email = released_email(db_user.id)
+        db.commit()
+    # End the read transaction so its pooled connection isn't held while hashing
+    db.rollback()
+    hashed_password = await hash_password_or_503(user.password)
     db_user = User(email=user.email, hashed_password=hashed_password)
     db.add(db_user)
     db.commit()
@@ -416,10 +532,10 @@ def create_user(user: UserCreate, db: Session = Depends(get_db)):
     return db_user
 
 @app.post("/token")
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(background_tasks: BackgroundTasks, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     logger.info(f"Login attempt for username: {form_data.username}")
     
-    user = db.query(User).filter(User.email == form_data.username).first()
+    user = db.query(User).filter(User.email == form_data.username, User.deleted_at.is_(None)).first()
     
     if not user:
         logger.warning(f"Login failed: User not found for email {form_data.username}")
@@ -430,77 +546,116 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
         )
         
     logger.info(f"User found: {user.email} (ID: {user.id})")
+    user_id, user_email, stored_hash = user.id, user.email, user.hashed_password
+    # End the read transaction so a burst of logins waiting on bcrypt can't exhaust the connection pool
+    db.rollback()
     
-    password_verified = verify_password(form_data.password, user.hashed_password)
+    try:
+        password_verified, needs_rehash = await password_hasher.verify(form_data.password, stored_hash)
+    except HashingPoolFull as e:
+        raise hashing_busy_exception(e)
     logger.info(f"Password verification result: {password_verified}")
     
     if not password_verified:
-        logger.warning(f"Login failed: Incorrect password for user {user.email}")
+        logger.warning(f"Login failed: Incorrect password for user {user_email}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
         
+    if needs_rehash:
+        # Upgrade outdated hashes (e.g. after changing BCRYPT_ROUNDS) after the response is sent
+        background_tasks.add_task(rehash_user_password, SessionLocal, user_id, form_data.password, stored_hash)
+
     try:
-        access_token = create_access_token(data={"sub": user.email})
-        logger.info(f"Access token created successfully for user {user.email}")
+        access_token = create_access_token(data={"sub": user_email, "uid": user_id})
+        logger.info(f"Access token created successfully for user {user_email}")
         return {"access_token": access_token, "token_type": "bearer"}
     except Exception as e:
-        logger.error(f"Error creating access token for user {user.email}: {e}", exc_info=True)
+        logger.error(f"Error creating access token for user {user_email}: {e}", exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Could not create access token",
         )
 
+def new_topic_stream(user_id: int, topic_stream: TopicStreamCreate,
+                     initial_summary_status: InitialSummaryStatus = InitialSummaryStatus.PENDING) -> models.TopicStream:
+    """Unsaved TopicStream from a create payload. Raises ValueError for unknown enum values."""
+    update_freq = UpdateFrequency(topic_stream.update_frequency)
+    detail_lvl = DetailLevel(topic_stream.detail_level)
+    model_val = ModelType.R1_1776 if topic_stream.model_type == "r1-1776" else ModelType(topic_stream.model_type)
+
+    context_level_value = topic_stream.context_history_level if topic_stream.context_history_level else ContextHistoryLevel.LAST_ONE.value
+    context_hist_level_enum = ContextHistoryLevel(context_level_value)
+
+    logger.debug(f"Converted enums - freq: {update_freq}, detail: {detail_lvl}, model: {model_val}, context: {context_hist_level_enum})")
+
+    return models.TopicStream(
+        user_id=user_id,
+        query=topic_stream.query,
+        update_frequency=update_freq,
+        detail_level=detail_lvl,
+        model_type=model_val,
+        recency_filter=topic_stream.recency_filter,
+        system_prompt=topic_stream.system_prompt,
+        temperature=topic_stream.temperature,
+        context_history_level=context_hist_level_enum,
+        auto_update_enabled=topic_stream.auto_update_enabled,
+        duplicate_policy=DuplicatePolicy(topic_stream.duplicate_policy) if topic_stream.duplicate_policy else DEFAULT_DUPLICATE_POLICY,
+        initial_summary_status=initial_summary_status
+    )
+
+# Strong references to fire-and-forget tasks; the event loop only keeps weak ones
+background_tasks = set()
+
+def claim_initial_summary(user_id: int, topic_stream_id: int):
+    return produce_initial_summary(SessionLocal, perform_search_and_create_summary, user_id, topic_stream_id)
+
+def spawn_initial_summaries(user_id: int, topic_stream_ids: List[int]):
+    """
+    Fetch new streams' first summaries after the response has gone out, with at most
+    BULK_REFRESH_CONCURRENCY upstream searches in flight.
+    """
+    task = asyncio.create_task(gather_bounded(
+        topic_stream_ids, lambda topic_stream_id: claim_initial_summary(user_id, topic_stream_id), BULK_REFRESH_CONCURRENCY
+    ))
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+def schedule_new_topic_stream(db_topic_stream: models.TopicStream):
+    scheduler_instance = get_scheduler()
+    if scheduler_instance and db_topic_stream.auto_update_enabled: # Check auto_update_enabled
+        scheduler_instance.schedule_topic_stream(db_topic_stream)
+        logger.debug(f"Scheduled topic stream updates for new stream ID: {db_topic_stream.id} because auto-update is enabled.")
+    elif not db_topic_stream.auto_update_enabled:
+        logger.debug(f"New stream ID: {db_topic_stream.id} created with auto-update disabled. Not scheduling.")
+    else:
+        logger.error("Scheduler not available, cannot schedule new stream.")
+
 @app.post("/topic-streams/", response_model=TopicStreamResponse)
 async def create_topic_stream(
     topic_stream: TopicStreamCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
         logger.debug(f"Creating topic stream with data: {topic_stream}")
-
-        update_freq = UpdateFrequency(topic_stream.update_frequency)
-        detail_lvl = DetailLevel(topic_stream.detail_level)
-        model_val = ModelType.R1_1776 if topic_stream.model_type == "r1-1776" else ModelType(topic_stream.model_type)
-
-        context_level_value = topic_stream.context_history_level if topic_stream.context_history_level else ContextHistoryLevel.LAST_ONE.value
-        context_hist_level_enum = ContextHistoryLevel(context_level_value)
-
-        logger.debug(f"Converted enums - freq: {update_freq}, detail: {detail_lvl}, model: {model_val}, context: {context_hist_level_enum})")
-
-        db_topic_stream = models.TopicStream(
-            user_id=current_user.id,
-            query=topic_stream.query,
-            update_frequency=update_freq,
-            detail_level=detail_lvl,
-            model_type=model_val,
-            recency_filter=topic_stream.recency_filter,
-            system_prompt=topic_stream.system_prompt,
-            temperature=topic_stream.temperature,
-            context_history_level=context_hist_level_enum,
-            auto_update_enabled=topic_stream.auto_update_enabled
-        )
+        db_topic_stream = new_topic_stream(current_user.id, topic_stream)
 
         db.add(db_topic_stream)
+        db.flush()
+        bump_user_version(db, current_user.id)
+        record_changes(db, [(STREAM, db_topic_stream.id, db_topic_stream.id, UPSERT)])
         db.commit()
         db.refresh(db_topic_stream)
+        publish_stream_updated(current_user.id, db_topic_stream.id, "created")
 
-        # Re-enable scheduler interaction - uncomment
-        scheduler_instance = get_scheduler() 
-        if scheduler_instance and db_topic_stream.auto_update_enabled: # Check auto_update_enabled
-            # The scheduler's schedule_topic_stream method includes logic to run immediately for new streams
-            scheduler_instance.schedule_topic_stream(db_topic_stream)
-            logger.debug(f"Scheduled topic stream updates for new stream ID: {db_topic_stream.id} because auto-update is enabled.")
-        elif not db_topic_stream.auto_update_enabled:
-            logger.debug(f"New stream ID: {db_topic_stream.id} created with auto-update disabled. Not scheduling.")
-        else:
-            logger.error("Scheduler not available, cannot schedule new stream.")
+        schedule_new_topic_stream(db_topic_stream)
 
-        await perform_search_and_create_summary(db, db_topic_stream) # Initial summary
-        db.refresh(db_topic_stream) # Refresh again for last_updated
+        # Respond now with initial_summary_status "pending". The first summary arrives as summary.created
+        # and job.status events, and the status turns "ready" (or "failed") in the stream listing.
+        spawn_initial_summaries(current_user.id, [db_topic_stream.id])
 
         return db_topic_stream
     except ValueError as e:
@@ -516,51 +671,56 @@ async def create_topic_stream(
             detail=f"Error creating topic stream: {str(e)}"
         )
 
-@app.get("/topic-streams/")
+def topic_stream_rows(db: Session, user_id: int, stream_ids: Optional[List[int]] = None):
+    """TopicStreamResponse-shaped projection rows; the token total is a SQL SUM instead of loading every summary row."""
+    token_totals = db.query(
+        Summary.topic_stream_id,
+        func.sum(Summary.estimated_content_tokens).label("total")
+    ).group_by(Summary.topic_stream_id)
+    if stream_ids is not None:
+        token_totals = token_totals.filter(Summary.topic_stream_id.in_(stream_ids))
+    token_totals = token_totals.subquery()
+    query = db.query(
+        TopicStream.id,
+        TopicStream.query,
+        TopicStream.update_frequency,
+        TopicStream.detail_level,
+        TopicStream.model_type,
+        TopicStream.recency_filter,
+        TopicStream.last_updated,
+        TopicStream.system_prompt,
+        TopicStream.temperature,
+        TopicStream.context_history_level,
+        func.coalesce(token_totals.c.total, 0).label("total_stored_est_tokens"),
+        TopicStream.auto_update_enabled,
+        TopicStream.duplicate_policy,
+        TopicStream.initial_summary_status
+    ).outerjoin(
+        token_totals, token_totals.c.topic_stream_id == TopicStream.id
+    ).filter(TopicStream.user_id == user_id, TopicStream.deleted_at.is_(None))
+    if stream_ids is not None:
+        query = query.filter(TopicStream.id.in_(stream_ids))
+    return query.all()
+
+@app.get("/topic-streams/", response_model=List[TopicStreamResponse])
 async def get_topic_streams(
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
         logger.debug(f"Fetching topic streams for user ID: {current_user.id}, email: {current_user.email}")
+
+        # Conditional GET: a single primary-key lookup answers unchanged polls before any stream is read
+        data_version = db.query(User.data_version).filter(User.id == current_user.id).scalar() or 0
+        etag = listing_etag(request, "streams", current_user.id, data_version)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        # Fetch topic streams and their associated summaries in one query for efficiency
-        streams = db.query(TopicStream).options(joinedload(TopicStream.summaries)).filter(TopicStream.user_id == current_user.id).all()
-        logger.debug(f"Found {len(streams)} topic streams for user {current_user.id}")
+        rows = topic_stream_rows(db, current_user.id)
+        logger.debug(f"Found {len(rows)} topic streams for user {current_user.id}")
         
-        # Manually construct the response to include the calculated total_stored_est_tokens
-        result = []
-        for stream in streams:
-            # Calculate total estimated tokens for summaries
-            total_est_tokens = 0
-            for summary in stream.summaries:
-                if summary.estimated_content_tokens is not None:
-                    total_est_tokens += summary.estimated_content_tokens
-            
-            # Construct the dictionary for the response, mapping enum values and including the token count
-            stream_response_data = {
-                "id": stream.id,
-                "query": stream.query,
-                "update_frequency": stream.update_frequency.value if isinstance(stream.update_frequency, Enum) else stream.update_frequency,
-                "detail_level": stream.detail_level.value if isinstance(stream.detail_level, Enum) else stream.detail_level,
-                "model_type": stream.model_type.value if isinstance(stream.model_type, Enum) else stream.model_type,
-                "recency_filter": stream.recency_filter,
-                "last_updated": stream.last_updated.isoformat() if stream.last_updated else None,
-                "system_prompt": stream.system_prompt,
-                "temperature": stream.temperature,
-                "context_history_level": stream.context_history_level.value if isinstance(stream.context_history_level, Enum) else stream.context_history_level,
-                "total_stored_est_tokens": total_est_tokens, # Include the calculated value
-                "auto_update_enabled": stream.auto_update_enabled # --- ADDED THIS LINE ---
-            }
-            
-            # result.append(stream_response_data) # Assuming FastAPI will validate against ResponseModel
-            # Alternatively, explicitly create the Pydantic model instance if needed:
-            validated_stream_data = TopicStreamResponse(**stream_response_data)
-            result.append(validated_stream_data) # Append the Pydantic model instance
-            
-            logger.debug(f"Stream: ID={stream.id}, Query={stream.query}, Model={stream_response_data['model_type']}, Total Stored Tokens: {total_est_tokens}, Auto Update Enabled: {stream_response_data['auto_update_enabled']}")
-            
-        return result
+        return fast_response(request, [row._asdict() for row in rows], headers=conditional_headers(etag))
     except Exception as e:
         logger.error(f"Error fetching topic streams for user {current_user.id}: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -570,73 +730,50 @@ async def get_topic_streams(
 
 @app.get("/topic-streams/{topic_stream_id}/summaries/", response_model=List[SummaryResponse])
 def get_topic_stream_summaries(
+    request: Request,
     topic_stream_id: int,
-    current_user: User = Depends(get_current_user),
+    include_reasoning: bool = False,
+    include_archived: bool = False,
+    include_duplicates: bool = True,
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
         logger.debug(f"Fetching summaries for topic stream ID: {topic_stream_id}")
         
-        # Log before querying for topic stream
-        logger.debug(f"Querying for topic stream ID: {topic_stream_id} and user ID: {current_user.id}")
-        topic_stream = db.query(TopicStream).filter(
+        topic_stream_version = db.query(TopicStream.version).filter(
             TopicStream.id == topic_stream_id,
-            TopicStream.user_id == current_user.id
+            TopicStream.user_id == current_user.id,
+            TopicStream.deleted_at.is_(None)
         ).first()
         
-        if not topic_stream:
+        if not topic_stream_version:
             logger.warning(f"Topic stream {topic_stream_id} not found for user {current_user.id}")
             raise HTTPException(status_code=404, detail="Topic stream not found")
+
+        # The ownership check doubles as the conditional GET lookup; unchanged polls never read summaries
+        etag = listing_etag(request, "summaries", topic_stream_id, topic_stream_version.version, include_reasoning, include_archived, include_duplicates)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        # Log before querying for summaries
-        logger.debug(f"Querying for summaries for topic stream ID: {topic_stream_id}")
-        summaries_db = db.query(Summary).filter(Summary.topic_stream_id == topic_stream_id).order_by(Summary.created_at.desc()).all()
-        logger.debug(f"Found {len(summaries_db)} summaries for topic stream {topic_stream_id}")
-        
-        # Manually construct the response list, parsing sources safely
-        response_summaries = []
-        for summary in summaries_db:
-            parsed_sources = []
-            # Log before processing sources
-            logger.debug(f"Processing sources for summary ID: {summary.id}")
-            if summary.sources: # Check if sources string is not None or empty
-                try:
-                    # First ensure it's a string - it might already be parsed in some cases
-                    sources_str = summary.sources if isinstance(summary.sources, str) else json.dumps(summary.sources)
-                    
-                    # Now try to parse it
-                    parsed_sources = json.loads(sources_str) 
-                    
-                    # Validate the parsed data is actually a list
-                    if not isinstance(parsed_sources, list): 
-                        logger.warning(f"Sources for summary {summary.id} is not a list, resetting to empty list")
-                        parsed_sources = []
-                        
-                except json.JSONDecodeError:
-                    logger.warning(f"Failed to decode sources JSON for summary {summary.id}: {summary.sources}")
-                    parsed_sources = [] # Default to empty list on error
-                except Exception as source_parse_error:
-                    # Catch any other errors during source parsing
-                    logger.error(f"Unexpected error parsing sources for summary {summary.id}: {str(source_parse_error)}", exc_info=True)
-                    parsed_sources = []
-
-            # Log before appending summary to response
-            logger.debug(f"Appending summary ID: {summary.id} to response")
-            response_summaries.append(
-                SummaryResponse(
-                    id=summary.id,
-                    content=summary.content,
-                    sources=parsed_sources, # Use the parsed list
-                    created_at=summary.created_at,
-                    model=summary.model if summary.model is not None else "",
-                    prompt_tokens=summary.prompt_tokens,
-                    completion_tokens=summary.completion_tokens,
-                    total_tokens=summary.total_tokens,
-                    estimated_content_tokens=summary.estimated_content_tokens
-                )
+        # Plain column projection serialized straight to bytes (no ORM identity map, no per-row SummaryResponse)
+        query = db.query(*summary_columns(include_reasoning)).filter(Summary.topic_stream_id == topic_stream_id)
+        if not include_duplicates:
+            query = query.filter(Summary.duplicate_of_id.is_(None))
+        rows = query.order_by(Summary.created_at.desc()).all()
+        logger.debug(f"Found {len(rows)} summaries for topic stream {topic_stream_id}")
+        response_summaries = [summary_row_to_dict(row, row.has_reasoning, include_reasoning) for row in rows]
+
+        if include_archived:
+            # Cold tier is older than anything in the hot table, so it simply follows the hot rows
+            archived_summaries = fetch_archived_summaries(topic_stream_id, include_reasoning=include_reasoning)
+            logger.debug(f"Appending {len(archived_summaries)} archived summaries for topic stream {topic_stream_id}")
+            response_summaries.extend(
+                summary_row_to_dict(archived_summary, archived_has_reasoning, include_reasoning, archived=True)
+                for archived_summary, archived_has_reasoning in archived_summaries
             )
         
-        return response_summaries # Return the manually constructed list
+        return fast_response(request, response_summaries, headers=conditional_headers(etag))
     except HTTPException as http_exc: 
         # Re-raise HTTPException to preserve status code and details
         raise http_exc
@@ -645,16 +782,281 @@ def get_topic_stream_summaries(
         # Re-raise as HTTPException to return to the frontend
         raise HTTPException(status_code=500, detail=f"An unexpected error occurred while fetching summaries: {str(e)}")
 
+def check_export_format(export_format: str):
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_MEDIA_TYPES)}")
+
+@app.get("/topic-streams/{topic_stream_id}/export")
+def export_topic_stream(
+    topic_stream_id: int,
+    format: str = "ndjson",
+    gzip: bool = False,
+    include_archived: bool = True,
+    include_reasoning: bool = False,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Download one stream and its full summary history (archived summaries included by default) as
+    ndjson, csv or md, optionally gzipped. Rows are streamed in pages, so any history size is fine.
+    """
+    check_export_format(format)
+    streams = topic_stream_rows(db, current_user.id, [topic_stream_id])
+    if not streams:
+        raise HTTPException(status_code=404, detail="Topic stream not found")
+    return export_response(SessionLocal, [stream._asdict() for stream in streams], format, f"trendpulse-stream-{topic_stream_id}",
+                           gzip=gzip, include_archived=include_archived, include_reasoning=include_reasoning)
+
+@app.get("/export")
+def export_all_topic_streams(
+    format: str = "ndjson",
+    gzip: bool = False,
+    include_archived: bool = True,
+    include_reasoning: bool = False,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Download all of the current user's streams and their summaries; see /topic-streams/{id}/export."""
+    check_export_format(format)
+    streams = topic_stream_rows(db, current_user.id)
+    return export_response(SessionLocal, [stream._asdict() for stream in streams], format, "trendpulse-export",
+                           gzip=gzip, include_archived=include_archived, include_reasoning=include_reasoning)
+
+# Defaults for GET /dashboard; clients can ask for fewer/more per request within the max
+DASHBOARD_SUMMARIES_PER_STREAM = int(os.getenv("DASHBOARD_SUMMARIES_PER_STREAM", "3"))
+DASHBOARD_MAX_SUMMARIES_PER_STREAM = int(os.getenv("DASHBOARD_MAX_SUMMARIES_PER_STREAM", "20"))
+DASHBOARD_PREVIEW_CHARS = int(os.getenv("DASHBOARD_PREVIEW_CHARS", "600"))
+
+def summary_preview(row, preview_chars: int) -> dict:
+    preview = summary_row_to_dict(row, row.has_reasoning, False)
+    preview["content_truncated"] = 0 < preview_chars < len(preview["content"])
+    if preview["content_truncated"]:
+        preview["content"] = preview["content"][:preview_chars]
+    return preview
+
+@app.get("/dashboard", response_model=List[DashboardStreamResponse])
+def get_dashboard(
+    request: Request,
+    summaries_per_stream: int = DASHBOARD_SUMMARIES_PER_STREAM,
+    preview_chars: int = DASHBOARD_PREVIEW_CHARS,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Everything the dashboard needs for first paint: every stream with its latest summaries
+    (content cut to `preview_chars`, 0 for full content). Two queries regardless of stream count.
+    """
+    summaries_per_stream = max(0, min(summaries_per_stream, DASHBOARD_MAX_SUMMARIES_PER_STREAM))
+    data_version = db.query(User.data_version).filter(User.id == current_user.id).scalar() or 0
+    etag = listing_etag(request, "dashboard", current_user.id, data_version, summaries_per_stream, preview_chars)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
+    streams = topic_stream_rows(db, current_user.id)
+    summaries_by_stream = {}
+    if streams and summaries_per_stream:
+        # Latest N per stream in one pass over ix_summaries_topic_stream_id_created_at
+        ranked = db.query(
+            *summary_columns(),
+            Summary.topic_stream_id,
+            func.row_number().over(partition_by=Summary.topic_stream_id, order_by=Summary.created_at.desc()).label("position")
+        ).filter(Summary.topic_stream_id.in_([stream.id for stream in streams])).subquery()
+        for row in db.query(ranked).filter(ranked.c.position <= summaries_per_stream).order_by(ranked.c.topic_stream_id, ranked.c.position):
+            summaries_by_stream.setdefault(row.topic_stream_id, []).append(row)
+    logger.debug(f"Dashboard for user {current_user.id}: {len(streams)} streams, {sum(map(len, summaries_by_stream.values()))} summaries")
+
+    # Summaries are decoded and serialized per stream while the body is being sent
+    items = (
+        dict(stream._asdict(), summaries=[summary_preview(row, preview_chars) for row in summaries_by_stream.get(stream.id, [])])
+        for stream in streams
+    )
+    return streaming_array_response(request, items, len(streams), headers=conditional_headers(etag))
+
+@app.get("/search")
+def search(
+    request: Request,
+    q: str,
+    topic_stream_id: Optional[int] = None,
+    limit: int = SEARCH_PAGE_SIZE,
+    cursor: Optional[str] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Full-text search over the current user's summaries (optionally one stream), best match first.
+    Each result has a snippet with [start, end) highlight offsets. Pass next_cursor back as
+    `cursor` for the next page. Archived summaries are not searched.
+    """
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+    limit = max(1, min(limit, SEARCH_MAX_PAGE_SIZE))
+    try:
+        page = search_summaries(db, current_user.id, q, topic_stream_id=topic_stream_id, limit=limit, after=after)
+    except Exception as e:
+        logger.error(f"Error searching summaries for user {current_user.id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Error searching summaries: {str(e)}")
+    logger.debug(f"Search '{q}' for user {current_user.id}: {len(page['results'])} results")
+    return fast_response(request, page)
+
+# Related summaries scoring below this cosine similarity are left out
+RELATED_MIN_SCORE = float(os.getenv("RELATED_MIN_SCORE", "0.15"))
+RELATED_PREVIEW_CHARS = int(os.getenv("RELATED_PREVIEW_CHARS", "300"))
+
+@app.get("/summaries/{summary_id}/related")
+def get_related_summaries(
+    request: Request,
+    summary_id: int,
+    limit: int = RELATED_DEFAULT_LIMIT,
+    topic_stream_id: Optional[int] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Summaries across the current user's streams (or one stream) most similar to `summary_id`, best
+    first, from the local related-summaries index. No upstream query is made.
+    """
+    source = db.query(Summary.id, Summary.topic_stream_id).join(TopicStream).filter(
+        Summary.id == summary_id,
+        TopicStream.user_id == current_user.id,
+        TopicStream.deleted_at.is_(None)
+    ).first()
+    if not source:
+        raise HTTPException(status_code=404, detail="Summary not found")
+
+    stream_ids = [row.id for row in db.query(TopicStream.id).filter(
+        TopicStream.user_id == current_user.id, TopicStream.deleted_at.is_(None),
+        *([TopicStream.id == topic_stream_id] if topic_stream_id is not None else [])
+    )]
+    limit = max(1, min(limit, RELATED_MAX_LIMIT))
+    query_vector = related_index.vector_for(summary_id)
+    if query_vector is None:
+        # Not indexed (yet): embed it on the fly
+        query_vector = vectorize(db.query(Summary.content).filter(Summary.id == summary_id).scalar() or "")
+    # Over-fetch a little: records of summaries deleted since the last compaction are dropped below
+    hits = [(hit_id, score) for hit_id, score in related_index.top_k(query_vector, stream_ids, limit * 2, exclude_ids=[summary_id])
+            if score >= RELATED_MIN_SCORE]
+
+    rows = {row.id: row for row in db.query(
+        Summary.id, Summary.topic_stream_id, Summary.created_at, Summary.content, TopicStream.query
+    ).join(TopicStream).filter(
+        Summary.id.in_([hit_id for hit_id, _ in hits]), TopicStream.deleted_at.is_(None)
+    )} if hits else {}
+    results = [{
+        "summary_id": hit_id,
+        "topic_stream_id": rows[hit_id].topic_stream_id,
+        "topic_stream_query": rows[hit_id].query,
+        "created_at": rows[hit_id].created_at,
+        "score": round(score, 4),
+        "preview": rows[hit_id].content[:RELATED_PREVIEW_CHARS],
+    } for hit_id, score in hits if hit_id in rows][:limit]
+    logger.debug(f"Related summaries for {summary_id}: {len(results)} of {len(hits)} index hits")
+    return fast_response(request, {"summary_id": summary_id, "results": results})
+
+TRENDS_DEFAULT_LIMIT = int(os.getenv("TRENDS_DEFAULT_LIMIT", "20"))
+TRENDS_MAX_LIMIT = int(os.getenv("TRENDS_MAX_LIMIT", "100"))
+
+@app.get("/trends")
+def get_trends(
+    request: Request,
+    window: str = "day",
+    limit: int = TRENDS_DEFAULT_LIMIT,
+    kind: Optional[str] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """
+    Terms and entities rising fastest across all streams over the last day (vs. the week) or week
+    (vs. the month), from in-memory counters. Terms seen in the streams of fewer than TRENDS_MIN_USERS users are never listed.
+    """
+    if window not in WINDOWS:
+        raise HTTPException(status_code=400, detail=f"window must be one of: {', '.join(WINDOWS)}")
+    if kind is not None and kind not in (TERM, ENTITY):
+        raise HTTPException(status_code=400, detail=f"kind must be '{TERM}' or '{ENTITY}'")
+    limit = max(1, min(limit, TRENDS_MAX_LIMIT))
+    terms = trend_counters.top_rising(window, limit, kind)
+    return fast_response(request, {"window": window, "generated_at": datetime.utcnow(), "terms": terms})
+
+@app.get("/sync")
+def sync_changes(
+    request: Request,
+    since: Optional[int] = None,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Changes since a cursor from a previous call: current rows for created/edited streams and new
+    summaries, ids for deleted ones, and the next cursor. Keep calling while has_more is true.
+    reset=true (no cursor, or one older than the retained log) returns the full stream list; the
+    client should then reload summary lists and continue from the returned cursor.
+    """
+    changes = read_changes(db, current_user.id, since)
+    if changes.reset:
+        streams = topic_stream_rows(db, current_user.id)
+        summaries = []
+    else:
+        streams = topic_stream_rows(db, current_user.id, changes.upserted_stream_ids) if changes.upserted_stream_ids else []
+        summaries = db.query(*summary_columns(), Summary.topic_stream_id).join(TopicStream).filter(
+            Summary.id.in_(changes.upserted_summary_ids),
+            TopicStream.user_id == current_user.id,
+            TopicStream.deleted_at.is_(None)
+        ).order_by(Summary.id).all() if changes.upserted_summary_ids else []
+    logger.debug(f"Sync for user {current_user.id} since {since}: {len(streams)} streams, {len(summaries)} summaries, cursor {changes.cursor}")
+
+    return fast_response(request, {
+        "cursor": changes.cursor,
+        "has_more": changes.has_more,
+        "reset": changes.reset,
+        "streams": [row._asdict() for row in streams],
+        "deleted_stream_ids": changes.deleted_stream_ids,
+        "summaries": [dict(summary_row_to_dict(row, row.has_reasoning, False), topic_stream_id=row.topic_stream_id) for row in summaries],
+        "deleted_summary_ids": changes.deleted_summary_ids,
+    })
+
+@app.get("/topic-streams/{topic_stream_id}/summaries/{summary_id}/reasoning", response_model=SummaryReasoningResponse)
+def get_summary_reasoning(
+    topic_stream_id: int,
+    summary_id: int,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    # Lazy-load path for the deferred reasoning column - one row, one column
+    reasoning_row = db.query(Summary.id, Summary.reasoning).join(TopicStream).filter(
+        Summary.id == summary_id,
+        Summary.topic_stream_id == topic_stream_id,
+        TopicStream.user_id == current_user.id,
+        TopicStream.deleted_at.is_(None)
+    ).first()
+
+    if reasoning_row:
+        return SummaryReasoningResponse(summary_id=reasoning_row.id, reasoning=reasoning_row.reasoning)
+
+    # Not in the hot table - the summary may have been moved to the archive
+    owns_stream = db.query(TopicStream.id).filter(
+        TopicStream.id == topic_stream_id,
+        TopicStream.user_id == current_user.id,
+        TopicStream.deleted_at.is_(None)
+    ).first()
+    archived_summary = get_archived_summary(summary_id, topic_stream_id) if owns_stream else None
+    if not archived_summary:
+        raise HTTPException(status_code=404, detail="Summary not found")
+
+    return SummaryReasoningResponse(summary_id=archived_summary.id, reasoning=archived_summary.reasoning)
+
 @app.delete("/topic-streams/{topic_stream_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_topic_stream(
     topic_stream_id: int,
-    current_user: User = Depends(get_current_user),
+    background_tasks: BackgroundTasks,
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     logger.info(f"Received request to delete topic stream ID: {topic_stream_id}")
     topic_stream = db.query(TopicStream).filter(
         TopicStream.id == topic_stream_id,
-        TopicStream.user_id == current_user.id
+        TopicStream.user_id == current_user.id,
+        TopicStream.deleted_at.is_(None)
     ).first()
     
     if not topic_stream:
@@ -668,35 +1070,86 @@ def delete_topic_stream(
     else:
         logger.warning(f"Scheduler not available, could not remove job for stream ID: {topic_stream.id}")
 
-    db.delete(topic_stream)
+    # Soft-hide now and purge summaries/messages in chunks after the response is sent.
+    # db.delete() would load every summary (full content) into the session first.
+    topic_stream.deleted_at = datetime.utcnow()
+    topic_stream.auto_update_enabled = False
+    bump_user_version(db, current_user.id)
+    record_changes(db, [(STREAM, topic_stream_id, topic_stream_id, DELETE)])
     db.commit()
-    logger.info(f"Deleted topic stream ID: {topic_stream_id}.")
+    publish_stream_updated(current_user.id, topic_stream_id, "deleted")
+    background_tasks.add_task(purge_topic_stream, SessionLocal, topic_stream_id)
+    logger.info(f"Topic stream ID: {topic_stream_id} hidden; purge queued in background.")
 
     return {"detail": "Topic stream deleted successfully"}
 
+@app.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
+def delete_current_user(
+    background_tasks: BackgroundTasks,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    logger.info(f"Received request to delete user ID: {current_user.id}")
+    deleted_at = datetime.utcnow()
+    stream_ids = [row.id for row in db.query(TopicStream.id).filter(TopicStream.user_id == current_user.id).all()]
+
+    if scheduler:
+        for stream_id in stream_ids:
+            scheduler.remove_topic_stream(stream_id)
+
+    db.query(TopicStream).filter(TopicStream.user_id == current_user.id, TopicStream.deleted_at.is_(None)).update(
+        {TopicStream.deleted_at: deleted_at, TopicStream.auto_update_enabled: False}, synchronize_session=False
+    )
+    # Release the address right away, so it can be registered again before the background purge finishes
+    db.query(User).filter(User.id == current_user.id).update(
+        {User.deleted_at: deleted_at, User.email: released_email(current_user.id)}, synchronize_session=False
+    )
+    db.commit()
+    auth_cache.invalidate_user(current_user.id)
+    background_tasks.add_task(purge_user, SessionLocal, current_user.id)
+    logger.info(f"User ID: {current_user.id} hidden with {len(stream_ids)} topic streams; purge queued in background.")
+
+    return {"detail": "User deleted successfully"}
+
 @app.post("/topic-streams/{topic_stream_id}/update-now", response_model=SummaryResponse)
 async def update_topic_stream_now(
     topic_stream_id: int,
     options: UpdateNowOptions, # Request body for options
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     topic_stream = db.query(models.TopicStream).filter(
         models.TopicStream.id == topic_stream_id,
-        models.TopicStream.user_id == current_user.id
+        models.TopicStream.user_id == current_user.id,
+        models.TopicStream.deleted_at.is_(None)
     ).first()
 
     if not topic_stream:
         raise HTTPException(status_code=404, detail="Topic stream not found")
 
+    claimed_summary_id = None
+    if topic_stream.initial_summary_status in (InitialSummaryStatus.PENDING, InitialSummaryStatus.RUNNING):
+        # The first summary has exactly one producer, so a manual update has to win the claim for it
+        result = await claim_initial_summary(current_user.id, topic_stream_id)
+        if result["status"] == "skipped":
+            raise HTTPException(status_code=409, detail="The stream's first summary is already being fetched")
+        if result["status"] == "failed":
+            raise HTTPException(status_code=500, detail=f"Error updating topic stream: {result['error']}")
+        claimed_summary_id = result["summary_id"]
+
     try:
-        logger.debug(f"Manual update for stream {topic_stream.id}. Override ignore all previous: {options.ignore_all_previous_summaries_override}")
+        if claimed_summary_id is not None:
+            summary = db.get(models.Summary, claimed_summary_id)
+        else:
+            logger.debug(f"Manual update for stream {topic_stream.id}. Override ignore all previous: {options.ignore_all_previous_summaries_override}")
 
-        summary = await perform_search_and_create_summary(
-            db,
-            topic_stream,
-            ignore_all_previous_summaries_override=options.ignore_all_previous_summaries_override
-        )
+            publish_job_status(current_user.id, topic_stream_id, "running")
+            summary = await perform_search_and_create_summary(
+                db,
+                topic_stream,
+                ignore_all_previous_summaries_override=options.ignore_all_previous_summaries_override
+            )
+            publish_job_status(current_user.id, topic_stream_id, "succeeded")
 
         parsed_sources = []
         if summary.sources:
@@ -715,25 +1168,198 @@ async def update_topic_stream_now(
             prompt_tokens=summary.prompt_tokens,
             completion_tokens=summary.completion_tokens,
             total_tokens=summary.total_tokens,
-            estimated_content_tokens=summary.estimated_content_tokens
+            estimated_content_tokens=summary.estimated_content_tokens,
+            has_reasoning=summary.reasoning is not None,
+            duplicate_of_id=summary.duplicate_of_id
         )
     except Exception as e:
         logger.error(f"Error updating topic stream: {str(e)}", exc_info=True)
+        publish_job_status(current_user.id, topic_stream_id, "failed", str(e))
         # Return more detailed error message
         raise HTTPException(
             status_code=500,
             detail=f"Error updating topic stream: {str(e)}"
         )
 
+def check_bulk_size(count: int):
+    if count > BULK_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_MAX_ITEMS} items per bulk request")
+
+async def refresh_topic_stream(user_id: int, topic_stream_id: int, ignore_all_previous_summaries_override: bool = False) -> dict:
+    """
+    update-now for one stream of a bulk request, as a per-item result. Each call has its own session,
+    since perform_search_and_create_summary hands its session to worker threads.
+    """
+    db = SessionLocal()
+    try:
+        topic_stream = db.query(models.TopicStream).filter(
+            models.TopicStream.id == topic_stream_id,
+            models.TopicStream.user_id == user_id,
+            models.TopicStream.deleted_at.is_(None)
+        ).first()
+        if not topic_stream:
+            return {"id": topic_stream_id, "status": "not_found"}
+        if topic_stream.initial_summary_status in (InitialSummaryStatus.PENDING, InitialSummaryStatus.RUNNING):
+            # Same single producer for the first summary as update-now; "skipped" if someone else holds it
+            return await claim_initial_summary(user_id, topic_stream_id)
+        publish_job_status(user_id, topic_stream_id, "running")
+        summary = await perform_search_and_create_summary(
+            db, topic_stream, ignore_all_previous_summaries_override=ignore_all_previous_summaries_override
+        )
+        publish_job_status(user_id, topic_stream_id, "succeeded")
+        return {"id": topic_stream_id, "status": "succeeded", "summary_id": summary.id}
+    except Exception as e:
+        logger.error(f"Error refreshing topic stream {topic_stream_id}: {str(e)}", exc_info=True)
+        publish_job_status(user_id, topic_stream_id, "failed", str(e))
+        return {"id": topic_stream_id, "status": "failed", "error": str(e)}
+    finally:
+        db.close()
+
+@app.post("/topic-streams/bulk")
+async def bulk_create_topic_streams(
+    request: Request,
+    payload: BulkTopicStreamCreate,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Create many streams in one transaction. With refresh=true they come back "pending" and their first
+    summaries are fetched in the background, like a single create. Items with invalid values are
+    reported and skipped. One result per item, in order.
+    """
+    check_bulk_size(len(payload.items))
+    # Without refresh there is no first summary to wait for
+    initial_summary_status = InitialSummaryStatus.PENDING if payload.refresh else InitialSummaryStatus.READY
+    results, created = [], []
+    for index, item in enumerate(payload.items):
+        try:
+            db_topic_stream = new_topic_stream(current_user.id, item, initial_summary_status)
+        except ValueError as e:
+            results.append({"index": index, "status": "invalid", "error": f"Invalid enum value: {str(e)}"})
+            continue
+        db.add(db_topic_stream)
+        created.append(db_topic_stream)
+        results.append({"index": index, "status": "created"})
+
+    if created:
+        try:
+            db.flush()
+            bump_user_version(db, current_user.id)
+            record_changes(db, [(STREAM, stream.id, stream.id, UPSERT) for stream in created])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk creating topic streams: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error creating topic streams: {str(e)}")
+    created_ids = [stream.id for stream in created]
+    if created_ids:
+        # One query reloads every stream the commit expired, instead of one refresh per stream
+        db.query(models.TopicStream).filter(models.TopicStream.id.in_(created_ids)).all()
+    for stream in created:
+        publish_stream_updated(current_user.id, stream.id, "created")
+        schedule_new_topic_stream(stream)
+    logger.info(f"Bulk create for user {current_user.id}: {len(created)} of {len(payload.items)} streams created")
+
+    rows = {row.id: row._asdict() for row in topic_stream_rows(db, current_user.id, created_ids)} if created_ids else {}
+    new_ids = iter(created_ids)
+    for result in results:
+        if result["status"] == "created":
+            result["id"] = next(new_ids)
+            result["topic_stream"] = rows.get(result["id"])
+    if payload.refresh and created_ids:
+        spawn_initial_summaries(current_user.id, created_ids)
+    return fast_response(request, {"results": results})
+
+@app.patch("/topic-streams/bulk")
+def bulk_update_topic_streams(
+    request: Request,
+    payload: BulkTopicStreamPatch,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Change many streams in one transaction; each item carries a stream id and only the fields to
+    change (auto_update_enabled=false pauses a stream). Unknown streams and invalid values are
+    reported per item and leave that stream unchanged.
+    """
+    check_bulk_size(len(payload.items))
+    streams = {stream.id: stream for stream in db.query(models.TopicStream).filter(
+        models.TopicStream.id.in_([item.id for item in payload.items]),
+        models.TopicStream.user_id == current_user.id,
+        models.TopicStream.deleted_at.is_(None)
+    )}
+    results, updated = [], {}
+    for item in payload.items:
+        topic_stream = streams.get(item.id)
+        if topic_stream is None:
+            results.append({"id": item.id, "status": "not_found"})
+            continue
+        if item.id in updated:
+            results.append({"id": item.id, "status": "invalid", "error": "Stream appears more than once in the request"})
+            continue
+        changes = item.model_dump(exclude_unset=True, exclude={"id"})
+        null_fields = [field for field, value in changes.items() if value is None and field not in ("system_prompt", "duplicate_policy")]
+        if null_fields:
+            results.append({"id": item.id, "status": "invalid", "error": f"Fields cannot be null: {', '.join(null_fields)}"})
+            continue
+        try:
+            apply_topic_stream_changes(topic_stream, changes)
+        except ValueError as e:
+            # Undo whatever was set before the bad value
+            db.expire(topic_stream, list(changes))
+            results.append({"id": item.id, "status": "invalid", "error": f"Invalid enum value: {str(e)}"})
+            continue
+        updated[item.id] = topic_stream
+        results.append({"id": item.id, "status": "updated"})
+
+    if updated:
+        try:
+            bump_user_version(db, current_user.id)
+            record_changes(db, [(STREAM, topic_stream_id, topic_stream_id, UPSERT) for topic_stream_id in updated])
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error bulk updating topic streams: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=f"Error updating topic streams: {str(e)}")
+        db.query(models.TopicStream).filter(models.TopicStream.id.in_(list(updated))).all()
+        for topic_stream in updated.values():
+            publish_stream_updated(current_user.id, topic_stream.id, "updated")
+            reschedule_topic_stream(topic_stream)
+    logger.info(f"Bulk update for user {current_user.id}: {len(updated)} of {len(payload.items)} streams updated")
+
+    rows = {row.id: row._asdict() for row in topic_stream_rows(db, current_user.id, list(updated))} if updated else {}
+    for result in results:
+        if result["status"] == "updated":
+            result["topic_stream"] = rows.get(result["id"])
+    return fast_response(request, {"results": results})
+
+@app.post("/topic-streams/bulk/refresh")
+async def bulk_refresh_topic_streams(
+    request: Request,
+    payload: BulkRefreshRequest,
+    current_user: AuthenticatedUser = Depends(get_current_user)
+):
+    """update-now for many streams, at most BULK_REFRESH_CONCURRENCY at a time. One result per distinct id."""
+    topic_stream_ids = list(dict.fromkeys(payload.ids))
+    check_bulk_size(len(topic_stream_ids))
+    results = await gather_bounded(
+        topic_stream_ids,
+        lambda topic_stream_id: refresh_topic_stream(current_user.id, topic_stream_id, bool(payload.ignore_all_previous_summaries_override)),
+        BULK_REFRESH_CONCURRENCY
+    )
+    logger.info(f"Bulk refresh for user {current_user.id}: {sum(result['status'] == 'succeeded' for result in results)} of {len(results)} succeeded")
+    return fast_response(request, {"results": results})
+
 @app.post("/deep-dive/", response_model=DeepDiveResponse)
 async def deep_dive(
     request: DeepDiveRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     topic_stream = db.query(TopicStream).filter(
         TopicStream.id == request.topic_stream_id,
-        TopicStream.user_id == current_user.id
+        TopicStream.user_id == current_user.id,
+        TopicStream.deleted_at.is_(None)
     ).first()
     if not topic_stream:
         raise HTTPException(status_code=404, detail="Topic stream not found or not owned by user")
@@ -742,6 +1368,9 @@ async def deep_dive(
         Summary.id == request.summary_id,
         Summary.topic_stream_id == request.topic_stream_id
     ).first()
+    if not summary:
+        # Deep dives on old summaries read them back from the archive tier
+        summary = get_archived_summary(request.summary_id, request.topic_stream_id)
     if not summary:
         raise HTTPException(status_code=404, detail="Summary not found")
 
@@ -794,12 +1423,13 @@ async def deep_dive(
 def append_summary(
     topic_stream_id: int,
     summary_create: SummaryCreate,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     topic_stream = db.query(TopicStream).filter(
         TopicStream.id == topic_stream_id,
-        TopicStream.user_id == current_user.id
+        TopicStream.user_id == current_user.id,
+        TopicStream.deleted_at.is_(None)
     ).first()
     if not topic_stream:
         raise HTTPException(status_code=404, detail="Topic stream not found")
@@ -809,11 +1439,21 @@ def append_summary(
         topic_stream_id=topic_stream_id,
         content=summary_create.content,
         sources=json.dumps([]),
-        model=str(topic_stream.model_type) if hasattr(topic_stream, 'model_type') and topic_stream.model_type else None
+        model=str(topic_stream.model_type) if hasattr(topic_stream, 'model_type') and topic_stream.model_type else None,
+        fingerprint=simhash(summary_create.content)
     )
     db.add(new_summary)
+    db.flush()
+    bump_stream_versions(db, [topic_stream_id])
+    record_changes(db, [(SUMMARY, new_summary.id, topic_stream_id, UPSERT)])
     db.commit()
     db.refresh(new_summary)
+    index_summary(new_summary.id, topic_stream_id, new_summary.content)
+    sync_search_index()
+    count_summaries([(new_summary.id, new_summary.content, current_user.id, unix_time(new_summary.created_at))])
+    publish_event(current_user.id, SUMMARY_CREATED, {
+        "topic_stream_id": topic_stream_id, "summary_id": new_summary.id, "created_at": new_summary.created_at
+    })
     # Parse sources JSON string
     parsed_sources = json.loads(new_summary.sources or '[]')
     return SummaryResponse(
@@ -828,7 +1468,7 @@ def append_summary(
 def delete_summary(
     topic_stream_id: int,
     summary_id: int,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     # Debug print for troubleshooting
@@ -839,7 +1479,7 @@ def delete_summary(
         # Check if the topic stream exists
         topic_stream = db.query(TopicStream).get(topic_stream_id)
         
-        if not topic_stream:
+        if not topic_stream or topic_stream.deleted_at is not None:
             print(f"ERROR: Topic stream {topic_stream_id} not found at all")
             raise HTTPException(status_code=404, detail=f"Topic stream {topic_stream_id} not found")
             
@@ -866,7 +1506,11 @@ def delete_summary(
         print(f"Deleting summary {summary_id} from database")
         # Use SQLAlchemy's text() for raw SQL
         db.execute(text(f"DELETE FROM summaries WHERE id = :summary_id_param"), { "summary_id_param": summary_id })
+        bump_stream_versions(db, [topic_stream_id])
+        record_changes(db, [(SUMMARY, summary_id, topic_stream_id, DELETE)])
         db.commit()
+        sync_search_index()
+        publish_stream_updated(current_user.id, topic_stream_id, "summary_deleted")
         print(f"Successfully deleted summary {summary_id}")
         return {"message": "Summary deleted successfully"}
     except HTTPException as http_ex:
@@ -879,6 +1523,97 @@ def delete_summary(
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Error deleting summary: {str(e)}")
 
+@app.get("/metrics")
+async def get_metrics():
+    """Event loop lag, CPU executor, password hashing pool and auth cache counters."""
+    return {
+        "event_loop_lag": loop_lag_monitor.snapshot(),
+        "executors": cpu_executor.stats(),
+        "password_hashing": password_hasher.stats(),
+        "auth_cache": auth_cache.stats(),
+        "events": event_bus.stats(),
+        "related_index": related_index.stats(),
+        "trends": trend_counters.stats(),
+    }
+
+# Ids of redeemed /events tickets, kept until the ticket would have expired anyway
+redeemed_event_tickets: Dict[str, float] = {}
+
+def create_events_ticket(user_id: int) -> str:
+    # No "sub" claim, so get_current_user never accepts a ticket as an access token
+    expire = datetime.utcnow() + timedelta(seconds=EVENTS_TICKET_SECONDS)
+    return jwt.encode({"uid": user_id, "purpose": EVENTS_TICKET_PURPOSE, "jti": secrets.token_urlsafe(16), "exp": expire},
+                      SECRET_KEY, algorithm=ALGORITHM)
+
+def redeem_events_ticket(ticket: str, db: Session) -> AuthenticatedUser:
+    """Validate an /events ticket and mark it used. Expired, reused or foreign tickets raise 401."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid or expired events ticket",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    try:
+        payload = jwt.decode(ticket, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.InvalidTokenError:
+        raise credentials_exception
+    ticket_id = payload.get("jti")
+    if payload.get("purpose") != EVENTS_TICKET_PURPOSE or not ticket_id or ticket_id in redeemed_event_tickets:
+        raise credentials_exception
+    now = time.time()
+    for expired_id in [key for key, expires_at in redeemed_event_tickets.items() if expires_at < now]:
+        del redeemed_event_tickets[expired_id]
+    redeemed_event_tickets[ticket_id] = payload["exp"]
+    row = db.query(User.id, User.email).filter(User.id == payload.get("uid"), User.deleted_at.is_(None)).first()
+    if row is None:
+        raise credentials_exception
+    return AuthenticatedUser(id=row.id, email=row.email)
+
+@app.post("/events/ticket")
+async def create_events_ticket_endpoint(current_user: AuthenticatedUser = Depends(get_current_user)):
+    """Single-use ticket for opening GET /events?ticket= from a browser EventSource."""
+    return {"ticket": create_events_ticket(current_user.id), "expires_in": EVENTS_TICKET_SECONDS}
+
+async def get_current_user_for_events(
+    ticket: Optional[str] = None,
+    token: Optional[str] = Depends(oauth2_scheme_optional),
+    db: Session = Depends(get_db)
+):
+    if not token and not ticket:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        # The Authorization header wins; the ticket is only for clients that can't send one
+        if token:
+            return await get_current_user(token, db)
+        return redeem_events_ticket(ticket, db)
+    finally:
+        # The event stream can stay open for hours; don't keep a pooled connection checked out for it
+        db.close()
+
+@app.get("/events")
+async def stream_events(
+    last_event_id: Optional[int] = None,
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: AuthenticatedUser = Depends(get_current_user_for_events)
+):
+    """
+    Server-sent events for the current user: summary.created, stream.updated and job.status.
+    Reconnects resume after Last-Event-ID (header, or ?last_event_id=); a resync event means
+    events may have been missed and the listings should be refetched.
+    """
+    cursor = last_event_id
+    if cursor is None and last_event_id_header and last_event_id_header.isdigit():
+        cursor = int(last_event_id_header)
+    logger.debug(f"Opening event stream for user {current_user.id} after event {cursor}")
+    return StreamingResponse(
+        sse_stream(event_bus, current_user.id, cursor),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.get("/test-log")
 async def test_log_endpoint():
     message = f"Test log endpoint hit at {datetime.utcnow().isoformat()}"
@@ -886,17 +1621,53 @@ async def test_log_endpoint():
     logger.info(f"LOGGER.INFO: {message}")
     return {"message": message}
 
+def apply_topic_stream_changes(db_topic_stream: models.TopicStream, changes: dict):
+    """Set payload fields (excluding id and user_id) on a stream. Raises ValueError for unknown enum values."""
+    for field, value in changes.items():
+        if field == 'update_frequency':
+            setattr(db_topic_stream, field, UpdateFrequency(value))
+        elif field == 'detail_level':
+             setattr(db_topic_stream, field, DetailLevel(value))
+        elif field == 'model_type':
+             setattr(db_topic_stream, field, ModelType.R1_1776 if value == "r1-1776" else ModelType(value))
+        elif field == 'context_history_level':
+             setattr(db_topic_stream, field, ContextHistoryLevel(value))
+        elif field == 'duplicate_policy':
+             if value is not None:
+                 setattr(db_topic_stream, field, DuplicatePolicy(value))
+        elif field == 'auto_update_enabled':
+            # Ensure the value is a boolean
+            bool_value = bool(value)
+            setattr(db_topic_stream, field, bool_value)
+            logger.info(f"Updating stream {db_topic_stream.id} auto_update_enabled to: {bool_value}")
+        else:
+            setattr(db_topic_stream, field, value)
+
+def reschedule_topic_stream(db_topic_stream: models.TopicStream):
+    # Add logic to interact with the scheduler based on auto_update_enabled
+    scheduler_instance = get_scheduler()
+    if scheduler_instance:
+        if db_topic_stream.auto_update_enabled:
+            logger.info(f"Stream {db_topic_stream.id} updated with auto-update enabled. Re-scheduling.")
+            scheduler_instance.schedule_topic_stream(db_topic_stream)
+        else:
+            logger.info(f"Stream {db_topic_stream.id} updated with auto-update disabled. Removing from schedule.")
+            scheduler_instance.remove_topic_stream(db_topic_stream.id)
+    else:
+        logger.error("Scheduler not available, cannot interact with schedule during update.")
+
 @app.put("/topic-streams/{topic_stream_id}", response_model=TopicStreamResponse)
 async def update_topic_stream(
     topic_stream_id: int,
     topic_stream_data: TopicStreamCreate, # Use TopicStreamCreate for payload
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     try:
         db_topic_stream = db.query(models.TopicStream).filter(
             models.TopicStream.id == topic_stream_id,
-            models.TopicStream.user_id == current_user.id
+            models.TopicStream.user_id == current_user.id,
+            models.TopicStream.deleted_at.is_(None)
         ).first()
 
         if not db_topic_stream:
@@ -904,38 +1675,15 @@ async def update_topic_stream(
 
         logger.debug(f"Updating topic stream {topic_stream_id} with data: {topic_stream_data}")
 
-        # Update model fields from payload if provided (excluding id and user_id)
-        for field, value in topic_stream_data.dict(exclude_unset=True).items():
-            if field == 'update_frequency':
-                setattr(db_topic_stream, field, UpdateFrequency(value))
-            elif field == 'detail_level':
-                 setattr(db_topic_stream, field, DetailLevel(value))
-            elif field == 'model_type':
-                 setattr(db_topic_stream, field, ModelType.R1_1776 if value == "r1-1776" else ModelType(value))
-            elif field == 'context_history_level':
-                 setattr(db_topic_stream, field, ContextHistoryLevel(value))
-            elif field == 'auto_update_enabled':
-                # Ensure the value is a boolean
-                bool_value = bool(value)
-                setattr(db_topic_stream, field, bool_value)
-                logger.info(f"Updating stream {db_topic_stream.id} auto_update_enabled to: {bool_value}")
-            else:
-                setattr(db_topic_stream, field, value)
+        apply_topic_stream_changes(db_topic_stream, topic_stream_data.dict(exclude_unset=True))
 
+        bump_user_version(db, current_user.id)
+        record_changes(db, [(STREAM, db_topic_stream.id, db_topic_stream.id, UPSERT)])
         db.commit()
         db.refresh(db_topic_stream)
+        publish_stream_updated(current_user.id, db_topic_stream.id, "updated")
 
-        # Add logic to interact with the scheduler based on auto_update_enabled
-        scheduler_instance = get_scheduler()
-        if scheduler_instance:
-            if db_topic_stream.auto_update_enabled:
-                logger.info(f"Stream {db_topic_stream.id} updated with auto-update enabled. Re-scheduling.")
-                scheduler_instance.schedule_topic_stream(db_topic_stream)
-            else:
-                logger.info(f"Stream {db_topic_stream.id} updated with auto-update disabled. Removing from schedule.")
-                scheduler_instance.remove_topic_stream(db_topic_stream.id)
-        else:
-            logger.error("Scheduler not available, cannot interact with schedule during update.")
+        reschedule_topic_stream(db_topic_stream)
 
         return db_topic_stream
     except ValueError as e:
@@ -0,0 +1,189 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Index, tuple_
+from sqlalchemy.orm import sessionmaker, declarative_base, deferred, undefer
+
+from models import Summary
+from versioning import bump_stream_versions
+from utils.compression import CompressedText
+
+logger = logging.getLogger(__name__)
+
+# Cold tier lives in its own SQLite file so the hot `summaries` table (and its indexes) stay small.
+ARCHIVE_DATABASE_URL = os.getenv("ARCHIVE_DATABASE_URL", "sqlite:///./trendpulse_archive.db")
+# Summaries older than this many days are moved to the archive. 0 disables archiving.
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "500"))
+
+archive_engine = create_engine(
+    ARCHIVE_DATABASE_URL, connect_args={"check_same_thread": False}
+)
+ArchiveSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=archive_engine)
+
+ArchiveBase = declarative_base()
+
+class ArchivedSummary(ArchiveBase):
+    """Append-only copy of a summary row. Keeps the original summary id so moves are idempotent."""
+    __tablename__ = "archived_summaries"
+
+    id = Column(Integer, primary_key=True)
+    topic_stream_id = Column(Integer, nullable=False)
+    # threshold=0: everything in the cold tier is compressed if it shrinks at all
+    content = Column(CompressedText(threshold=0), nullable=False)
+    sources = Column(CompressedText(threshold=0), nullable=True)
+    reasoning = deferred(Column(CompressedText(threshold=0), nullable=True))
+    created_at = Column(DateTime, nullable=False)
+    model = Column(String, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    total_tokens = Column(Integer, nullable=True)
+    estimated_content_tokens = Column(Integer, nullable=True)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index("ix_archived_summaries_stream_created", "topic_stream_id", "created_at"),
+    )
+
+ARCHIVED_COLUMNS = ("id", "topic_stream_id", "content", "sources", "reasoning", "created_at", "model",
+                    "prompt_tokens", "completion_tokens", "total_tokens", "estimated_content_tokens")
+
+_schema_ready = False
+
+def ensure_archive_schema():
+    global _schema_ready
+    if not _schema_ready:
+        ArchiveBase.metadata.create_all(bind=archive_engine)
+        _schema_ready = True
+
+def archive_old_summaries(db_session_factory, older_than_days: Optional[int] = None, batch_size: Optional[int] = None) -> int:
+    """
+    Move summaries older than the policy threshold from the hot table into the archive database.
+    Each batch is written to the archive first and only then deleted from the hot table, so a crash
+    between the two steps leaves a duplicate (re-archived idempotently on the next run), never a loss.
+    Returns the number of summaries moved.
+    """
+    older_than_days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    if older_than_days <= 0:
+        logger.info("[Archive] Archiving disabled (ARCHIVE_AFTER_DAYS <= 0).")
+        return 0
+
+    ensure_archive_schema()
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    moved = 0
+    db = db_session_factory()
+    archive_db = ArchiveSessionLocal()
+    try:
+        while True:
+            batch = db.query(Summary).options(undefer(Summary.reasoning)).filter(
+                Summary.created_at < cutoff
+            ).order_by(Summary.id).limit(batch_size).all()
+            if not batch:
+                break
+
+            for summary in batch:
+                archive_db.merge(ArchivedSummary(**{column: getattr(summary, column) for column in ARCHIVED_COLUMNS}))
+            archive_db.commit()
+
+            batch_ids = [summary.id for summary in batch]
+            db.query(Summary).filter(Summary.id.in_(batch_ids)).delete(synchronize_session=False)
+            bump_stream_versions(db, {summary.topic_stream_id for summary in batch})
+            db.commit()
+            db.expunge_all()
+            moved += len(batch_ids)
+            logger.debug(f"[Archive] Moved batch of {len(batch_ids)} summaries (up to ID {batch_ids[-1]}).")
+
+        if moved:
+            logger.info(f"[Archive] Moved {moved} summaries older than {older_than_days} days to the archive.")
+        return moved
+    except Exception as e:
+        logger.error(f"[Archive] Error archiving old summaries: {e}", exc_info=True)
+        db.rollback()
+        archive_db.rollback()
+        raise
+    finally:
+        archive_db.close()
+        db.close()
+
+def fetch_archived_summaries(topic_stream_id: int, include_reasoning: bool = False, limit: Optional[int] = None) -> List[Tuple[ArchivedSummary, bool]]:
+    """
+    Read path for history views: (archived summary, has_reasoning) pairs for one stream, newest first.
+    Reasoning stays deferred unless include_reasoning is set.
+    """
+    ensure_archive_schema()
+    archive_db = ArchiveSessionLocal()
+    try:
+        query = archive_db.query(ArchivedSummary, ArchivedSummary.reasoning.isnot(None)).filter(
+            ArchivedSummary.topic_stream_id == topic_stream_id
+        ).order_by(ArchivedSummary.created_at.desc())
+        if include_reasoning:
+            query = query.options(undefer(ArchivedSummary.reasoning))
+        if limit:
+            query = query.limit(limit)
+        rows = query.all()
+        archive_db.expunge_all()
+        return rows
+    finally:
+        archive_db.close()
+
+def iter_archived_summaries(topic_stream_id: int, include_reasoning: bool = False, before: Optional[Tuple[datetime, int]] = None,
+                            batch_size: Optional[int] = None) -> Iterator[Tuple[ArchivedSummary, bool]]:
+    """
+    Like fetch_archived_summaries, newest first, but read in (created_at, id) keyset pages of `batch_size`
+    so memory stays flat for any history size. Each page is its own short read; nothing is held open
+    between pages. `before` skips everything at or after that (created_at, id).
+    """
+    ensure_archive_schema()
+    batch_size = batch_size or ARCHIVE_BATCH_SIZE
+    archive_db = ArchiveSessionLocal()
+    try:
+        while True:
+            query = archive_db.query(ArchivedSummary, ArchivedSummary.reasoning.isnot(None)).filter(
+                ArchivedSummary.topic_stream_id == topic_stream_id
+            )
+            if before is not None:
+                query = query.filter(tuple_(ArchivedSummary.created_at, ArchivedSummary.id) < before)
+            if include_reasoning:
+                query = query.options(undefer(ArchivedSummary.reasoning))
+            rows = query.order_by(ArchivedSummary.created_at.desc(), ArchivedSummary.id.desc()).limit(batch_size).all()
+            archive_db.expunge_all()
+            archive_db.rollback()
+            yield from rows
+            if len(rows) < batch_size:
+                return
+            before = (rows[-1][0].created_at, rows[-1][0].id)
+    finally:
+        archive_db.close()
+
+def get_archived_summary(summary_id: int, topic_stream_id: int) -> Optional[ArchivedSummary]:
+    ensure_archive_schema()
+    archive_db = ArchiveSessionLocal()
+    try:
+        row = archive_db.query(ArchivedSummary).options(undefer(ArchivedSummary.reasoning)).filter(
+            ArchivedSummary.id == summary_id,
+            ArchivedSummary.topic_stream_id == topic_stream_id
+        ).first()
+        if row:
+            archive_db.expunge(row)
+        return row
+    finally:
+        archive_db.close()
+
+def delete_archived_summaries(topic_stream_ids: Iterable[int]) -> int:
+    """Remove the cold-tier rows of deleted streams."""
+    topic_stream_ids = list(topic_stream_ids)
+    if not topic_stream_ids:
+        return 0
+    ensure_archive_schema()
+    archive_db = ArchiveSessionLocal()
+    try:
+        deleted = archive_db.query(ArchivedSummary).filter(
+            ArchivedSummary.topic_stream_id.in_(topic_stream_ids)
+        ).delete(synchronize_session=False)
+        archive_db.commit()
+        return deleted
+    finally:
+        archive_db.close()
@@ -0,0 +1,109 @@
+import os
+import time
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Set
+
+from sqlalchemy import event
+
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# How long a validated token is trusted without touching the users table. Deleting a user or
+# changing their password invalidates their entries immediately in this process; other processes
+# pick the change up within the TTL.
+AUTH_CACHE_TTL_SECONDS = int(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
+
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """The identity get_current_user hands to endpoints; they only ever need the id and email."""
+    id: int
+    email: str
+
+
+def token_key(token: str) -> bytes:
+    # Raw tokens are never kept in memory as keys
+    return hashlib.sha256(token.encode("utf-8")).digest()
+
+
+class AuthCache:
+    """Bounded LRU of validated tokens (keyed by token hash) with a TTL capped at each token's expiry."""
+
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES, ttl_seconds: int = AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._keys_by_user: Dict[int, Set[bytes]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str) -> Optional[AuthenticatedUser]:
+        if self.ttl_seconds <= 0:
+            return None
+        key = token_key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            principal, expires_at = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return principal
+
+    def put(self, token: str, principal: AuthenticatedUser, token_expires_at: Optional[float] = None):
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = time.time() + self.ttl_seconds
+        if token_expires_at is not None:
+            expires_at = min(expires_at, token_expires_at)
+        key = token_key(token)
+        with self._lock:
+            self._entries[key] = (principal, expires_at)
+            self._entries.move_to_end(key)
+            self._keys_by_user.setdefault(principal.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: bytes):
+        principal, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(principal.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[principal.id]
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+auth_cache = AuthCache()
+
+
+@event.listens_for(User.hashed_password, "set")
+def _invalidate_on_password_change(target, value, oldvalue, initiator):
+    # Any ORM write of a new password hash drops the user's cached tokens
+    if target.id is not None and value != oldvalue:
+        auth_cache.invalidate_user(target.id)
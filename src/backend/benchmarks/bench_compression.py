@@ -0,0 +1,94 @@
+# Benchmark: bytes saved by summary compression vs. decompress cost on read
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_compression.py              # uses summaries from trendpulse.db if present
+#   python benchmarks/bench_compression.py --synthetic  # generated reasoning-style summaries
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.compression import compress_text, decompress_text, zstandard
+
+WORDS = ("model", "release", "benchmark", "reasoning", "latency", "source", "analysis", "update",
+         "announced", "according", "report", "performance", "open", "weights", "token", "context")
+
+
+def synthetic_summaries(count: int):
+    rng = random.Random(42)
+    summaries = []
+    for _ in range(count):
+        think = " ".join(rng.choice(WORDS) for _ in range(rng.randint(400, 2500)))
+        answer = "\n".join(
+            f"- **{rng.choice(WORDS).title()}**: " + " ".join(rng.choice(WORDS) for _ in range(30))
+            for _ in range(rng.randint(5, 20))
+        )
+        summaries.append(f"<think>\n{think}\n</think>\n\n## Update\n\n{answer}")
+    return summaries
+
+
+def stored_summaries(limit: int):
+    from database import SessionLocal
+    from models import Summary
+    db = SessionLocal()
+    try:
+        return [row.content for row in db.query(Summary.content).order_by(Summary.id.desc()).limit(limit)]
+    finally:
+        db.close()
+
+
+def run(texts, codec: str, threshold: int):
+    raw_bytes = 0
+    stored_bytes = 0
+    compressed_rows = 0
+    compressed_values = []
+    for text in texts:
+        raw = len(text.encode("utf-8"))
+        stored = compress_text(text, threshold=threshold, codec=codec)
+        raw_bytes += raw
+        stored_bytes += len(stored) if isinstance(stored, bytes) else raw
+        if isinstance(stored, bytes):
+            compressed_rows += 1
+        compressed_values.append(stored)
+
+    timings = []
+    for value in compressed_values:
+        start = time.perf_counter()
+        decompress_text(value)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+
+    saved = raw_bytes - stored_bytes
+    print(f"[{codec}] threshold={threshold}B rows={len(texts)} compressed_rows={compressed_rows}")
+    print(f"  raw={raw_bytes / 1024:.1f} KiB stored={stored_bytes / 1024:.1f} KiB "
+          f"saved={saved / 1024:.1f} KiB ({(saved / raw_bytes * 100) if raw_bytes else 0:.1f}%)")
+    print(f"  decompress per read: mean={statistics.mean(timings):.1f}us "
+          f"p95={sorted(timings)[int(len(timings) * 0.95) - 1]:.1f}us max={max(timings):.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--synthetic", action="store_true", help="Use generated summaries instead of the database")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--threshold", type=int, default=1024)
+    args = parser.parse_args()
+
+    texts = [] if args.synthetic else stored_summaries(args.count)
+    if not texts:
+        print("Using synthetic reasoning-style summaries.")
+        texts = synthetic_summaries(args.count)
+
+    run(texts, "zlib", args.threshold)
+    if zstandard is not None:
+        run(texts, "zstd", args.threshold)
+    else:
+        print("[zstd] skipped - 'zstandard' package not installed")
+
+
+if __name__ == "__main__":
+    main()
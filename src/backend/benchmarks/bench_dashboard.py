@@ -0,0 +1,90 @@
+# Benchmark: dashboard first paint, /topic-streams/ + one summaries request per stream vs. one GET /dashboard
+#
+# Seeds a temporary, migrated database with one user, N streams and M summaries per stream, then
+# times both load patterns through the ASGI app (no network, so this understates the N+1 cost).
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_dashboard.py --streams 50 --summaries 20 --repeat 10
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+from datetime import datetime, timedelta
+
+# Add the backend directory to the system path
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+
+def seed(streams: int, summaries: int):
+    from database import SessionLocal
+    from models import TopicStream, Summary
+    from bench_compression import synthetic_summaries
+
+    texts = synthetic_summaries(50)
+    db = SessionLocal()
+    start = datetime(2025, 1, 1)
+    db.add_all([TopicStream(id=i, user_id=1, query=f"topic {i}") for i in range(1, streams + 1)])
+    db.add_all([
+        Summary(topic_stream_id=stream_id, content=texts[(stream_id + i) % len(texts)].split("</think>")[-1],
+                sources=json.dumps([f"https://example.com/{stream_id}/{i}"]), created_at=start + timedelta(hours=i),
+                model="sonar", estimated_content_tokens=400)
+        for stream_id in range(1, streams + 1) for i in range(summaries)
+    ])
+    db.commit()
+    db.close()
+
+
+async def run(streams: int, summaries: int, repeat: int):
+    import httpx
+    import app
+
+    async with httpx.AsyncClient(app=app.app, base_url="http://bench") as client:
+        await client.post("/users/", json={"email": "bench@example.com", "password": "bench"})
+        token = (await client.post("/token", data={"username": "bench@example.com", "password": "bench"})).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        seed(streams, summaries)
+
+        async def n_plus_one():
+            listed = (await client.get("/topic-streams/", headers=headers)).json()
+            await asyncio.gather(*[client.get(f"/topic-streams/{stream['id']}/summaries/", headers=headers) for stream in listed])
+            return 1 + len(listed)
+
+        async def dashboard():
+            response = await client.get("/dashboard", headers=headers)
+            assert response.status_code == 200, response.text
+            return 1
+
+        for name, load in (("1+N requests", n_plus_one), ("GET /dashboard", dashboard)):
+            await load()  # warm up
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                requests = await load()
+                timings.append((time.perf_counter() - start) * 1000)
+            print(f"{name:>15}: {requests:>3} requests, median={statistics.median(timings):.1f}ms min={min(timings):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--streams", type=int, default=50)
+    parser.add_argument("--summaries", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from migrate import run_migrations
+        run_migrations()
+        asyncio.run(run(args.streams, args.summaries, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
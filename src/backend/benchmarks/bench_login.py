@@ -0,0 +1,82 @@
+# Benchmark: login throughput and event loop responsiveness during a burst of logins
+#
+# Creates users in a temporary, migrated database and fires concurrent POST /token requests while a
+# probe measures how long a trivial request (/metrics) takes to be served in the meantime.
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_login.py --users 20 --logins 100
+#   BCRYPT_ROUNDS=10 PASSWORD_HASH_WORKERS=4 python benchmarks/bench_login.py
+
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+
+# Add the backend directory to the system path
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, BACKEND_DIR)
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+
+async def probe(client, stop: asyncio.Event, latencies):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/metrics")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(0.01)
+
+
+async def run(users: int, logins: int, concurrency: int):
+    import httpx
+    import app
+    from password_hashing import password_hasher
+
+    async with httpx.AsyncClient(app=app.app, base_url="http://bench") as client:
+        for i in range(users):
+            response = await client.post("/users/", json={"email": f"user{i}@example.com", "password": f"password{i}"})
+            assert response.status_code == 200, response.text
+
+        semaphore = asyncio.Semaphore(concurrency)
+        statuses = []
+
+        async def login(i):
+            async with semaphore:
+                response = await client.post("/token", data={"username": f"user{i % users}@example.com", "password": f"password{i % users}"})
+                statuses.append(response.status_code)
+
+        stop, latencies = asyncio.Event(), []
+        probe_task = asyncio.create_task(probe(client, stop, latencies))
+        start = time.perf_counter()
+        await asyncio.gather(*[login(i) for i in range(logins)])
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe_task
+
+    password_hasher.shutdown()
+    ok = statuses.count(200)
+    print(f"{logins} logins (concurrency {concurrency}) in {elapsed:.2f}s: {ok / elapsed:.1f} logins/s, "
+          f"{ok} ok, {statuses.count(503)} shed (503)")
+    print(f"  probe latency during burst: median={statistics.median(latencies):.1f}ms "
+          f"max={max(latencies):.1f}ms samples={len(latencies)}")
+    print(f"  hashing pool: {password_hasher.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        from migrate import run_migrations
+        run_migrations()
+        asyncio.run(run(args.users, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# Benchmark: event loop lag with the update pipeline's CPU steps inline vs. offloaded to the executor
+#
+# Simulates concurrent updates: each one "waits on the API" (asyncio.sleep) and then does the CPU
+# work the real pipeline does (payload/response JSON encoding, source regex extraction, tokenization).
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_loop_lag.py --concurrency 20 --rounds 5
+#   TOKENIZER_EXECUTOR_KIND=process python benchmarks/bench_loop_lag.py
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from cpu_executor import CpuExecutor, EventLoopLagMonitor, TOKENIZER_EXECUTOR_KIND
+from perplexity_api import extract_sources_from_content
+from utils.tokenizer_utils import count_tokens
+from bench_compression import synthetic_summaries
+
+
+async def update_once(content: str, payload: dict, executor):
+    await asyncio.sleep(0.01)  # API round trip
+    if executor is None:
+        json.dumps(payload, indent=2)
+        json.loads(json.dumps(payload))
+        extract_sources_from_content(content)
+        count_tokens(content)
+    else:
+        await executor.run(json.dumps, payload, indent=2)
+        await executor.run(json.loads, json.dumps(payload))
+        await executor.run(extract_sources_from_content, content)
+        await executor.run_tokenizer(count_tokens, content)
+
+
+async def run(mode: str, texts, concurrency: int, rounds: int):
+    executor = None if mode == "inline" else CpuExecutor(tokenizer_kind=TOKENIZER_EXECUTOR_KIND)
+    monitor = EventLoopLagMonitor(interval_ms=5)
+    monitor.start()
+    payloads = [{"messages": [{"role": "user", "content": text} for _ in range(5)]} for text in texts]
+    start = time.perf_counter()
+    for round_number in range(rounds):
+        await asyncio.gather(*[
+            update_once(texts[(round_number * concurrency + i) % len(texts)],
+                        payloads[(round_number * concurrency + i) % len(texts)], executor)
+            for i in range(concurrency)
+        ])
+    elapsed = time.perf_counter() - start
+    await monitor.stop()
+    if executor is not None:
+        executor.shutdown()
+    lag = monitor.snapshot()
+    print(f"[{mode}] {concurrency * rounds} updates in {elapsed:.2f}s: loop lag mean={lag['mean_ms']}ms "
+          f"p99={lag['p99_ms']}ms max={lag['max_ms']}ms stalls={lag['stalls']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = [text + "\n\nSources:\n" + "\n".join(f"- [ref {i}](https://example.com/{i})" for i in range(20))
+             for text in synthetic_summaries(50)]
+    asyncio.run(run("inline", texts, args.concurrency, args.rounds))
+    asyncio.run(run("executor", texts, args.concurrency, args.rounds))
+
+
+if __name__ == "__main__":
+    main()
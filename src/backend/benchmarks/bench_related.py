@@ -0,0 +1,74 @@
+# Benchmark: GET /summaries/{id}/related scoring - cosine top-k over the memory-mapped index
+#
+# Builds a temporary index of N synthetic summaries spread over S streams, then times top_k for a
+# user owning a given number of those streams (cold and warm page cache) and the cost of one append.
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_related.py --summaries 100000 --streams 2000 --user-streams 20 --repeat 20
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from related_index import RelatedIndex, record_dtype, vectorize, RELATED_INDEX_DIM
+from bench_compression import synthetic_summaries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--summaries", type=int, default=100000)
+    parser.add_argument("--streams", type=int, default=2000)
+    parser.add_argument("--user-streams", type=int, default=20)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    texts = [text.split("</think>")[-1] for text in synthetic_summaries(200)]
+    start = time.perf_counter()
+    vectors = np.stack([vectorize(text) for text in texts])
+    per_summary_ms = (time.perf_counter() - start) * 1000 / len(texts)
+
+    rng = np.random.default_rng(0)
+    records = np.zeros(args.summaries, dtype=record_dtype(RELATED_INDEX_DIM))
+    records["id"] = np.arange(1, args.summaries + 1)
+    records["topic_stream_id"] = rng.integers(1, args.streams + 1, args.summaries)
+    records["vector"] = vectors[rng.integers(0, len(vectors), args.summaries)]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        index = RelatedIndex(os.path.join(workdir, "related.idx"))
+        with open(index.path, "wb") as index_file:
+            index_file.write(records.tobytes())
+        with open(index.meta_path, "w") as meta_file:
+            json.dump(index._layout(), meta_file)
+
+        user_streams = list(range(1, args.user_streams + 1))
+        query = vectors[0]
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            index.top_k(query, user_streams, args.k)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        index.add([(args.summaries + 1, 1, texts[0])])
+        index.top_k(query, user_streams, args.k)
+        append_ms = (time.perf_counter() - start) * 1000
+
+    candidates = int(np.isin(records["topic_stream_id"], user_streams).sum())
+    print(f"index: {args.summaries} summaries, {args.summaries * records.dtype.itemsize / 1e6:.0f} MB on disk, dim={RELATED_INDEX_DIM}")
+    print(f"vectorize: {per_summary_ms:.2f}ms per summary")
+    print(f"top-{args.k} over {candidates} candidates: first={timings[0]:.1f}ms median={statistics.median(timings[1:] or timings):.1f}ms")
+    print(f"append + next query: {append_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
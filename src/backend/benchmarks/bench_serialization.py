@@ -0,0 +1,107 @@
+# Benchmark: per-request CPU to build a 1k-summary response, Pydantic path vs. projection + orjson/msgpack
+#
+# The Pydantic path is what the summaries endpoint used to do: load ORM rows, build a SummaryResponse
+# per row, then let FastAPI run jsonable_encoder + json.dumps over the list.
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_serialization.py --summaries 1000 --repeat 20
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from datetime import datetime, timedelta
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("PERPLEXITY_API_KEY", "benchmark")
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from starlette.requests import Request
+
+from app import SummaryResponse
+from database import Base
+from fast_response import fast_response, summary_row_to_dict, msgpack
+from models import User, TopicStream, Summary
+from bench_compression import synthetic_summaries
+
+
+def build_db(count: int):
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(User(id=1, email="bench@example.com", hashed_password="x"))
+    db.add(TopicStream(id=1, user_id=1, query="bench"))
+    start = datetime(2025, 1, 1)
+    texts = synthetic_summaries(50)
+    db.add_all([
+        Summary(topic_stream_id=1, content=texts[i % len(texts)].split("</think>")[-1], created_at=start + timedelta(hours=i),
+                sources=json.dumps([f"https://example.com/{i}/{j}" for j in range(5)]), model="sonar",
+                prompt_tokens=100, completion_tokens=400, total_tokens=500, estimated_content_tokens=400)
+        for i in range(count)
+    ])
+    db.commit()
+    return db
+
+
+def pydantic_path(db):
+    rows = db.query(Summary, Summary.reasoning.isnot(None)).filter(Summary.topic_stream_id == 1).order_by(Summary.created_at.desc()).all()
+    models = [
+        SummaryResponse(
+            id=s.id, content=s.content, sources=json.loads(s.sources), created_at=s.created_at, model=s.model or "",
+            prompt_tokens=s.prompt_tokens, completion_tokens=s.completion_tokens, total_tokens=s.total_tokens,
+            estimated_content_tokens=s.estimated_content_tokens, has_reasoning=bool(has_reasoning)
+        )
+        for s, has_reasoning in rows
+    ]
+    db.expunge_all()
+    # What FastAPI does with a response_model: validate again, encode, dump
+    validated = [SummaryResponse.model_validate(m.model_dump()) for m in models]
+    return json.dumps(jsonable_encoder(validated)).encode("utf-8")
+
+
+def fast_path(db, accept: str):
+    rows = db.query(
+        Summary.id, Summary.content, Summary.sources, Summary.created_at, Summary.model,
+        Summary.prompt_tokens, Summary.completion_tokens, Summary.total_tokens,
+        Summary.estimated_content_tokens, Summary.reasoning.isnot(None).label("has_reasoning")
+    ).filter(Summary.topic_stream_id == 1).order_by(Summary.created_at.desc()).all()
+    request = Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+    return fast_response(request, [summary_row_to_dict(row, row.has_reasoning, False) for row in rows]).body
+
+
+def measure(name: str, fn, repeat: int):
+    fn()  # warm up
+    cpu = []
+    for _ in range(repeat):
+        start = time.process_time()
+        body = fn()
+        cpu.append((time.process_time() - start) * 1000)
+    print(f"{name:>16}: cpu/request median={statistics.median(cpu):.1f}ms min={min(cpu):.1f}ms body={len(body) / 1024:.0f} KiB")
+    return statistics.median(cpu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--summaries", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    db = build_db(args.summaries)
+    print(f"{args.summaries} summaries per response")
+    baseline = measure("pydantic", lambda: pydantic_path(db), args.repeat)
+    fast = measure("orjson", lambda: fast_path(db, "application/json"), args.repeat)
+    print(f"  orjson speed-up: {baseline / fast:.1f}x")
+    if msgpack is not None:
+        measure("msgpack", lambda: fast_path(db, "application/msgpack"), args.repeat)
+    else:
+        print("         msgpack: skipped - 'msgpack' package not installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Benchmark: cold start, from `import app` to the first request served
+#
+# Each run is a fresh interpreter in a temporary working directory (so a fresh, migrated SQLite
+# database), timing the import, lifespan startup and the first request. Exits non-zero when the
+# median total exceeds the budget, so it can be tracked in CI.
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_startup.py
+#   python benchmarks/bench_startup.py --runs 5 --budget-ms 2500
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STARTUP_BUDGET_MS = int(os.getenv("STARTUP_BUDGET_MS", "3000"))
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+sys.path.insert(0, {backend_dir!r})
+import app
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app.app) as client:
+    started = time.perf_counter()
+    response = client.get("/test-log")
+    served = time.perf_counter()
+assert response.status_code == 200, response.text
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "startup_ms": (started - imported) * 1000,
+    "first_request_ms": (served - started) * 1000,
+    "total_ms": (served - start) * 1000,
+}}))
+"""
+
+
+def run_once(workdir: str) -> dict:
+    env = dict(os.environ, PERPLEXITY_API_KEY=os.getenv("PERPLEXITY_API_KEY", "benchmark"))
+    # Migrations are an explicit step, so run them first and keep them out of the measurement
+    subprocess.run([sys.executable, os.path.join(BACKEND_DIR, "migrate.py")], cwd=workdir, env=env,
+                   check=True, capture_output=True)
+    result = subprocess.run([sys.executable, "-c", CHILD.format(backend_dir=BACKEND_DIR)], cwd=workdir, env=env,
+                            check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--budget-ms", type=int, default=STARTUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        with tempfile.TemporaryDirectory() as workdir:
+            runs.append(run_once(workdir))
+
+    for key in ("import_ms", "startup_ms", "first_request_ms", "total_ms"):
+        values = [run[key] for run in runs]
+        print(f"{key:>17}: median={statistics.median(values):.0f}ms min={min(values):.0f}ms max={max(values):.0f}ms")
+
+    total = statistics.median(run["total_ms"] for run in runs)
+    if total > args.budget_ms:
+        print(f"FAIL: median cold start {total:.0f}ms exceeds budget {args.budget_ms}ms")
+        sys.exit(1)
+    print(f"OK: median cold start {total:.0f}ms within budget {args.budget_ms}ms")
+
+
+if __name__ == "__main__":
+    main()
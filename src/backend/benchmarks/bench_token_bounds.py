@@ -0,0 +1,68 @@
+# Benchmark: hard token bounds vs. exact tiktoken counts (speed, tightness and how often they decide a budget)
+#
+# Usage (from src/backend):
+#   python benchmarks/bench_token_bounds.py              # uses summaries from trendpulse.db if present
+#   python benchmarks/bench_token_bounds.py --synthetic  # generated reasoning-style summaries
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from utils.tokenizer_utils import get_encoding, count_tokens, token_bounds, fits_token_budget
+from bench_compression import synthetic_summaries, stored_summaries
+
+
+def time_per_call(fn, texts, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            fn(text)
+    return (time.perf_counter() - start) / (repeat * len(texts)) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--synthetic", action="store_true", help="Use generated summaries instead of the database")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=2000, help="Budget used for the fits_token_budget check")
+    args = parser.parse_args()
+
+    texts = [] if args.synthetic else stored_summaries(args.count)
+    if not texts:
+        print("Using synthetic reasoning-style summaries.")
+        texts = synthetic_summaries(args.count)
+
+    bounds_us = time_per_call(token_bounds, texts, args.repeat)
+    print(f"token_bounds: {bounds_us:.1f}us per summary")
+    if get_encoding() is None:
+        print("tiktoken encoding not available - skipping exact comparison.")
+        return
+
+    exact_us = time_per_call(count_tokens, texts, args.repeat)
+    print(f"count_tokens (tiktoken): {exact_us:.1f}us per summary ({exact_us / bounds_us:.1f}x slower)")
+
+    lower_ratios, upper_ratios, violations, exact_fallbacks = [], [], 0, 0
+    for text in texts:
+        exact = count_tokens(text)
+        bounds = token_bounds(text)
+        lower_ratios.append(bounds.lower / max(exact, 1))
+        upper_ratios.append(bounds.upper / max(exact, 1))
+        if not bounds.lower <= exact <= bounds.upper:
+            violations += 1
+        if bounds.lower <= args.budget < bounds.upper:
+            exact_fallbacks += 1
+    print(f"  lower/exact: mean={statistics.mean(lower_ratios):.2f} upper/exact: mean={statistics.mean(upper_ratios):.2f}")
+    print(f"  bound violations: {violations}/{len(texts)}")
+
+    budget_us = time_per_call(lambda text: fits_token_budget(text, args.budget), texts, args.repeat)
+    print(f"fits_token_budget({args.budget}): {budget_us:.1f}us per summary, exact encode needed for {exact_fallbacks}/{len(texts)}")
+
+
+if __name__ == "__main__":
+    main()
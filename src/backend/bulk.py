@@ -0,0 +1,29 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Iterable, List, TypeVar
+
+logger = logging.getLogger(__name__)
+
+# Most items accepted by one bulk request
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "100"))
+# Upstream searches in flight at once for one bulk refresh; the rest wait their turn
+BULK_REFRESH_CONCURRENCY = int(os.getenv("BULK_REFRESH_CONCURRENCY", "8"))
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+async def gather_bounded(items: Iterable[T], worker: Callable[[T], Awaitable[R]],
+                         limit: int = BULK_REFRESH_CONCURRENCY) -> List[R]:
+    """
+    Run `worker` on every item with at most `limit` running at once, results in item order. The
+    worker is expected to turn its own failures into results; an exception here fails the whole call.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: T) -> R:
+        async with semaphore:
+            return await worker(item)
+
+    return await asyncio.gather(*(run(item) for item in items))
@@ -0,0 +1,112 @@
+import os
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from models import ChangeLog, TopicStream
+
+logger = logging.getLogger(__name__)
+
+# Cursors older than this get a full reset from GET /sync instead of a delta
+CHANGE_LOG_RETENTION_DAYS = int(os.getenv("CHANGE_LOG_RETENTION_DAYS", "30"))
+# Log rows read per /sync call; the client keeps calling while has_more is true
+SYNC_MAX_CHANGES = int(os.getenv("SYNC_MAX_CHANGES", "1000"))
+
+STREAM = "stream"
+SUMMARY = "summary"
+UPSERT = "upsert"
+DELETE = "delete"
+
+
+def record_changes(db: Session, changes: Iterable[Tuple[str, int, int, str]]):
+    """
+    Append (entity, entity_id, topic_stream_id, op) rows in the caller's transaction, so a change is
+    logged if and only if it commits. SQLite has a single writer, so ids also follow commit order.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+    owners = dict(db.query(TopicStream.id, TopicStream.user_id).filter(
+        TopicStream.id.in_({topic_stream_id for _, _, topic_stream_id, _ in changes})
+    ).all())
+    db.execute(insert(ChangeLog), [
+        {"user_id": owners[topic_stream_id], "entity": entity, "entity_id": entity_id,
+         "topic_stream_id": topic_stream_id, "op": op, "created_at": datetime.utcnow()}
+        for entity, entity_id, topic_stream_id, op in changes if topic_stream_id in owners
+    ])
+
+
+class ChangeSet(NamedTuple):
+    cursor: int
+    has_more: bool
+    reset: bool
+    upserted_stream_ids: List[int]
+    deleted_stream_ids: List[int]
+    upserted_summary_ids: List[int]
+    deleted_summary_ids: List[int]
+
+
+def read_changes(db: Session, user_id: int, since: Optional[int], limit: int = SYNC_MAX_CHANGES) -> ChangeSet:
+    """
+    Collapse the user's log rows after `since` to the latest op per entity. `reset` means there is no
+    usable cursor (none given, or older than the retained log) and the client must refetch everything.
+    """
+    # Read the end of the log first: rows committed after this get higher ids and are picked up next time
+    newest_id, oldest_id = db.execute(select(func.max(ChangeLog.id), func.min(ChangeLog.id))).one()
+    newest_id = newest_id or 0
+    if since is None or (oldest_id is not None and since < oldest_id - 1):
+        return ChangeSet(newest_id, False, True, [], [], [], [])
+
+    rows = db.query(ChangeLog.id, ChangeLog.entity, ChangeLog.entity_id, ChangeLog.topic_stream_id, ChangeLog.op).filter(
+        ChangeLog.user_id == user_id, ChangeLog.id > since, ChangeLog.id <= newest_id
+    ).order_by(ChangeLog.id).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest: Dict[Tuple[str, int], Tuple[int, str]] = {}
+    for row in rows:
+        latest[(row.entity, row.entity_id)] = (row.topic_stream_id, row.op)
+    deleted_streams = {entity_id for (entity, entity_id), (_, op) in latest.items() if entity == STREAM and op == DELETE}
+
+    def ids(entity: str, op: str) -> List[int]:
+        # Summaries of a deleted stream are implied by the stream delete
+        return sorted(entity_id for (row_entity, entity_id), (topic_stream_id, row_op) in latest.items()
+                      if row_entity == entity and row_op == op and (entity == STREAM or topic_stream_id not in deleted_streams))
+
+    return ChangeSet(
+        cursor=rows[-1].id if has_more else max(newest_id, since),
+        has_more=has_more,
+        reset=False,
+        upserted_stream_ids=ids(STREAM, UPSERT),
+        deleted_stream_ids=ids(STREAM, DELETE),
+        upserted_summary_ids=ids(SUMMARY, UPSERT),
+        deleted_summary_ids=ids(SUMMARY, DELETE),
+    )
+
+
+def prune_change_log(db_session_factory, older_than_days: int = CHANGE_LOG_RETENTION_DAYS) -> int:
+    """Drop log rows past the retention window. The newest row is always kept so cursor gaps stay detectable."""
+    if older_than_days <= 0:
+        return 0
+    db = db_session_factory()
+    try:
+        newest_id = db.scalar(select(func.max(ChangeLog.id)))
+        if newest_id is None:
+            return 0
+        deleted = db.query(ChangeLog).filter(
+            ChangeLog.created_at < datetime.utcnow() - timedelta(days=older_than_days),
+            ChangeLog.id < newest_id
+        ).delete(synchronize_session=False)
+        db.commit()
+        if deleted:
+            logger.info(f"[ChangeLog] Pruned {deleted} changes older than {older_than_days} days.")
+        return deleted
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[ChangeLog] Error pruning change log: {e}", exc_info=True)
+        return 0
+    finally:
+        db.close()
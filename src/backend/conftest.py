@@ -0,0 +1,36 @@
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+import archive
+from database import Base, register_sql_functions
+from models import User
+
+@pytest.fixture
+def db_engine(tmp_path):
+    """Throwaway SQLite file with the full schema. Shared across threads and with tp_decompress, like the app's engine."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", register_sql_functions)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session_factory(db_engine):
+    """Sessions on `db_engine`, with users 1 and 2 already added. Tests add their own streams and summaries."""
+    factory = sessionmaker(bind=db_engine)
+    db = factory()
+    db.add_all([User(id=1, email="a@example.com", hashed_password="x"), User(id=2, email="b@example.com", hashed_password="x")])
+    db.commit()
+    db.close()
+    return factory
+
+@pytest.fixture
+def archive_db(tmp_path, monkeypatch):
+    """Points the archive module at its own throwaway SQLite file."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'archive.db'}")
+    monkeypatch.setattr(archive, "archive_engine", engine)
+    monkeypatch.setattr(archive, "ArchiveSessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(archive, "_schema_ready", False)
+    yield engine
+    engine.dispose()
@@ -0,0 +1,109 @@
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from models import Summary
+from utils.tokenizer_utils import count_tokens_cached, fits_token_budget, truncate_text_by_tokens
+
+logger = logging.getLogger(__name__)
+
+HISTORY_SEPARATOR = "\n\n---\n[End of Previous Update]\n---\n\n"
+# Only add a truncated summary if at least this many tokens of it fit
+MIN_TRUNCATED_TOKENS = 50
+
+@dataclass
+class HistoryContext:
+    text: Optional[str]
+    summaries_fetched: int
+    summaries_included: int
+    tokens: int
+    truncated: bool
+
+def build_history_context(db: Session, topic_stream_id: int, max_summaries: int, token_budget: int) -> HistoryContext:
+    """
+    Concatenate up to `max_summaries` previous summaries (oldest first) within `token_budget` tokens.
+
+    Row selection uses the stored `estimated_content_tokens` and a SQL window running sum, so only the
+    rows that fit (plus at most one row to truncate) have their content loaded, and only that single
+    truncated row is tokenized. Rows without a stored count fall back to the cached token counter.
+    """
+    if max_summaries <= 0:
+        return HistoryContext(None, 0, 0, 0, False)
+
+    separator_tokens = count_tokens_cached(HISTORY_SEPARATOR)
+
+    recent = select(
+        Summary.id,
+        Summary.created_at,
+        Summary.estimated_content_tokens.label("tokens")
+    ).where(
+        # Flagged near-duplicates would only repeat what the history already says
+        Summary.topic_stream_id == topic_stream_id, Summary.duplicate_of_id.is_(None)
+    ).order_by(Summary.created_at.desc()).limit(max_summaries).subquery()
+
+    # Each item costs its tokens plus one separator; the first item has no separator in front of it
+    running_total = func.sum(recent.c.tokens + separator_tokens).over(
+        order_by=(recent.c.created_at, recent.c.id)
+    ) - separator_tokens
+    rows = db.execute(
+        select(recent.c.id, recent.c.tokens, running_total.label("running_total"))
+        .order_by(recent.c.created_at, recent.c.id)
+    ).all()
+
+    if not rows:
+        return HistoryContext(None, 0, 0, 0, False)
+
+    ids = [row.id for row in rows]
+    tokens_by_id: Dict[int, int] = {row.id: row.tokens for row in rows}
+    running_totals: List[int] = [row.running_total for row in rows]
+
+    if any(tokens is None for tokens in tokens_by_id.values()):
+        # Legacy rows without a stored count: count them (cached) and redo the running sum here
+        missing_ids = [summary_id for summary_id, tokens in tokens_by_id.items() if tokens is None]
+        for summary_id, content in db.execute(select(Summary.id, Summary.content).where(Summary.id.in_(missing_ids))).all():
+            tokens_by_id[summary_id] = count_tokens_cached(content)
+        running_totals, total = [], -separator_tokens
+        for summary_id in ids:
+            total += tokens_by_id[summary_id] + separator_tokens
+            running_totals.append(total)
+
+    included_ids = []
+    overflow_id, overflow_budget = None, 0
+    for summary_id, total in zip(ids, running_totals):
+        if total <= token_budget:
+            included_ids.append(summary_id)
+            continue
+        used = total - tokens_by_id[summary_id]  # everything before this item, including its separator
+        if token_budget - used > MIN_TRUNCATED_TOKENS:
+            overflow_id, overflow_budget = summary_id, token_budget - used
+        break
+
+    load_ids = included_ids + ([overflow_id] if overflow_id is not None else [])
+    if not load_ids:
+        return HistoryContext(None, len(rows), 0, 0, False)
+
+    contents = dict(db.execute(select(Summary.id, Summary.content).where(Summary.id.in_(load_ids))).all())
+    parts = [contents[summary_id] for summary_id in included_ids]
+    tokens = sum(tokens_by_id[summary_id] for summary_id in included_ids) + separator_tokens * max(len(parts) - 1, 0)
+
+    if overflow_id is not None:
+        overflow_content = contents[overflow_id]
+        # A count stored while no encoding was loaded is the character fallback, so the row may fit after
+        # all; the hard bounds usually settle that without an encode
+        if fits_token_budget(overflow_content, overflow_budget):
+            truncated_content, overflow_id = overflow_content, None
+        else:
+            truncated_content = truncate_text_by_tokens(overflow_content, overflow_budget)
+        parts.append(truncated_content)
+        tokens += count_tokens_cached(truncated_content) + (separator_tokens if len(parts) > 1 else 0)
+
+    return HistoryContext(
+        text=HISTORY_SEPARATOR.join(parts),
+        summaries_fetched=len(rows),
+        summaries_included=len(parts),
+        tokens=tokens,
+        truncated=overflow_id is not None
+    )
@@ -0,0 +1,152 @@
+import os
+import time
+import asyncio
+import logging
+import statistics
+import threading
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# General CPU work (JSON encoding, regex extraction, history assembly) always runs in a thread pool,
+# since it often touches objects that can't be pickled (DB sessions, API clients). Tokenization only
+# needs plain strings, so it can also go to a process pool to get around the GIL.
+CPU_EXECUTOR_WORKERS = int(os.getenv("CPU_EXECUTOR_WORKERS", str(min(4, os.cpu_count() or 1))))
+# "thread", "process", or "inline" (run on the event loop, e.g. for debugging or comparison)
+TOKENIZER_EXECUTOR_KIND = os.getenv("TOKENIZER_EXECUTOR_KIND", "thread").lower()
+TOKENIZER_EXECUTOR_WORKERS = int(os.getenv("TOKENIZER_EXECUTOR_WORKERS", str(CPU_EXECUTOR_WORKERS)))
+# Event loop lag is sampled every interval; samples above the threshold are counted as stalls
+LOOP_LAG_INTERVAL_MS = int(os.getenv("LOOP_LAG_INTERVAL_MS", "100"))
+LOOP_LAG_STALL_MS = int(os.getenv("LOOP_LAG_STALL_MS", "50"))
+
+
+class CpuExecutor:
+    """
+    Runs CPU-bound steps of the update pipeline off the event loop. Pools are created on first use,
+    so importing this module costs nothing at startup.
+    """
+
+    def __init__(self, workers: int = CPU_EXECUTOR_WORKERS, tokenizer_kind: str = TOKENIZER_EXECUTOR_KIND,
+                 tokenizer_workers: int = TOKENIZER_EXECUTOR_WORKERS):
+        self.workers = max(1, workers)
+        self.tokenizer_kind = tokenizer_kind
+        self.tokenizer_workers = max(1, tokenizer_workers)
+        self._pools: Dict[str, Executor] = {}
+        self._lock = threading.Lock()
+        self._stats = {name: {"submitted": 0, "completed": 0, "failed": 0} for name in ("cpu", "tokenizer")}
+
+    def _pool(self, name: str) -> Optional[Executor]:
+        kind = "thread" if name == "cpu" else self.tokenizer_kind
+        if kind == "inline":
+            return None
+        with self._lock:
+            pool = self._pools.get(name)
+            if pool is None:
+                if kind == "process":
+                    pool = ProcessPoolExecutor(max_workers=self.tokenizer_workers)
+                else:
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.workers if name == "cpu" else self.tokenizer_workers,
+                        thread_name_prefix=f"{name}-executor"
+                    )
+                self._pools[name] = pool
+                logger.info(f"[CpuExecutor] Started {kind} pool for {name} work.")
+            return pool
+
+    async def _submit(self, name: str, fn: Callable, *args, **kwargs) -> Any:
+        stats = self._stats[name]
+        stats["submitted"] += 1
+        try:
+            pool = self._pool(name)
+            if pool is None:
+                result = fn(*args, **kwargs)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args, **kwargs))
+            stats["completed"] += 1
+            return result
+        except Exception:
+            stats["failed"] += 1
+            raise
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run `fn` in the CPU thread pool."""
+        return await self._submit("cpu", fn, *args, **kwargs)
+
+    async def run_tokenizer(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run a tokenizer function; with a process pool `fn` and its arguments must be picklable."""
+        return await self._submit("tokenizer", fn, *args, **kwargs)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        result = {}
+        for name, stats in self._stats.items():
+            result[name] = dict(
+                stats,
+                kind="thread" if name == "cpu" else self.tokenizer_kind,
+                in_flight=stats["submitted"] - stats["completed"] - stats["failed"],
+            )
+        return result
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = list(self._pools.values()), {}
+        for pool in pools:
+            pool.shutdown(wait=True)
+
+
+class EventLoopLagMonitor:
+    """
+    Measures how late the event loop wakes up from a fixed-interval sleep. Anything blocking the loop
+    (CPU work, sync DB calls) shows up as lag, so this is the number offloading should bring down.
+    """
+
+    def __init__(self, interval_ms: int = LOOP_LAG_INTERVAL_MS, stall_ms: int = LOOP_LAG_STALL_MS, window: int = 600):
+        self.interval = interval_ms / 1000
+        self.stall_ms = stall_ms
+        self._samples: "deque[float]" = deque(maxlen=window)
+        self._stalls = 0
+        self._max_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - expected) * 1000))
+
+    def record(self, lag_ms: float):
+        self._samples.append(lag_ms)
+        self._max_ms = max(self._max_ms, lag_ms)
+        if lag_ms >= self.stall_ms:
+            self._stalls += 1
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "mean_ms": 0.0, "p99_ms": 0.0, "max_ms": 0.0, "stalls": 0}
+        return {
+            "samples": len(samples),
+            "mean_ms": round(statistics.mean(samples), 2),
+            "p99_ms": round(samples[min(len(samples) - 1, int(len(samples) * 0.99))], 2),
+            "max_ms": round(self._max_ms, 2),
+            "stalls": self._stalls,
+        }
+
+
+cpu_executor = CpuExecutor()
+loop_lag_monitor = EventLoopLagMonitor()
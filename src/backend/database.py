@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
+from utils.compression import decompress_text
+
 SQLALCHEMY_DATABASE_URL = "sqlite:///./trendpulse.db"
 
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
 )
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # SQLite ignores ON DELETE CASCADE unless foreign key enforcement is switched on per connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+@event.listens_for(engine, "connect")
+def register_sql_functions(dbapi_connection, connection_record=None):
+    # search.rebuild_search_index reads decompressed summary content in SQL
+    dbapi_connection.create_function("tp_decompress", 1, decompress_text, deterministic=True)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base() 
\ No newline at end of file
@@ -0,0 +1,93 @@
+import os
+import logging
+from sqlalchemy import text
+
+from models import TopicStream, User
+from archive import delete_archived_summaries
+
+logger = logging.getLogger(__name__)
+
+# Rows deleted per transaction. Small chunks keep each write lock short so other requests and
+# scheduled jobs interleave with a large purge instead of waiting for it.
+PURGE_CHUNK_SIZE = int(os.getenv("PURGE_CHUNK_SIZE", "500"))
+
+def released_email(user_id: int) -> str:
+    """Address a soft-deleted user row carries until the purge, so the real one can be registered again."""
+    return f"deleted-{user_id}@deleted.invalid"
+
+def _delete_in_chunks(db, table: str, column: str, value: int, chunk_size: int) -> int:
+    # Table/column names are internal constants, never user input
+    statement = text(
+        f"DELETE FROM {table} WHERE id IN (SELECT id FROM {table} WHERE {column} = :value LIMIT :chunk_size)"
+    )
+    total = 0
+    while True:
+        deleted = db.execute(statement, {"value": value, "chunk_size": chunk_size}).rowcount
+        db.commit()
+        total += deleted
+        if deleted < chunk_size:
+            return total
+
+def purge_topic_stream(db_session_factory, topic_stream_id: int, chunk_size: int = PURGE_CHUNK_SIZE):
+    """
+    Background half of stream deletion. The API has already soft-hidden the stream (deleted_at);
+    this removes its deep-dive messages, summaries and archived summaries chunk by chunk with plain
+    DELETE statements (no ORM loading of summary content), then the stream row itself.
+    """
+    db = db_session_factory()
+    try:
+        messages = _delete_in_chunks(db, "deep_dive_messages", "topic_stream_id", topic_stream_id, chunk_size)
+        summaries = _delete_in_chunks(db, "summaries", "topic_stream_id", topic_stream_id, chunk_size)
+        archived = delete_archived_summaries([topic_stream_id])
+        db.execute(text("DELETE FROM topic_streams WHERE id = :id"), {"id": topic_stream_id})
+        db.commit()
+        logger.info(f"[Purge] Deleted topic stream {topic_stream_id}: {summaries} summaries, {archived} archived summaries, {messages} deep-dive messages.")
+    except Exception as e:
+        db.rollback()
+        # deleted_at stays set, so the stream remains hidden and resume_pending_purges retries it on next startup
+        logger.error(f"[Purge] Error purging topic stream {topic_stream_id}: {e}", exc_info=True)
+    finally:
+        db.close()
+
+def purge_user(db_session_factory, user_id: int, chunk_size: int = PURGE_CHUNK_SIZE):
+    """Background half of account deletion: purge every stream, then remaining messages and the user row."""
+    db = db_session_factory()
+    try:
+        stream_ids = [row.id for row in db.query(TopicStream.id).filter(TopicStream.user_id == user_id).all()]
+    finally:
+        db.close()
+
+    for stream_id in stream_ids:
+        purge_topic_stream(db_session_factory, stream_id, chunk_size)
+
+    db = db_session_factory()
+    try:
+        _delete_in_chunks(db, "deep_dive_messages", "user_id", user_id, chunk_size)
+        _delete_in_chunks(db, "change_log", "user_id", user_id, chunk_size)
+        db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        db.commit()
+        logger.info(f"[Purge] Deleted user {user_id} and {len(stream_ids)} topic streams.")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[Purge] Error purging user {user_id}: {e}", exc_info=True)
+    finally:
+        db.close()
+
+def resume_pending_purges(db_session_factory):
+    """Finish purges interrupted by a restart - anything soft-deleted but still present."""
+    db = db_session_factory()
+    try:
+        user_ids = [row.id for row in db.query(User.id).filter(User.deleted_at.isnot(None)).all()]
+        stream_ids = [row.id for row in db.query(TopicStream.id).filter(
+            TopicStream.deleted_at.isnot(None),
+            ~TopicStream.user_id.in_(user_ids)
+        ).all()]
+    finally:
+        db.close()
+
+    if user_ids or stream_ids:
+        logger.info(f"[Purge] Resuming {len(stream_ids)} stream and {len(user_ids)} user purges.")
+    for stream_id in stream_ids:
+        purge_topic_stream(db_session_factory, stream_id)
+    for user_id in user_ids:
+        purge_user(db_session_factory, user_id)
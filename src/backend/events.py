@@ -0,0 +1,351 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import func, select
+
+from database import SessionLocal
+from models import EventOutbox, TopicStream
+
+logger = logging.getLogger(__name__)
+
+# "memory": events only reach /events subscribers of this process (single worker).
+# "outbox": events go through the event_outbox table and every worker polls it, so any worker can
+# serve any user's /events connection.
+EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "memory")
+# Events kept for Last-Event-ID replay (memory backend) and the max replayed per reconnect
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+# Undelivered events per connection; a slower client gets a resync event instead of an unbounded queue
+EVENT_SUBSCRIBER_QUEUE = int(os.getenv("EVENT_SUBSCRIBER_QUEUE", "100"))
+EVENT_OUTBOX_POLL_MS = int(os.getenv("EVENT_OUTBOX_POLL_MS", "500"))
+EVENT_OUTBOX_RETENTION_HOURS = int(os.getenv("EVENT_OUTBOX_RETENTION_HOURS", "24"))
+EVENT_HEARTBEAT_SECONDS = float(os.getenv("EVENT_HEARTBEAT_SECONDS", "15"))
+
+SUMMARY_CREATED = "summary.created"
+STREAM_UPDATED = "stream.updated"
+JOB_STATUS = "job.status"
+# Sent when events may have been missed (cursor too old, client too slow): refetch the listings
+RESYNC = "resync"
+
+
+@dataclass(frozen=True)
+class Event:
+    id: int
+    user_id: int
+    type: str
+    data: Dict[str, Any]
+
+    def to_sse(self) -> bytes:
+        return b"id: %d\nevent: %s\ndata: %s\n\n" % (self.id, self.type.encode(), orjson.dumps(self.data))
+
+
+RESYNC_SSE = b"event: " + RESYNC.encode() + b"\ndata: {}\n\n"
+HEARTBEAT_SSE = b": keepalive\n\n"
+
+
+class Subscription:
+    """One open /events connection. Lives on the event loop that created it."""
+
+    def __init__(self, user_id: int, maxsize: int = EVENT_SUBSCRIBER_QUEUE):
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, event: Event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBus(ABC):
+    """
+    Per-user fan-out to open subscriptions. publish() may be called from any thread (request
+    handlers, the coalescer flush thread, the scheduler thread); delivery is handed to each
+    subscriber's loop. Subclasses decide where events are stored for Last-Event-ID replay.
+    """
+
+    backend = "base"
+
+    def __init__(self):
+        self._subscriptions: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+
+    def publish(self, user_id: int, event_type: str, data: Dict[str, Any]) -> None:
+        self.publish_many([(user_id, event_type, data)])
+
+    @abstractmethod
+    def publish_many(self, events: Iterable[Tuple[int, str, Dict[str, Any]]]) -> None:
+        """Store and deliver a batch of (user_id, event_type, data) events."""
+
+    @abstractmethod
+    def replay(self, user_id: int, after_id: int) -> Tuple[List[Event], bool]:
+        """Events for user_id after the cursor, and whether some may have been lost (a gap)."""
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def _fan_out(self, events: Iterable[Event]):
+        with self._lock:
+            targets = [(event, list(self._subscriptions.get(event.user_id, ()))) for event in events]
+        for event, subscriptions in targets:
+            for subscription in subscriptions:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.offer, event)
+                    self.delivered += 1
+                except RuntimeError:
+                    # The subscriber's loop is closed; its connection is gone
+                    self.unsubscribe(subscription)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            connections = sum(len(subscriptions) for subscriptions in self._subscriptions.values())
+            users = len(self._subscriptions)
+        return {"backend": self.backend, "connections": connections, "users": users,
+                "published": self.published, "delivered": self.delivered}
+
+
+class InProcessEventBus(EventBus):
+    """Ring buffer of recent events in memory. Only correct with a single worker process."""
+
+    backend = "memory"
+
+    def __init__(self, buffer_size: int = EVENT_BUFFER_SIZE):
+        super().__init__()
+        self._buffer: deque = deque(maxlen=buffer_size)
+        # Ids start at the current epoch milliseconds so they keep increasing across restarts; a
+        # cursor from before a restart is then older than the buffer and gets a resync.
+        self._next_id = int(time.time() * 1000)
+
+    def publish_many(self, events):
+        with self._lock:
+            published = []
+            for user_id, event_type, data in events:
+                published.append(Event(self._next_id, user_id, event_type, data))
+                self._next_id += 1
+            self._buffer.extend(published)
+            self.published += len(published)
+        self._fan_out(published)
+
+    def replay(self, user_id, after_id):
+        with self._lock:
+            buffered = list(self._buffer)
+            oldest_id = buffered[0].id if buffered else self._next_id
+        return [event for event in buffered if event.user_id == user_id and event.id > after_id], after_id < oldest_id - 1
+
+
+class OutboxEventBus(EventBus):
+    """
+    Events are rows in event_outbox (ids are the shared cursor). Every worker polls the table
+    and fans new rows out to its own subscriptions, so publishers and subscribers can live in
+    different processes. Old rows are pruned after EVENT_OUTBOX_RETENTION_HOURS.
+    """
+
+    backend = "outbox"
+
+    def __init__(self, session_factory=SessionLocal, poll_ms: int = EVENT_OUTBOX_POLL_MS,
+                 retention_hours: int = EVENT_OUTBOX_RETENTION_HOURS, batch_size: int = EVENT_BUFFER_SIZE):
+        super().__init__()
+        self.session_factory = session_factory
+        self.poll_seconds = poll_ms / 1000
+        self.retention = timedelta(hours=retention_hours)
+        self.batch_size = batch_size
+        self._last_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish_many(self, events):
+        rows = [EventOutbox(user_id=user_id, event_type=event_type, payload=orjson.dumps(data).decode())
+                for user_id, event_type, data in events]
+        db = self.session_factory()
+        try:
+            db.add_all(rows)
+            db.commit()
+            self.published += len(rows)
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    @staticmethod
+    def _to_event(row) -> Event:
+        return Event(row.id, row.user_id, row.event_type, orjson.loads(row.payload))
+
+    def replay(self, user_id, after_id):
+        db = self.session_factory()
+        try:
+            rows = db.query(EventOutbox).filter(
+                EventOutbox.user_id == user_id, EventOutbox.id > after_id
+            ).order_by(EventOutbox.id).limit(self.batch_size + 1).all()
+            oldest_id = db.scalar(select(func.min(EventOutbox.id)))
+        finally:
+            db.close()
+        gap = len(rows) > self.batch_size or (oldest_id is not None and after_id < oldest_id - 1)
+        return [self._to_event(row) for row in rows[:self.batch_size]], gap
+
+    def poll_once(self) -> int:
+        """Fan out rows committed since the last poll; returns how many. Runs in a worker thread."""
+        db = self.session_factory()
+        try:
+            if self._last_id is None:
+                self._last_id = db.scalar(select(func.max(EventOutbox.id))) or 0
+                return 0
+            rows = db.query(EventOutbox).filter(EventOutbox.id > self._last_id).order_by(EventOutbox.id).limit(self.batch_size).all()
+        finally:
+            db.close()
+        if rows:
+            self._last_id = rows[-1].id
+            self._fan_out([self._to_event(row) for row in rows])
+        return len(rows)
+
+    def prune(self) -> int:
+        db = self.session_factory()
+        try:
+            deleted = db.query(EventOutbox).filter(
+                EventOutbox.created_at < datetime.utcnow() - self.retention
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    async def _poll_loop(self):
+        last_prune = 0.0
+        while True:
+            try:
+                await asyncio.to_thread(self.poll_once)
+                if time.monotonic() - last_prune > 3600:
+                    pruned = await asyncio.to_thread(self.prune)
+                    last_prune = time.monotonic()
+                    if pruned:
+                        logger.info(f"[Events] Pruned {pruned} outbox events older than {self.retention}.")
+            except Exception as e:
+                logger.error(f"[Events] Error polling the event outbox: {e}", exc_info=True)
+            await asyncio.sleep(self.poll_seconds)
+
+    async def start(self):
+        if self._task is None:
+            # Start from the current end of the table; older events are only reached through replay
+            await asyncio.to_thread(self.poll_once)
+            self._task = asyncio.create_task(self._poll_loop())
+            logger.info(f"[Events] Outbox poller started (every {self.poll_seconds * 1000:.0f}ms).")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+def create_event_bus(backend: str = EVENT_BUS_BACKEND) -> EventBus:
+    if backend == "outbox":
+        return OutboxEventBus()
+    if backend != "memory":
+        logger.warning(f"[Events] Unknown EVENT_BUS_BACKEND '{backend}', using the in-process bus.")
+    return InProcessEventBus()
+
+
+event_bus = create_event_bus()
+
+
+async def sse_stream(bus: EventBus, user_id: int, last_event_id: Optional[int] = None,
+                     heartbeat_seconds: float = EVENT_HEARTBEAT_SECONDS) -> AsyncIterator[bytes]:
+    """
+    Body of GET /events. Subscribes before replaying so nothing published in between is lost;
+    live events already sent during replay are skipped by id.
+    """
+    subscription = bus.subscribe(user_id)
+    try:
+        yield b"retry: 3000\n\n"
+        last_sent = last_event_id
+        if last_event_id is not None:
+            missed, gap = await asyncio.to_thread(bus.replay, user_id, last_event_id)
+            if gap:
+                yield RESYNC_SSE
+            for event in missed:
+                yield event.to_sse()
+                last_sent = event.id
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield HEARTBEAT_SSE
+                continue
+            if subscription.overflowed:
+                subscription.overflowed = False
+                yield RESYNC_SSE
+            if last_sent is not None and event.id <= last_sent:
+                continue
+            yield event.to_sse()
+            last_sent = event.id
+    finally:
+        bus.unsubscribe(subscription)
+
+
+def publish_summaries_created(summaries: List[Dict[str, Any]], session_factory=SessionLocal):
+    """Coalescer listener: one summary.created event per committed summary, sent to the stream's owner."""
+    stream_ids = {summary["topic_stream_id"] for summary in summaries}
+    db = session_factory()
+    try:
+        owners = dict(db.query(TopicStream.id, TopicStream.user_id).filter(TopicStream.id.in_(stream_ids)).all())
+    finally:
+        db.close()
+    event_bus.publish_many([
+        (owners[summary["topic_stream_id"]], SUMMARY_CREATED, {
+            "topic_stream_id": summary["topic_stream_id"],
+            "summary_id": summary["id"],
+            "created_at": summary["created_at"],
+        })
+        for summary in summaries if summary["topic_stream_id"] in owners
+    ])
+
+
+def publish_event(user_id: int, event_type: str, data: Dict[str, Any]):
+    """Best effort: called after the change is committed, so a failed publish must never fail the request or job."""
+    try:
+        event_bus.publish(user_id, event_type, data)
+    except Exception as e:
+        logger.error(f"[Events] Error publishing {event_type} for user {user_id}: {e}", exc_info=True)
+
+
+def publish_job_status(user_id: int, topic_stream_id: int, status: str, error: Optional[str] = None):
+    data = {"topic_stream_id": topic_stream_id, "status": status}
+    if error:
+        data["error"] = error
+    publish_event(user_id, JOB_STATUS, data)
+
+
+def publish_stream_updated(user_id: int, topic_stream_id: int, action: str):
+    publish_event(user_id, STREAM_UPDATED, {"topic_stream_id": topic_stream_id, "action": action})
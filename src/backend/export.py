@@ -0,0 +1,159 @@
+import io
+import os
+import csv
+import zlib
+import logging
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import tuple_
+
+from models import Summary
+from archive import iter_archived_summaries
+from fast_response import summary_columns, summary_row_to_dict
+
+logger = logging.getLogger(__name__)
+
+# Streaming history export. Summaries are read in (created_at, id) keyset pages of EXPORT_BATCH_ROWS,
+# each page its own short read that is finished before the page is sent: SQLite has no server-side
+# cursors, and a statement left open for the length of a slow download would keep its shared lock and
+# stall every writer commit. Memory is bounded by one page plus one output chunk, whatever the history size.
+EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "500"))
+# Output is coalesced into chunks of about this size rather than sent row by row
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", "65536"))
+EXPORT_GZIP_LEVEL = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "md": "text/markdown",
+}
+CSV_COLUMNS = ("topic_stream_id", "topic_stream_query", "id", "created_at", "model", "archived", "duplicate_of_id",
+               "prompt_tokens", "completion_tokens", "total_tokens", "estimated_content_tokens", "sources", "content")
+
+
+def iter_stream_summaries(db_session_factory, topic_stream_id: int, include_reasoning: bool = False,
+                          include_archived: bool = True, batch_rows: int = EXPORT_BATCH_ROWS) -> Iterator[Dict[str, Any]]:
+    """
+    Every summary of one stream, newest first and shaped like the summaries listing, hot rows then
+    archived ones. The archive is read from where the hot scan stopped, so a summary archived while the
+    export runs is sent exactly once.
+    """
+    last = None
+    db = db_session_factory()
+    try:
+        while True:
+            query = db.query(*summary_columns(include_reasoning)).filter(Summary.topic_stream_id == topic_stream_id)
+            if last is not None:
+                query = query.filter(tuple_(Summary.created_at, Summary.id) < last)
+            rows = query.order_by(Summary.created_at.desc(), Summary.id.desc()).limit(batch_rows).all()
+            # End the read before the page goes out to the client
+            db.rollback()
+            for row in rows:
+                yield summary_row_to_dict(row, row.has_reasoning, include_reasoning)
+            if rows:
+                last = (rows[-1].created_at, rows[-1].id)
+            if len(rows) < batch_rows:
+                break
+    finally:
+        db.close()
+    if include_archived:
+        for row, has_reasoning in iter_archived_summaries(topic_stream_id, include_reasoning, before=last, batch_size=batch_rows):
+            yield summary_row_to_dict(row, has_reasoning, include_reasoning, archived=True)
+
+
+SummariesFor = Callable[[int], Iterable[Dict[str, Any]]]
+
+
+def ndjson_records(streams: List[Dict[str, Any]], summaries_for: SummariesFor) -> Iterator[bytes]:
+    """One JSON object per line: each stream ("type": "topic_stream") followed by its summaries ("type": "summary")."""
+    for stream in streams:
+        yield orjson.dumps({"type": "topic_stream", **stream}) + b"\n"
+        for summary in summaries_for(stream["id"]):
+            yield orjson.dumps({"type": "summary", "topic_stream_id": stream["id"], **summary}) + b"\n"
+
+
+def csv_records(streams: List[Dict[str, Any]], summaries_for: SummariesFor, include_reasoning: bool = False) -> Iterator[bytes]:
+    """One row per summary with its stream's id and query; sources are newline-separated."""
+    columns = CSV_COLUMNS + (("reasoning",) if include_reasoning else ())
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def take() -> bytes:
+        data = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return data
+
+    writer.writerow(columns)
+    yield take()
+    for stream in streams:
+        for summary in summaries_for(stream["id"]):
+            record = dict(summary, topic_stream_id=stream["id"], topic_stream_query=stream["query"],
+                          created_at=summary["created_at"].isoformat(), sources="\n".join(summary["sources"]))
+            writer.writerow([record[column] if record[column] is not None else "" for column in columns])
+            yield take()
+
+
+def markdown_records(streams: List[Dict[str, Any]], summaries_for: SummariesFor) -> Iterator[bytes]:
+    """A readable document: one section per stream, one subsection per summary with its sources."""
+    for stream in streams:
+        yield f"# {stream['query']}\n\n".encode()
+        for summary in summaries_for(stream["id"]):
+            heading = summary["created_at"].strftime("%Y-%m-%d %H:%M UTC") + (" (archived)" if summary["archived"] else "")
+            parts = [f"## {heading}\n\n", summary["content"].strip(), "\n\n"]
+            if summary["sources"]:
+                parts.append("Sources:\n\n" + "".join(f"- {source}\n" for source in summary["sources"]) + "\n")
+            yield "".join(parts).encode()
+
+
+def coalesce_chunks(records: Iterable[bytes], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    pending, size = [], 0
+    for record in records:
+        pending.append(record)
+        size += len(record)
+        if size >= chunk_bytes:
+            yield b"".join(pending)
+            pending, size = [], 0
+    if pending:
+        yield b"".join(pending)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = EXPORT_GZIP_LEVEL) -> Iterator[bytes]:
+    """Incremental gzip (wbits=31 writes the gzip header and trailer)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_response(db_session_factory, streams: List[Dict[str, Any]], export_format: str, filename: str,
+                    gzip: bool = False, include_archived: bool = True, include_reasoning: bool = False) -> StreamingResponse:
+    """
+    Stream `streams` and all their summaries as ndjson, csv or md (see EXPORT_MEDIA_TYPES), optionally
+    gzipped. The body is generated while it is sent, with its own database sessions.
+    """
+    def summaries_for(topic_stream_id: int) -> Iterator[Dict[str, Any]]:
+        return iter_stream_summaries(db_session_factory, topic_stream_id, include_reasoning, include_archived)
+
+    if export_format == "csv":
+        records = csv_records(streams, summaries_for, include_reasoning)
+    elif export_format == "md":
+        records = markdown_records(streams, summaries_for)
+    else:
+        records = ndjson_records(streams, summaries_for)
+    chunks = coalesce_chunks(records)
+    filename = f"{filename}.{export_format}"
+    media_type = EXPORT_MEDIA_TYPES[export_format]
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    logger.info(f"[Export] Streaming {filename} ({len(streams)} streams)")
+    return StreamingResponse(chunks, media_type=media_type, headers={
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Cache-Control": "no-store",
+    })
@@ -0,0 +1,141 @@
+import logging
+from datetime import datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator, List, Optional
+
+import orjson
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+
+from models import Summary
+
+try:
+    import msgpack
+except ImportError:  # msgpack responses are optional
+    msgpack = None
+
+logger = logging.getLogger(__name__)
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+# Serializes plain dicts built straight from SQL projections, skipping per-row Pydantic models and
+# FastAPI's second validate/jsonable_encoder pass. orjson emits naive datetimes and Enum values the
+# same way the Pydantic response models do, so the JSON is unchanged for clients.
+
+
+def _msgpack_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot serialize {type(value).__name__} to msgpack")
+
+
+def wants_msgpack(request: Request) -> bool:
+    return msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def fast_response(request: Request, payload: Any, status_code: int = 200, headers: Optional[dict] = None) -> Response:
+    """JSON via orjson, or msgpack when the client sends `Accept: application/msgpack`."""
+    headers = dict(headers or {}, Vary="Accept")
+    if wants_msgpack(request):
+        body = msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+        return Response(content=body, status_code=status_code, media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+    return Response(content=orjson.dumps(payload), status_code=status_code, media_type="application/json", headers=headers)
+
+
+def streaming_array_response(request: Request, items: Iterable[Any], count: int, headers: Optional[dict] = None) -> StreamingResponse:
+    """
+    Like fast_response for a top-level array, but each element is serialized as the body is sent,
+    so the first bytes go out before the whole payload is encoded. `count` is needed up front for
+    the msgpack array header.
+    """
+    headers = dict(headers or {}, Vary="Accept")
+    if wants_msgpack(request):
+        packer = msgpack.Packer(default=_msgpack_default, use_bin_type=True)
+
+        def msgpack_chunks() -> Iterator[bytes]:
+            yield packer.pack_array_header(count)
+            for item in items:
+                yield packer.pack(item)
+
+        return StreamingResponse(msgpack_chunks(), media_type=MSGPACK_MEDIA_TYPE, headers=headers)
+
+    def json_chunks() -> Iterator[bytes]:
+        yield b"["
+        for index, item in enumerate(items):
+            yield (b"," if index else b"") + orjson.dumps(item)
+        yield b"]"
+
+    return StreamingResponse(json_chunks(), media_type="application/json", headers=headers)
+
+
+def listing_etag(request: Request, kind: str, owner_id: int, version: int, *variant: Any) -> str:
+    """Weak ETag for a listing: its version counter plus everything that changes the representation."""
+    parts = [kind, owner_id, version, *[int(v) if isinstance(v, bool) else v for v in variant]]
+    parts.append("msgpack" if wants_msgpack(request) else "json")
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check using weak comparison (RFC 9110 13.1.2)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=conditional_headers(etag))
+
+
+def conditional_headers(etag: str) -> dict:
+    # no-cache: clients may keep the body but must revalidate, which costs one indexed lookup
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept"}
+
+
+def parse_sources(sources: Optional[str], summary_id: int) -> List[str]:
+    """Decode a stored sources JSON string, falling back to an empty list like the response models do."""
+    if not sources:
+        return []
+    try:
+        parsed = orjson.loads(sources)
+    except orjson.JSONDecodeError:
+        logger.warning(f"Failed to decode sources JSON for summary {summary_id}")
+        return []
+    return parsed if isinstance(parsed, list) else []
+
+
+def summary_columns(include_reasoning: bool = False) -> list:
+    # has_reasoning is an IS NOT NULL check that never reads the blob; reasoning itself only when requested
+    columns = [
+        Summary.id, Summary.content, Summary.sources, Summary.created_at, Summary.model,
+        Summary.prompt_tokens, Summary.completion_tokens, Summary.total_tokens,
+        Summary.estimated_content_tokens, Summary.reasoning.isnot(None).label("has_reasoning"),
+        Summary.duplicate_of_id
+    ]
+    if include_reasoning:
+        columns.append(Summary.reasoning)
+    return columns
+
+
+def summary_row_to_dict(row, has_reasoning: bool, include_reasoning: bool, archived: bool = False) -> dict:
+    """Shape one summary row (a projection row or an archived summary) like SummaryResponse."""
+    return {
+        "id": row.id,
+        "content": row.content,
+        "sources": parse_sources(row.sources, row.id),
+        "created_at": row.created_at,
+        "model": row.model if row.model is not None else "",
+        "prompt_tokens": row.prompt_tokens,
+        "completion_tokens": row.completion_tokens,
+        "total_tokens": row.total_tokens,
+        "estimated_content_tokens": row.estimated_content_tokens,
+        "has_reasoning": bool(has_reasoning),
+        "reasoning": row.reasoning if include_reasoning else None,
+        "archived": archived,
+        "duplicate_of_id": getattr(row, "duplicate_of_id", None),
+    }
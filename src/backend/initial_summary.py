@@ -0,0 +1,91 @@
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import TopicStream, InitialSummaryStatus
+from versioning import bump_user_version
+from change_log import record_changes, STREAM, UPSERT
+from events import publish_job_status
+
+logger = logging.getLogger(__name__)
+
+# A new stream's first summary is fetched after the create request has returned. Every path that
+# may produce it - the task the create endpoint spawns, a bulk create, the stream's first scheduled
+# run and the startup resume - goes through produce_initial_summary, which first claims the stream
+# with a conditional UPDATE (pending -> running). Exactly one claim succeeds, so the upstream search
+# runs once. Progress reaches clients as job.status and summary.created events, and as the stream's
+# initial_summary_status in the listing.
+
+PENDING, RUNNING, READY, FAILED = (InitialSummaryStatus.PENDING, InitialSummaryStatus.RUNNING,
+                                   InitialSummaryStatus.READY, InitialSummaryStatus.FAILED)
+
+
+def transition_initial_summary(db: Session, user_id: int, topic_stream_id: int,
+                               expected: InitialSummaryStatus, new: InitialSummaryStatus) -> bool:
+    """Move the status from `expected` to `new` and commit. False if it wasn't `expected` (someone else moved it)."""
+    moved = db.execute(
+        update(TopicStream).where(
+            TopicStream.id == topic_stream_id,
+            TopicStream.initial_summary_status == expected,
+            TopicStream.deleted_at.is_(None)
+        ).values(initial_summary_status=new),
+        execution_options={"synchronize_session": False}
+    ).rowcount == 1
+    if moved:
+        # The status is part of the stream listing
+        bump_user_version(db, user_id)
+        record_changes(db, [(STREAM, topic_stream_id, topic_stream_id, UPSERT)])
+    db.commit()
+    return moved
+
+
+async def produce_initial_summary(db_session_factory, update_function_coro: Callable[..., Awaitable[Any]],
+                                  user_id: int, topic_stream_id: int) -> Dict[str, Any]:
+    """
+    Claim and fetch a stream's first summary with `update_function_coro` (perform_search_and_create_summary).
+    Returns a per-item result; "skipped" means another path holds or finished the claim.
+    """
+    db = db_session_factory()
+    try:
+        if not transition_initial_summary(db, user_id, topic_stream_id, PENDING, RUNNING):
+            logger.debug(f"[InitialSummary] Stream {topic_stream_id}: first summary already claimed, skipping.")
+            return {"id": topic_stream_id, "status": "skipped"}
+        topic_stream = db.query(TopicStream).filter(TopicStream.id == topic_stream_id).first()
+        publish_job_status(user_id, topic_stream_id, "running")
+        try:
+            summary = await update_function_coro(db, topic_stream)
+        except Exception as e:
+            logger.error(f"[InitialSummary] Stream {topic_stream_id}: first summary failed: {e}", exc_info=True)
+            db.rollback()
+            transition_initial_summary(db, user_id, topic_stream_id, RUNNING, FAILED)
+            publish_job_status(user_id, topic_stream_id, "failed", str(e))
+            return {"id": topic_stream_id, "status": "failed", "error": str(e)}
+        transition_initial_summary(db, user_id, topic_stream_id, RUNNING, READY)
+        publish_job_status(user_id, topic_stream_id, "succeeded")
+        logger.info(f"[InitialSummary] Stream {topic_stream_id}: first summary {summary.id} ready.")
+        return {"id": topic_stream_id, "status": "succeeded", "summary_id": summary.id}
+    finally:
+        db.close()
+
+
+def pending_initial_summaries(db_session_factory) -> List[Tuple[int, int]]:
+    """
+    (topic_stream_id, user_id) of streams still waiting for their first summary at startup. The app runs
+    in one process, so a claim still marked running was interrupted by the restart and is released first.
+    """
+    db = db_session_factory()
+    try:
+        released = db.execute(
+            update(TopicStream).where(TopicStream.initial_summary_status == RUNNING).values(initial_summary_status=PENDING),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        db.commit()
+        if released:
+            logger.info(f"[InitialSummary] Released {released} first-summary claims interrupted by a restart.")
+        return [(row.id, row.user_id) for row in db.query(TopicStream.id, TopicStream.user_id).filter(
+            TopicStream.initial_summary_status == PENDING, TopicStream.deleted_at.is_(None)
+        )]
+    finally:
+        db.close()
@@ -0,0 +1,59 @@
+# Script to bring the database schema up to date. Run this before starting the backend:
+#
+#   python src/backend/migrate.py
+#
+# A fresh database gets every table from models.py and is stamped at the latest Alembic revision.
+# An existing database is upgraded with `alembic upgrade head`. The app itself no longer creates or
+# checks tables at import, which keeps server start-up fast.
+
+import os
+import sys
+
+# Add the backend directory to the system path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+from database import engine
+from models import Base
+from archive import ensure_archive_schema
+from search import ensure_search_schema
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ALEMBIC_INI = os.path.join(PROJECT_ROOT, "alembic.ini")
+# Schema revision of databases created by create_all before migrations were tracked in them
+BASELINE_REVISION = "90f137c451f9"
+
+def alembic_config(database_url: str = None) -> Config:
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "alembic"))
+    # Migrate the database the app actually uses rather than the one hard-coded in alembic.ini
+    url = database_url or engine.url.render_as_string(hide_password=False)
+    config.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    return config
+
+def run_migrations(db_engine=engine):
+    config = alembic_config(db_engine.url.render_as_string(hide_password=False))
+    tables = set(inspect(db_engine).get_table_names())
+
+    if not tables - {"alembic_version"}:
+        print("[Migrate] Empty database: creating all tables and stamping head.")
+        Base.metadata.create_all(bind=db_engine)
+        command.stamp(config, "head")
+    else:
+        if "alembic_version" not in tables:
+            print(f"[Migrate] Untracked existing schema: stamping baseline revision {BASELINE_REVISION}.")
+            command.stamp(config, BASELINE_REVISION)
+        print("[Migrate] Upgrading database to head.")
+        command.upgrade(config, "head")
+
+    ensure_archive_schema()
+    # create_all doesn't know about the FTS5 table and its triggers, and batch migrations that
+    # recreate the summaries table drop the triggers
+    ensure_search_schema(db_engine)
+    print("[Migrate] Database schema is up to date.")
+
+if __name__ == "__main__":
+    run_migrations()
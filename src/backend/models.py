@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Text, Float, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum as SQLEnum, Text, Float, Boolean, Index
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.sql import text as sa_text # Import for server_default raw SQL
 from datetime import datetime
 from enum import Enum as PyEnum # Use an alias to avoid conflict with SQLEnum
 from database import Base
+from utils.compression import CompressedText
 
 class UpdateFrequency(str, PyEnum):
     HOURLY = "hourly"
@@ -30,21 +31,38 @@ class ContextHistoryLevel(str, PyEnum):
     LAST_FIVE = "last_5"
     ALL_SMART_LIMIT = "all_smart_limit"
 
+class DuplicatePolicy(str, PyEnum):
+    KEEP = "keep"           # store every summary as is
+    FLAG = "flag"           # store it, pointing duplicate_of_id at the original
+    COLLAPSE = "collapse"   # overwrite the original with the newer text instead of adding a row
+    DROP = "drop"           # don't store it at all
+
+class InitialSummaryStatus(str, PyEnum):
+    PENDING = "pending"     # created; the first summary hasn't been started
+    RUNNING = "running"     # claimed by the one path fetching it (see initial_summary.py)
+    READY = "ready"         # nothing outstanding - also every stream created before this existed
+    FAILED = "failed"       # the first fetch failed; the next scheduled or manual update fills the stream
+
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False) # Emails should be non-nullable
     hashed_password = Column(String, nullable=False) # Passwords should be non-nullable
+    # Set when the account is deleted; rows are hidden immediately and purged in chunks in the background
+    deleted_at = Column(DateTime, nullable=True, default=None)
+    # Bumped whenever anything in the user's stream listing changes; the listing ETag is derived from it
+    data_version = Column(Integer, nullable=False, default=0, server_default=sa_text('0'))
     
-    topic_streams = relationship("TopicStream", back_populates="user", cascade="all, delete-orphan")
-    deep_dive_messages = relationship("DeepDiveMessage", back_populates="user", cascade="all, delete-orphan")
+    # passive_deletes: let ON DELETE CASCADE remove children instead of loading them into the session
+    topic_streams = relationship("TopicStream", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
+    deep_dive_messages = relationship("DeepDiveMessage", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
 
 class TopicStream(Base):
     __tablename__ = "topic_streams"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
     query = Column(String, nullable=False)
     
     update_frequency = Column(SQLEnum(UpdateFrequency, name="updatefrequency_enum", native_enum=False), nullable=False, default=UpdateFrequency.DAILY, server_default=UpdateFrequency.DAILY.value)
@@ -71,16 +89,32 @@ class TopicStream(Base):
                                  server_default=sa_text('1'), 
                                  nullable=False)
 
+    # What happens to a new summary that nearly duplicates a recent one (see near_duplicates.py).
+    # Enum columns store member names, so the server default has to be the name too. Streams from
+    # before this existed get KEEP, so their history context doesn't change under them.
+    duplicate_policy = Column(SQLEnum(DuplicatePolicy, name="duplicatepolicy_enum", native_enum=False),
+                              nullable=False, default=DuplicatePolicy.FLAG, server_default=DuplicatePolicy.KEEP.name)
+    # First summary of a new stream, which is fetched in the background after the create request returns
+    initial_summary_status = Column(SQLEnum(InitialSummaryStatus, name="initialsummarystatus_enum", native_enum=False),
+                                    nullable=False, default=InitialSummaryStatus.READY, server_default=InitialSummaryStatus.READY.name)
+
+    # Soft-delete marker: set by the delete endpoint, the row itself is removed by the background purge
+    deleted_at = Column(DateTime, nullable=True, default=None)
+    # Bumped whenever this stream's summaries change (insert, delete, archive); the summaries ETag is derived from it
+    version = Column(Integer, nullable=False, default=0, server_default=sa_text('0'))
+
     user = relationship("User", back_populates="topic_streams")
-    summaries = relationship("Summary", back_populates="topic_stream", cascade="all, delete-orphan")
+    summaries = relationship("Summary", back_populates="topic_stream", cascade="all, delete-orphan", passive_deletes=True)
 
 class Summary(Base):
     __tablename__ = "summaries"
 
     id = Column(Integer, primary_key=True, index=True)
-    topic_stream_id = Column(Integer, ForeignKey("topic_streams.id"), nullable=False)
-    content = Column(Text, nullable=False) # Changed String to Text for potentially longer summaries
-    sources = Column(Text, nullable=True)  # Changed String to Text, can be JSON string
+    topic_stream_id = Column(Integer, ForeignKey("topic_streams.id", ondelete="CASCADE"), nullable=False)
+    content = Column(CompressedText, nullable=False) # Compressed at rest above SUMMARY_COMPRESSION_THRESHOLD_BYTES
+    sources = Column(CompressedText, nullable=True)  # JSON string, compressed at rest like content
+    # <think> segments from reasoning models, split out of content. Deferred - only loaded when a client asks for it.
+    reasoning = deferred(Column(CompressedText, nullable=True))
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     model = Column(String, nullable=True)
     
@@ -90,18 +124,63 @@ class Summary(Base):
     total_tokens = Column(Integer, nullable=True)
     estimated_content_tokens = Column(Integer, nullable=True)
 
+    # 64-bit SimHash of content (signed), compared against the stream's recent summaries on insert
+    fingerprint = Column(Integer, nullable=True)
+    # Set on near-duplicates stored under the "flag" policy. No foreign key: the original may be
+    # archived or deleted later and the flag stays meaningful.
+    duplicate_of_id = Column(Integer, nullable=True)
+
     topic_stream = relationship("TopicStream", back_populates="summaries")
 
+    __table_args__ = (
+        Index("ix_summaries_topic_stream_id_created_at", "topic_stream_id", "created_at"),
+        Index("ix_summaries_topic_stream_id_fingerprint", "topic_stream_id", "fingerprint"),
+    )
+
 class DeepDiveMessage(Base):
     __tablename__ = "deep_dive_messages"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    topic_stream_id = Column(Integer, ForeignKey("topic_streams.id"), nullable=False)
-    summary_id = Column(Integer, ForeignKey("summaries.id"), nullable=True) 
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    topic_stream_id = Column(Integer, ForeignKey("topic_streams.id", ondelete="CASCADE"), nullable=False, index=True)
+    summary_id = Column(Integer, ForeignKey("summaries.id", ondelete="SET NULL"), nullable=True, index=True)
     message = Column(Text, nullable=False)
     response = Column(Text, nullable=True) # AI response can be initially null
     timestamp = Column(DateTime, default=datetime.utcnow, nullable=False)
     model = Column(String, nullable=True)
 
-    user = relationship("User", back_populates="deep_dive_messages")
\ No newline at end of file
+    user = relationship("User", back_populates="deep_dive_messages")
+
+class EventOutbox(Base):
+    """Events for /events subscribers when several workers share them (EVENT_BUS_BACKEND=outbox). Pruned after a retention window."""
+    __tablename__ = "event_outbox"
+
+    # AUTOINCREMENT: ids are client cursors (Last-Event-ID), so they must never be reused after pruning
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(Text, nullable=False)  # JSON
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_event_outbox_user_id_id", "user_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
+
+class ChangeLog(Base):
+    """Append-only log of stream/summary changes per user, read by GET /sync. Pruned after a retention window."""
+    __tablename__ = "change_log"
+
+    # AUTOINCREMENT: ids are the clients' sync cursors, so they must never be reused after pruning
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False)
+    entity = Column(String, nullable=False)  # "stream" or "summary"
+    entity_id = Column(Integer, nullable=False)
+    topic_stream_id = Column(Integer, nullable=False)
+    op = Column(String, nullable=False)  # "upsert" or "delete"
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+    __table_args__ = (
+        Index("ix_change_log_user_id_id", "user_id", "id"),
+        {"sqlite_autoincrement": True},
+    )
@@ -0,0 +1,69 @@
+import os
+import logging
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from models import Summary, TopicStream, DuplicatePolicy
+from versioning import bump_stream_versions
+from change_log import record_changes, STREAM, SUMMARY, UPSERT
+from utils.simhash import hamming_distance
+
+logger = logging.getLogger(__name__)
+
+# Two summaries are near-duplicates when their 64-bit SimHashes differ in at most this many bits
+NEAR_DUPLICATE_MAX_DISTANCE = int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "6"))
+# How many of the stream's latest summaries a new one is compared against (exact repeats are found further back)
+NEAR_DUPLICATE_WINDOW = int(os.getenv("NEAR_DUPLICATE_WINDOW", "5"))
+# Policy for streams created without one
+DEFAULT_DUPLICATE_POLICY = DuplicatePolicy(os.getenv("DEFAULT_DUPLICATE_POLICY", DuplicatePolicy.FLAG.value))
+
+
+def find_near_duplicate(db: Session, topic_stream_id: int, fingerprint: Optional[int],
+                        window: int = NEAR_DUPLICATE_WINDOW, max_distance: int = NEAR_DUPLICATE_MAX_DISTANCE,
+                        exact_repeats: bool = True) -> Optional[int]:
+    """
+    Id of the stream's latest summary that `fingerprint` nearly duplicates, or None. Compares against
+    the latest `window` fingerprints, then (with `exact_repeats`) looks up an exact repeat further back
+    through the fingerprint index. Only fingerprints are read, never content.
+    """
+    if fingerprint is None:
+        return None
+    recent = db.query(Summary.id, Summary.fingerprint).filter(
+        Summary.topic_stream_id == topic_stream_id, Summary.fingerprint.isnot(None)
+    ).order_by(Summary.created_at.desc()).limit(window).all() if window > 0 else []
+    for row in recent:
+        if hamming_distance(row.fingerprint, fingerprint) <= max_distance:
+            return row.id
+    if not exact_repeats:
+        return None
+    return db.query(Summary.id).filter(
+        Summary.topic_stream_id == topic_stream_id, Summary.fingerprint == fingerprint
+    ).order_by(Summary.created_at.desc()).limit(1).scalar()
+
+
+def collapse_into(db: Session, summary_id: int, summary_values: Dict[str, Any]) -> Summary:
+    """
+    Overwrite summary `summary_id` with a newer near-duplicate's values (content, sources, created_at,
+    ...) instead of storing a second row, and commit. The stream's last_updated moves forward as for an insert.
+    """
+    topic_stream_id = summary_values["topic_stream_id"]
+    values = {key: value for key, value in summary_values.items() if key not in ("topic_stream_id", "duplicate_of_id")}
+    db.execute(update(Summary).where(Summary.id == summary_id).values(**values))
+    db.execute(update(TopicStream).where(TopicStream.id == topic_stream_id).values(last_updated=summary_values["created_at"]))
+    bump_stream_versions(db, [topic_stream_id])
+    record_changes(db, [(SUMMARY, summary_id, topic_stream_id, UPSERT)])
+    db.commit()
+    logger.info(f"[NearDuplicates] Collapsed a new near-duplicate into summary {summary_id} of stream {topic_stream_id}.")
+    return db.get(Summary, summary_id, populate_existing=True)
+
+
+def touch_last_updated(db: Session, topic_stream_id: int, checked_at: datetime):
+    """A dropped duplicate still counts as a completed update for the stream."""
+    db.execute(update(TopicStream).where(TopicStream.id == topic_stream_id).values(last_updated=checked_at))
+    # last_updated is part of the stream listing
+    bump_stream_versions(db, [topic_stream_id])
+    record_changes(db, [(STREAM, topic_stream_id, topic_stream_id, UPSERT)])
+    db.commit()
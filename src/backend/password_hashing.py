@@ -0,0 +1,130 @@
+import os
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Tuple
+
+from passlib.context import CryptContext
+
+from models import User
+
+logger = logging.getLogger(__name__)
+
+# Each bcrypt round doubles the cost; 12 is passlib's default (~100-300ms per hash). Stored hashes
+# with a different cost are re-hashed after the next successful login.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# bcrypt releases the GIL, so hashes run in parallel up to this many threads
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+# Requests waiting for a hashing thread beyond the workers; more than this are rejected with 503
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class HashingPoolFull(Exception):
+    "Raised when too many password hashes are already queued"
+    pass
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing/verification in a dedicated, bounded thread pool so logins never block the
+    event loop, and a burst of logins is shed (HashingPoolFull) instead of queueing without limit.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_queue: int = PASSWORD_HASH_MAX_QUEUE, context: CryptContext = pwd_context):
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self.context = context
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return self._executor
+
+    def _acquire(self, bounded: bool):
+        with self._lock:
+            if bounded and self._pending >= self.workers + self.max_queue:
+                self._rejected += 1
+                raise HashingPoolFull(f"{self._pending} password hashes already pending")
+            self._pending += 1
+
+    def _release(self, _future=None):
+        with self._lock:
+            self._pending -= 1
+
+    async def _run(self, fn, *args) -> Any:
+        self._acquire(bounded=True)
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> Tuple[bool, bool]:
+        """Return (verified, needs_update). needs_update is only ever True for a verified password."""
+        verified = await self._run(self.context.verify, password, hashed_password)
+        return verified, verified and self.context.needs_update(hashed_password)
+
+    def hash_blocking(self, password: str) -> str:
+        """For background work that may wait: uses the same threads but is never rejected."""
+        self._acquire(bounded=False)
+        future = self._get_executor().submit(self.context.hash, password)
+        future.add_done_callback(self._release)
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "queued": max(0, self._pending - self.workers),
+                "rejected": self._rejected,
+                "bcrypt_rounds": BCRYPT_ROUNDS,
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+password_hasher = PasswordHasher()
+
+
+def rehash_user_password(db_session_factory, user_id: int, password: str, old_hash: str):
+    """
+    Background task run after a login whose stored hash is outdated (e.g. BCRYPT_ROUNDS changed).
+    Only replaces the hash if it hasn't changed since the login, so a concurrent password change wins.
+    """
+    try:
+        new_hash = password_hasher.hash_blocking(password)
+    except Exception as e:
+        logger.error(f"[PasswordHash] Error re-hashing password for user {user_id}: {e}", exc_info=True)
+        return
+    db = db_session_factory()
+    try:
+        updated = db.query(User).filter(User.id == user_id, User.hashed_password == old_hash).update(
+            {User.hashed_password: new_hash}, synchronize_session=False
+        )
+        db.commit()
+        if updated:
+            logger.info(f"[PasswordHash] Upgraded password hash for user {user_id} to {BCRYPT_ROUNDS} rounds.")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"[PasswordHash] Error storing upgraded hash for user {user_id}: {e}", exc_info=True)
+    finally:
+        db.close()
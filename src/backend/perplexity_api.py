@@ -6,10 +6,12 @@ import aiohttp
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timezone, timedelta
 import time
+import re
 import json
 import ssl
 import certifi
 from utils.tokenizer_utils import count_tokens
+from cpu_executor import cpu_executor
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -34,6 +36,44 @@ class APIProcessingError(APIError):
     "Errors during processing of the API response"
     pass
 
+def extract_sources_from_content(content: str) -> List[str]:
+    """Extract sources from markdown content (module-level so it can run in an executor)"""
+    sources = []
+    
+    # Try to find Sources section
+    if "Sources:" in content:
+        try:
+            # Extract everything after "Sources:" heading
+            sources_section = content.split("Sources:")[1].strip()
+            
+            # Extract URLs from markdown links [title](url)
+            urls = re.findall(r'\[.*?\]\((https?://[^\s\)]+)\)', sources_section)
+            
+            if urls:
+                sources = urls
+                logger.debug(f"Extracted {len(sources)} sources using markdown link pattern")
+            else:
+                # Fallback: try to extract raw URLs
+                raw_urls = re.findall(r'https?://[^\s\)\]]+', sources_section)
+                if raw_urls:
+                    sources = raw_urls
+                    logger.debug(f"Extracted {len(sources)} sources using raw URL pattern")
+        except Exception as e:
+            logger.warning(f"Failed to parse sources from content: {e}")
+    
+    # If no Sources section, try to find URLs throughout content
+    if not sources:
+        try:
+            # Find all markdown links in the entire content
+            urls = re.findall(r'\[.*?\]\((https?://[^\s\)]+)\)', content)
+            if urls:
+                sources = urls
+                logger.debug(f"Extracted {len(sources)} sources from full content")
+        except Exception as e:
+            logger.warning(f"Failed to parse sources from full content: {e}")
+            
+    return sources
+
 class PerplexityAPI:
     BASE_URL = "https://api.perplexity.ai"
 
@@ -163,7 +203,8 @@ class PerplexityAPI:
                         elif 500 <= response.status < 600:
                             raise APIServerError(f"API server error {response.status}: {error_text}")
                     
-                    return await response.json()
+                    # Decode the (possibly large) body off the event loop
+                    return await cpu_executor.run(json.loads, await response.text())
                     
         except aiohttp.ClientError as e:
             logger.error(f"Error during API request to {url}: {e}")
@@ -350,13 +391,16 @@ class PerplexityAPI:
         if api_recency_filter:
             payload["search_recency_filter"] = api_recency_filter
 
-        logger.debug(f"Payload for search_perplexity: {json.dumps(payload, indent=2)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # Pretty-printing the message array is CPU work; only pay for it with debug logging on, and off the event loop
+            logger.debug(f"Payload for search_perplexity: {await cpu_executor.run(json.dumps, payload, indent=2)}")
 
         try:
             self._check_rate_limit() # Check rate limit before making the call
             # raw_api_result is the full JSON response from Perplexity
             raw_api_result = await self._make_request("chat/completions", payload, timeout_seconds=current_timeout_seconds)
-            logger.debug(f"Received API response (first 200 chars): {json.dumps(raw_api_result)[:200]}...") # Log a snippet
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Received API response (first 200 chars): {(await cpu_executor.run(json.dumps, raw_api_result))[:200]}...") # Log a snippet
             
             # Extract relevant parts
             if raw_api_result and raw_api_result.get('choices') and len(raw_api_result['choices']) > 0:
@@ -394,7 +438,7 @@ class PerplexityAPI:
                         sources_list.append(url)
                     logger.debug(f"Extracted {len(sources_list)} sources from API citations")
                 else:
-                    sources_list = self._extract_sources_from_content(content)
+                    sources_list = await cpu_executor.run(self._extract_sources_from_content, content)
                     logger.debug(f"Extracted {len(sources_list)} sources from markdown content")
                 
                 # For R1-1776 model, always return empty sources list since it's an offline model
@@ -432,43 +476,7 @@ class PerplexityAPI:
 
     def _extract_sources_from_content(self, content: str) -> List[str]:
         """Extract sources from markdown content"""
-        sources = []
-        
-        # Try to find Sources section
-        if "Sources:" in content:
-            try:
-                # Extract everything after "Sources:" heading
-                sources_section = content.split("Sources:")[1].strip()
-                
-                # Extract URLs from markdown links [title](url)
-                import re
-                urls = re.findall(r'\[.*?\]\((https?://[^\s\)]+)\)', sources_section)
-                
-                if urls:
-                    sources = urls
-                    logger.debug(f"Extracted {len(sources)} sources using markdown link pattern")
-                else:
-                    # Fallback: try to extract raw URLs
-                    raw_urls = re.findall(r'https?://[^\s\)\]]+', sources_section)
-                    if raw_urls:
-                        sources = raw_urls
-                        logger.debug(f"Extracted {len(sources)} sources using raw URL pattern")
-            except Exception as e:
-                logger.warning(f"Failed to parse sources from content: {e}")
-        
-        # If no Sources section, try to find URLs throughout content
-        if not sources:
-            try:
-                import re
-                # Find all markdown links in the entire content
-                urls = re.findall(r'\[.*?\]\((https?://[^\s\)]+)\)', content)
-                if urls:
-                    sources = urls
-                    logger.debug(f"Extracted {len(sources)} sources from full content")
-            except Exception as e:
-                logger.warning(f"Failed to parse sources from full content: {e}")
-                
-        return sources
+        return extract_sources_from_content(content)
 
     async def ask_follow_up_question(
         self,
@@ -539,7 +547,7 @@ class PerplexityAPI:
                             url = str(cit)
                         follow_sources.append(url)
                 else:
-                    follow_sources = self._extract_sources_from_content(content)
+                    follow_sources = await cpu_executor.run(self._extract_sources_from_content, content)
                 
                 logger.debug(f"Follow-up response successful. Content length: {len(content)}, sources: {len(follow_sources)}")
                 
@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import math
+import zlib
+import logging
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from database import SessionLocal
+from models import Summary
+
+logger = logging.getLogger(__name__)
+
+# Offline "related summaries" index: every summary is embedded with a hashing vectorizer (no vocabulary,
+# no network, no model download) into a fixed-width float32 vector. Vectors are appended to a flat file
+# of fixed-size records and read back through np.memmap, so the index never has to fit in the heap and
+# new summaries are a single append. Deleted summaries are filtered at query time and dropped by compact().
+RELATED_INDEX_PATH = os.getenv("RELATED_INDEX_PATH", "./trendpulse_related.idx")
+RELATED_INDEX_DIM = int(os.getenv("RELATED_INDEX_DIM", "1024"))
+# Rows scored per matrix product; bounds the temporary score/mask arrays for large indexes
+RELATED_INDEX_BATCH_ROWS = int(os.getenv("RELATED_INDEX_BATCH_ROWS", "65536"))
+RELATED_DEFAULT_LIMIT = int(os.getenv("RELATED_DEFAULT_LIMIT", "10"))
+RELATED_MAX_LIMIT = int(os.getenv("RELATED_MAX_LIMIT", "50"))
+
+INDEX_FORMAT_VERSION = 1
+BUILD_BATCH_SIZE = 500
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+# Hashing has no IDF, so the most common function words are dropped instead of drowning out topic words
+STOPWORDS = frozenset("""
+a an and are as at be been but by can could did do does for from had has have he her his how i if in into is
+it its may more most new no not of on or our over she so than that the their them then there these they this
+those to up was we were what when which while who will with would you your about after also all any before
+between during each just last next now only other same since some such through under until very
+""".split())
+
+
+def record_dtype(dim: int) -> np.dtype:
+    return np.dtype([("id", "<i8"), ("topic_stream_id", "<i8"), ("vector", "<f4", (dim,))])
+
+
+def vectorize(text: str, dim: int = RELATED_INDEX_DIM) -> np.ndarray:
+    """
+    L2-normalised hashed bag of words and word bigrams with sublinear term frequency. Each feature
+    lands in bucket crc32 % dim with a hash-derived sign, so collisions cancel out on average.
+    """
+    words = [word for word in _WORD.findall(text.lower()) if len(word) > 1 and word not in STOPWORDS]
+    features = Counter(words)
+    features.update(f"{first} {second}" for first, second in zip(words, words[1:]))
+    vector = np.zeros(dim, dtype=np.float32)
+    for feature, count in features.items():
+        hashed = zlib.crc32(feature.encode())
+        vector[hashed % dim] += (1.0 + math.log(count)) * (1.0 if hashed & 0x80000000 else -1.0)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+class _Snapshot(NamedTuple):
+    count: int
+    inode: int
+    records: np.memmap
+    # In-memory copies of the small columns, so masking by stream never pages in the vectors
+    ids: np.ndarray
+    topic_stream_ids: np.ndarray
+    live: np.ndarray
+
+
+class RelatedIndex:
+    """
+    Append-only record file (id, topic_stream_id, vector) plus a small JSON sidecar with its layout.
+    A summary whose content changes is appended again; the newest record for an id wins. Appends from
+    this process are serialised by a lock; readers only look at whole records, so they never block writers.
+    """
+
+    def __init__(self, path: str = RELATED_INDEX_PATH, dim: int = RELATED_INDEX_DIM):
+        self.path = path
+        self.dim = dim
+        self.dtype = record_dtype(dim)
+        self._lock = threading.Lock()
+        self._snapshot: Optional[_Snapshot] = None
+
+    @property
+    def meta_path(self) -> str:
+        return self.path + ".json"
+
+    def _layout(self) -> Dict[str, Any]:
+        return {"version": INDEX_FORMAT_VERSION, "dim": self.dim}
+
+    def is_usable(self) -> bool:
+        """True if the files exist and were written with the current layout (dimension, format)."""
+        try:
+            with open(self.meta_path) as meta_file:
+                return json.load(meta_file) == self._layout() and os.path.exists(self.path)
+        except (OSError, ValueError):
+            return False
+
+    def __len__(self) -> int:
+        try:
+            return os.path.getsize(self.path) // self.dtype.itemsize
+        except OSError:
+            return 0
+
+    def _records(self, rows: Iterable[Tuple[int, int, str]]) -> np.ndarray:
+        rows = list(rows)
+        records = np.zeros(len(rows), dtype=self.dtype)
+        for i, (summary_id, topic_stream_id, content) in enumerate(rows):
+            records[i] = (summary_id, topic_stream_id, vectorize(content or "", self.dim))
+        return records
+
+    def add(self, rows: Iterable[Tuple[int, int, str]]):
+        """Append (summary_id, topic_stream_id, content) rows. Whole records are written in one append."""
+        records = self._records(rows)
+        if not len(records):
+            return
+        with self._lock:
+            if not self.is_usable():
+                logger.warning("[RelatedIndex] Index missing or outdated; skipping append until it is rebuilt.")
+                return
+            with open(self.path, "ab") as index_file:
+                index_file.write(records.tobytes())
+
+    def rebuild(self, db_session_factory=SessionLocal) -> int:
+        """
+        Re-embed every summary from the database into a fresh file and swap it in atomically. The bulk
+        of the scan runs without the append lock; summaries inserted meanwhile are picked up by a final
+        catch-up pass under the lock, just before the swap. Returns the record count.
+        """
+        tmp_path = self.path + ".tmp"
+        db = db_session_factory()
+        count, last_id = 0, 0
+
+        def append_from_db(tmp_file):
+            nonlocal count, last_id
+            while True:
+                batch = db.query(Summary.id, Summary.topic_stream_id, Summary.content).filter(
+                    Summary.id > last_id
+                ).order_by(Summary.id).limit(BUILD_BATCH_SIZE).all()
+                if not batch:
+                    return
+                tmp_file.write(self._records(batch).tobytes())
+                count += len(batch)
+                last_id = batch[-1].id
+
+        try:
+            with open(tmp_path, "wb") as tmp_file:
+                append_from_db(tmp_file)
+                with self._lock:
+                    db.rollback()  # fresh read snapshot for the catch-up pass
+                    append_from_db(tmp_file)
+                    tmp_file.flush()
+                    os.replace(tmp_path, self.path)
+                    with open(self.meta_path, "w") as meta_file:
+                        json.dump(self._layout(), meta_file)
+                    self._snapshot = None
+        finally:
+            db.close()
+        logger.info(f"[RelatedIndex] Built index of {count} summaries at {self.path}.")
+        return count
+
+    def ensure_built(self, db_session_factory=SessionLocal):
+        if not self.is_usable():
+            self.rebuild(db_session_factory)
+
+    def _read(self) -> Optional[_Snapshot]:
+        """Current file state, extended incrementally when the same file has only grown since the last read."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        count = stat.st_size // self.dtype.itemsize
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.count == count and snapshot.inode == stat.st_ino:
+            return snapshot
+        if not count or not self.is_usable():
+            return None
+        records = np.memmap(self.path, dtype=self.dtype, mode="r", shape=(count,))
+        previous = snapshot.count if snapshot is not None and snapshot.inode == stat.st_ino and snapshot.count < count else 0
+        tail_ids = np.array(records["id"][previous:])
+        ids = np.concatenate([snapshot.ids, tail_ids]) if previous else tail_ids
+        streams = np.array(records["topic_stream_id"][previous:])
+        topic_stream_ids = np.concatenate([snapshot.topic_stream_ids, streams]) if previous else streams
+        # Newest record per id wins: the tail's last occurrences are live, and older rows lose
+        # their live flag if the tail re-indexed their id
+        live = np.zeros(count, dtype=bool)
+        live[count - 1 - np.unique(tail_ids[::-1], return_index=True)[1]] = True
+        if previous:
+            live[:previous] = snapshot.live & ~np.isin(snapshot.ids, tail_ids)
+        self._snapshot = _Snapshot(count, stat.st_ino, records, ids, topic_stream_ids, live)
+        return self._snapshot
+
+    def vector_for(self, summary_id: int) -> Optional[np.ndarray]:
+        snapshot = self._read()
+        if snapshot is None:
+            return None
+        rows = np.flatnonzero((snapshot.ids == summary_id) & snapshot.live)
+        return np.array(snapshot.records["vector"][rows[-1]]) if len(rows) else None
+
+    def top_k(self, query: np.ndarray, topic_stream_ids: Sequence[int], k: int,
+              exclude_ids: Sequence[int] = ()) -> List[Tuple[int, float]]:
+        """
+        Best `k` (summary_id, cosine) among live records of the given streams, scored in batches of
+        RELATED_INDEX_BATCH_ROWS rows straight off the memory map (vectors are unit length, so a
+        matrix-vector product is the cosine).
+        """
+        snapshot = self._read()
+        if snapshot is None or k <= 0 or not len(topic_stream_ids):
+            return []
+        candidates = snapshot.live & np.isin(snapshot.topic_stream_ids, np.asarray(list(topic_stream_ids), dtype=np.int64))
+        if len(exclude_ids):
+            candidates &= ~np.isin(snapshot.ids, np.asarray(list(exclude_ids), dtype=np.int64))
+        candidate_rows = np.flatnonzero(candidates)
+        query = query.astype(np.float32, copy=False)
+        best_ids, best_scores = np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        for start in range(0, len(candidate_rows), RELATED_INDEX_BATCH_ROWS):
+            rows = candidate_rows[start:start + RELATED_INDEX_BATCH_ROWS]
+            # Fancy indexing reads just these rows' vectors off the map
+            scores = snapshot.records["vector"][rows] @ query
+            if len(scores) > k:
+                keep = np.argpartition(-scores, k - 1)[:k]
+                rows, scores = rows[keep], scores[keep]
+            best_ids = np.concatenate([best_ids, snapshot.ids[rows]])
+            best_scores = np.concatenate([best_scores, scores])
+            if len(best_scores) > k:
+                keep = np.argpartition(-best_scores, k - 1)[:k]
+                best_ids, best_scores = best_ids[keep], best_scores[keep]
+        order = np.argsort(-best_scores, kind="stable")
+        return [(int(best_ids[i]), float(best_scores[i])) for i in order]
+
+    def compact(self, db_session_factory=SessionLocal) -> int:
+        """
+        Rewrite the file with only the newest record of each summary still in the database. The ids are
+        read under the append lock, so a summary appended meanwhile can't be mistaken for a deleted one.
+        Returns records dropped.
+        """
+        tmp_path = self.path + ".tmp"
+        with self._lock:
+            snapshot = self._read()
+            if snapshot is None:
+                return 0
+            db = db_session_factory()
+            try:
+                existing = np.fromiter((row.id for row in db.query(Summary.id)), dtype=np.int64)
+            finally:
+                db.close()
+            keep = snapshot.live & np.isin(snapshot.ids, existing)
+            dropped = snapshot.count - int(keep.sum())
+            if dropped:
+                with open(tmp_path, "wb") as tmp_file:
+                    tmp_file.write(snapshot.records[keep].tobytes())
+                os.replace(tmp_path, self.path)
+                self._snapshot = None
+        if dropped:
+            logger.info(f"[RelatedIndex] Compacted index: dropped {dropped} deleted or superseded records.")
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        return {"records": len(self), "dim": self.dim, "bytes": len(self) * self.dtype.itemsize}
+
+
+# Shared instance used by the API, the write coalescer listener and the scheduler
+related_index = RelatedIndex()
+
+
+def index_new_summaries(summaries: List[Dict[str, Any]]):
+    """Write-coalescer listener: embed and append each committed summary."""
+    related_index.add((summary["id"], summary["topic_stream_id"], summary["content"]) for summary in summaries)
+
+
+def index_summary(summary_id: int, topic_stream_id: int, content: str):
+    """Append one summary written outside the coalescer. Failures are logged and never affect the write."""
+    try:
+        related_index.add([(summary_id, topic_stream_id, content)])
+    except Exception as e:
+        logger.error(f"[RelatedIndex] Failed to index summary {summary_id}: {e}", exc_info=True)
+
+
+def compact_related_index(db_session_factory=SessionLocal) -> int:
+    """Drop records of summaries that were deleted or archived since they were indexed."""
+    try:
+        return related_index.compact(db_session_factory)
+    except Exception as e:
+        logger.error(f"[RelatedIndex] Error compacting index: {e}", exc_info=True)
+        return 0
@@ -4,9 +4,18 @@ import time
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.orm import Session
-from models import TopicStream, UpdateFrequency, Summary, DetailLevel, ModelType, ContextHistoryLevel
+from models import TopicStream, UpdateFrequency, Summary, DetailLevel, ModelType, ContextHistoryLevel, InitialSummaryStatus
 from perplexity_api import PerplexityAPI, APIError, APIClientError, APIServerError, APINetworkError
 from database import SessionLocal
+from archive import archive_old_summaries, ARCHIVE_AFTER_DAYS
+from deletion import resume_pending_purges
+from events import publish_job_status
+from change_log import prune_change_log
+from related_index import related_index, compact_related_index
+from initial_summary import produce_initial_summary, pending_initial_summaries
+from bulk import gather_bounded
+from trends import load_or_bootstrap_trends, save_trends_snapshot, TRENDS_SNAPSHOT_MINUTES
+from search import sync_search_index, SEARCH_SYNC_SECONDS
 import schedule
 import sys
 from pathlib import Path
@@ -27,18 +36,29 @@ class TopicStreamScheduler:
         self.scheduler.clear()
         logger.info("[Scheduler] Cleared all existing jobs on initialization.")
 
-        db_for_load = self.db_session_factory()
-        try:
-            self.load_and_schedule_existing_streams(db_for_load)
-        finally:
-            db_for_load.close()
+        if ARCHIVE_AFTER_DAYS > 0:
+            # Daily sweep that moves old summaries into the cold-storage archive
+            self.scheduler.every(1).days.do(self._archive_job).tag("archive")
+            logger.info(f"[Scheduler] Archive job scheduled daily for summaries older than {ARCHIVE_AFTER_DAYS} days.")
+
+        # Daily trim of the /sync change log; clients with older cursors get a full reset
+        self.scheduler.every(1).days.do(prune_change_log, self.db_session_factory).tag("change-log")
+        # Daily drop of deleted/archived summaries from the related-summaries index
+        self.scheduler.every(1).days.do(compact_related_index, self.db_session_factory).tag("related-index")
+        # Periodic snapshot of the /trends counters, so a crash loses at most this many minutes of counts
+        self.scheduler.every(TRENDS_SNAPSHOT_MINUTES).minutes.do(save_trends_snapshot).tag("trends")
+        # Search index catch-up for summary writes the app doesn't sync itself (purges, archiving, other tools)
+        self.scheduler.every(SEARCH_SYNC_SECONDS).seconds.do(self._search_sync_job).tag("search")
             
         self.thread.start()
 
     def load_and_schedule_existing_streams(self, db):
         logger.info("Loading and scheduling existing topic streams...")
         try:
-            streams = db.query(TopicStream).filter(TopicStream.auto_update_enabled == True).all()
+            streams = db.query(TopicStream).filter(
+                TopicStream.auto_update_enabled == True,
+                TopicStream.deleted_at.is_(None)
+            ).all()
             for stream in streams:
                 self.schedule_topic_stream(stream)
             logger.info(f"[Scheduler] Found {len(streams)} streams with auto-update enabled to load and schedule.")
@@ -164,12 +184,13 @@ class TopicStreamScheduler:
 
     def _scheduled_update_job(self, stream_id: int):
         db = self.db_session_factory()
+        user_id = None
         try:
             logger.info(f"[Scheduler] Job starting for stream ID: {stream_id}")
             topic_stream = db.query(TopicStream).filter(TopicStream.id == stream_id).first()
 
-            if not topic_stream or not topic_stream.auto_update_enabled:
-                if not topic_stream:
+            if not topic_stream or topic_stream.deleted_at is not None or not topic_stream.auto_update_enabled:
+                if not topic_stream or topic_stream.deleted_at is not None:
                      logger.warning(f"[Scheduler] Job: Topic stream {stream_id} not found for scheduled update. Removing job.")
                 else:
                      logger.info(f"[Scheduler] Job: Stream {stream_id} ('{topic_stream.query[:30]}...') auto-update is now disabled during job execution. Skipping update and removing job.")
@@ -177,19 +198,76 @@ class TopicStreamScheduler:
                 self.remove_topic_stream(stream_id)
                 return
 
+            if topic_stream.initial_summary_status in (InitialSummaryStatus.PENDING, InitialSummaryStatus.RUNNING):
+                # The first summary is still outstanding: fetch it only through the claim, so a tick that
+                # races the create's background fetch doesn't produce a second one
+                asyncio.run(produce_initial_summary(self.db_session_factory, self.update_function_coro, topic_stream.user_id, stream_id))
+                return
+
             logger.info(f"[Scheduler] JOB EXECUTING for stream ID: {stream_id} ('{topic_stream.query[:30]}...') ... Actual DB Frequency for this run: {topic_stream.update_frequency.value}")
 
+            user_id = topic_stream.user_id
+            publish_job_status(user_id, stream_id, "running")
             asyncio.run(self.update_function_coro(db, topic_stream, ignore_all_previous_summaries_override=False))
             logger.info(f"[Scheduler] Scheduled update processed for topic stream {topic_stream.id}: {topic_stream.query[:30]}...")
+            publish_job_status(user_id, stream_id, "succeeded")
 
         except Exception as e:
              logger.error(f"[Scheduler] Error in _scheduled_update_job for stream ID {stream_id}: {e}", exc_info=True)
+             if user_id is not None:
+                 publish_job_status(user_id, stream_id, "failed", str(e))
         finally:
             db.close()
             logger.debug(f"[Scheduler] DB session closed for scheduled job of stream ID: {stream_id}")
 
+    def _resume_initial_summaries(self):
+        """Fetch first summaries of streams created just before the restart (or whose fetch it interrupted)."""
+        try:
+            pending = pending_initial_summaries(self.db_session_factory)
+            if not pending:
+                return
+            logger.info(f"[Scheduler] Fetching first summaries of {len(pending)} new streams.")
+            asyncio.run(gather_bounded(pending, lambda item: produce_initial_summary(
+                self.db_session_factory, self.update_function_coro, item[1], item[0]
+            )))
+        except Exception as e:
+            logger.error(f"[Scheduler] Error resuming first summaries: {e}", exc_info=True)
+
+    def _archive_job(self):
+        try:
+            moved = archive_old_summaries(self.db_session_factory)
+            logger.info(f"[Scheduler] Archive job finished. Moved {moved} summaries to the archive.")
+        except Exception as e:
+            logger.error(f"[Scheduler] Error in archive job: {e}", exc_info=True)
+
+    def _search_sync_job(self):
+        try:
+            sync_search_index()
+        except Exception as e:
+            logger.error(f"[Scheduler] Error syncing the search index: {e}", exc_info=True)
+
     def _run_scheduler(self):
         logger.info("Scheduler thread started.")
+        # Existing streams are loaded here rather than in __init__ so app startup doesn't wait on the query
+        db_for_load = self.db_session_factory()
+        try:
+            self.load_and_schedule_existing_streams(db_for_load)
+        finally:
+            db_for_load.close()
+        # Finish any stream/user purges that were interrupted by a restart
+        resume_pending_purges(self.db_session_factory)
+        # First start (or a changed RELATED_INDEX_DIM): embed existing summaries for /summaries/{id}/related
+        try:
+            related_index.ensure_built(self.db_session_factory)
+        except Exception as e:
+            logger.error(f"[Scheduler] Error building related-summaries index: {e}", exc_info=True)
+        # Restore the /trends counters, seeding them from recent summaries on first start
+        try:
+            load_or_bootstrap_trends(self.db_session_factory)
+        except Exception as e:
+            logger.error(f"[Scheduler] Error loading trend counters: {e}", exc_info=True)
+        # On their own thread: a backlog of upstream searches must not hold up the scheduled jobs
+        threading.Thread(target=self._resume_initial_summaries, name="initial-summary-resume", daemon=True).start()
         while not self.stop_event.is_set():
             self.scheduler.run_pending()
             sleep_duration = self.scheduler.idle_seconds
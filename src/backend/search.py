@@ -0,0 +1,242 @@
+import os
+import re
+import base64
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import orjson
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import engine, register_sql_functions
+from models import Summary, TopicStream
+from utils.compression import decompress_text
+
+logger = logging.getLogger(__name__)
+
+# Full-text index over summaries.content. The FTS5 table is contentless (content=''), so summary
+# text is not stored a second time uncompressed next to the compressed column; snippets are built
+# from the page of results instead of by FTS5.
+#
+# Content is compressed, so SQL alone can't index it. The triggers on summaries therefore only queue
+# the change (with the old stored value, which a contentless table needs to delete a row) in
+# summaries_fts_queue, and sync_search_index applies the queue in Python. Writes to summaries never
+# depend on an app-registered SQL function, so the sqlite CLI, scripts and migrations can still write
+# them. The app syncs after every coalescer flush and after its other summary writes, and the
+# scheduler syncs periodically to pick up everything else.
+#
+# The `stream` column holds one token per row ("s<topic_stream_id>"), so per-user scoping is an
+# index intersection inside the MATCH rather than a join filter over every matching summary.
+SEARCH_TABLE = "summaries_fts"
+SEARCH_QUEUE_TABLE = "summaries_fts_queue"
+SEARCH_PAGE_SIZE = int(os.getenv("SEARCH_PAGE_SIZE", "20"))
+SEARCH_MAX_PAGE_SIZE = int(os.getenv("SEARCH_MAX_PAGE_SIZE", "100"))
+SEARCH_SNIPPET_CHARS = int(os.getenv("SEARCH_SNIPPET_CHARS", "240"))
+# Summaries re-indexed per sync transaction, and how often the scheduler syncs
+SEARCH_SYNC_BATCH_SIZE = int(os.getenv("SEARCH_SYNC_BATCH_SIZE", "500"))
+SEARCH_SYNC_SECONDS = int(os.getenv("SEARCH_SYNC_SECONDS", "60"))
+
+SEARCH_SCHEMA_STATEMENTS = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+    f"content, stream, content='', tokenize='unicode61 remove_diacritics 2')",
+    # Earlier versions indexed from the triggers through tp_decompress()
+    "DROP TRIGGER IF EXISTS summaries_fts_insert",
+    "DROP TRIGGER IF EXISTS summaries_fts_delete",
+    "DROP TRIGGER IF EXISTS summaries_fts_update",
+    # old_content/old_topic_stream_id are what the index holds for the row, NULL for an insert
+    f"CREATE TABLE IF NOT EXISTS {SEARCH_QUEUE_TABLE} ("
+    f"seq INTEGER PRIMARY KEY, summary_id INTEGER NOT NULL, old_content, old_topic_stream_id INTEGER)",
+    f"CREATE TRIGGER IF NOT EXISTS summaries_fts_queue_insert AFTER INSERT ON summaries BEGIN "
+    f"INSERT INTO {SEARCH_QUEUE_TABLE}(summary_id) VALUES (new.id); END",
+    f"CREATE TRIGGER IF NOT EXISTS summaries_fts_queue_delete AFTER DELETE ON summaries BEGIN "
+    f"INSERT INTO {SEARCH_QUEUE_TABLE}(summary_id, old_content, old_topic_stream_id) VALUES (old.id, old.content, old.topic_stream_id); END",
+    f"CREATE TRIGGER IF NOT EXISTS summaries_fts_queue_update AFTER UPDATE OF content, topic_stream_id ON summaries BEGIN "
+    f"INSERT INTO {SEARCH_QUEUE_TABLE}(summary_id, old_content, old_topic_stream_id) VALUES (old.id, old.content, old.topic_stream_id); END",
+)
+
+
+def rebuild_search_index(connection):
+    """Re-index every summary from scratch (one transaction; the caller commits)."""
+    connection.exec_driver_sql(f"DELETE FROM {SEARCH_QUEUE_TABLE}")
+    connection.exec_driver_sql(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('delete-all')")
+    connection.exec_driver_sql(
+        f"INSERT INTO {SEARCH_TABLE}(rowid, content, stream) "
+        f"SELECT id, tp_decompress(content), 's' || topic_stream_id FROM summaries"
+    )
+
+
+def apply_search_queue(connection, batch_size: int = SEARCH_SYNC_BATCH_SIZE) -> int:
+    """
+    Re-index up to `batch_size` queued summaries (one transaction; the caller commits). Returns how many.
+
+    Every queue entry of a summary is taken at once, and the DELETE takes the write lock first, so the
+    summary's current row can't change before it is indexed. Its oldest entry says what the index holds.
+    """
+    entries = connection.exec_driver_sql(
+        f"DELETE FROM {SEARCH_QUEUE_TABLE} WHERE summary_id IN "
+        f"(SELECT summary_id FROM {SEARCH_QUEUE_TABLE} ORDER BY seq LIMIT ?) "
+        f"RETURNING seq, summary_id, old_content, old_topic_stream_id",
+        (batch_size,)
+    ).all()
+    if not entries:
+        return 0
+
+    indexed = {}
+    for entry in sorted(entries, key=lambda entry: entry.seq):
+        indexed.setdefault(entry.summary_id, entry)
+    stale = [
+        ("delete", summary_id, decompress_text(entry.old_content), f"s{entry.old_topic_stream_id}")
+        for summary_id, entry in indexed.items() if entry.old_topic_stream_id is not None
+    ]
+    if stale:
+        # Contentless tables can only delete a row given the exact values it was indexed with
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, content, stream) VALUES (?, ?, ?, ?)", stale
+        )
+
+    placeholders = ", ".join("?" * len(indexed))
+    current = connection.exec_driver_sql(
+        f"SELECT id, content, topic_stream_id FROM summaries WHERE id IN ({placeholders})", tuple(indexed)
+    ).all()
+    if current:
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, content, stream) VALUES (?, ?, ?)",
+            [(row.id, decompress_text(row.content), f"s{row.topic_stream_id}") for row in current]
+        )
+    return len(indexed)
+
+
+def sync_search_index(db_engine=engine, batch_size: int = SEARCH_SYNC_BATCH_SIZE) -> int:
+    """Apply every queued summary change to the index, one batch per transaction. Returns how many."""
+    total = 0
+    while True:
+        with db_engine.begin() as connection:
+            count = apply_search_queue(connection, batch_size)
+        total += count
+        if count < batch_size:
+            break
+    if total:
+        logger.debug(f"[Search] Re-indexed {total} changed summaries.")
+    return total
+
+
+def sync_after_flush(summaries: List[Dict[str, Any]]):
+    """Coalescer listener: index the summaries it just committed."""
+    sync_search_index()
+
+
+def ensure_search_schema(db_engine):
+    """Create the index, queue and triggers if missing (fresh databases skip migrations), indexing any existing rows."""
+    with db_engine.begin() as connection:
+        # The engine may not be the app's (which registers it on connect)
+        register_sql_functions(connection.connection.driver_connection)
+        existed = connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name", {"name": SEARCH_TABLE}
+        ).first() is not None
+        for statement in SEARCH_SCHEMA_STATEMENTS:
+            connection.exec_driver_sql(statement)
+        if not existed:
+            rebuild_search_index(connection)
+            logger.info(f"[Search] Created {SEARCH_TABLE} and indexed existing summaries.")
+    sync_search_index(db_engine)
+
+
+_QUERY_PART = re.compile(r'"([^"]*)"|([^\s"]+)')
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def parse_search_query(query: str) -> Tuple[str, List[str]]:
+    """
+    User input -> (FTS5 MATCH expression, terms for highlighting). Words are ANDed, "quoted text"
+    is a phrase and a trailing * makes the last word a prefix. Every term is quoted, so FTS5
+    operators typed by users are matched as words instead of raising syntax errors.
+    """
+    clauses, terms = [], []
+    for phrase, word in _QUERY_PART.findall(query):
+        words = _WORD.findall(phrase or word)
+        if not words:
+            continue
+        terms.extend(words)
+        if phrase:
+            clauses.append('"' + " ".join(words) + '"')
+        else:
+            clauses.extend(f'"{w}"' for w in words)
+            if word.endswith("*"):
+                clauses[-1] += "*"
+    return " AND ".join(clauses), terms
+
+
+def make_snippet(content: str, terms: List[str], max_chars: int = SEARCH_SNIPPET_CHARS) -> Tuple[str, List[List[int]]]:
+    """A window of `content` around the first matched term, with [start, end) offsets of every match in it."""
+    pattern = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in sorted(set(terms), key=len, reverse=True)) + r")\w*", re.IGNORECASE) if terms else None
+    first = pattern.search(content) if pattern else None
+    start = max(0, first.start() - max_chars // 4) if first else 0
+    if start:
+        # Don't start mid-word
+        space = content.find(" ", start, first.start())
+        start = space + 1 if space != -1 else start
+    snippet = content[start:start + max_chars]
+    highlights = [[m.start(), m.end()] for m in pattern.finditer(snippet)] if pattern else []
+    prefix = "…" if start else ""
+    suffix = "…" if start + max_chars < len(content) else ""
+    if prefix:
+        highlights = [[s + len(prefix), e + len(prefix)] for s, e in highlights]
+    return prefix + snippet + suffix, highlights
+
+
+def encode_cursor(rank: float, summary_id: int) -> str:
+    return base64.urlsafe_b64encode(orjson.dumps([rank, summary_id])).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    rank, summary_id = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    return float(rank), int(summary_id)
+
+
+def search_summaries(db: Session, user_id: int, query: str, topic_stream_id: Optional[int] = None,
+                     limit: int = SEARCH_PAGE_SIZE, after: Optional[Tuple[float, int]] = None) -> Dict[str, Any]:
+    """
+    One page of the user's summaries matching `query`, best bm25 first, with (rank, id) keyset
+    pagination. The ranked id query never touches summary content; only the page is loaded.
+    """
+    match, terms = parse_search_query(query)
+    stream_ids = [row.id for row in db.query(TopicStream.id).filter(
+        TopicStream.user_id == user_id, TopicStream.deleted_at.is_(None),
+        *([TopicStream.id == topic_stream_id] if topic_stream_id is not None else [])
+    )]
+    if not match or not stream_ids:
+        return {"results": [], "next_cursor": None}
+
+    scope = "stream : (" + " OR ".join(f'"s{stream_id}"' for stream_id in stream_ids) + ")"
+    # The stream column gets weight 0 so the scope token never affects ranking
+    rank = f"bm25({SEARCH_TABLE}, 1.0, 0.0)"
+    params = {"match": f"{scope} AND ({match})", "limit": limit + 1}
+    keyset = ""
+    if after is not None:
+        keyset = f"AND ({rank}, rowid) > (:after_rank, :after_id)"
+        params.update(after_rank=after[0], after_id=after[1])
+    ranked = db.execute(text(
+        f"SELECT rowid AS id, {rank} AS rank FROM {SEARCH_TABLE} "
+        f"WHERE {SEARCH_TABLE} MATCH :match {keyset} ORDER BY rank, rowid LIMIT :limit"
+    ), params).all()
+    has_more = len(ranked) > limit
+    ranked = ranked[:limit]
+
+    rows = {row.id: row for row in db.query(
+        Summary.id, Summary.topic_stream_id, Summary.created_at, Summary.content
+    ).filter(Summary.id.in_([hit.id for hit in ranked]))} if ranked else {}
+    results = []
+    for hit in ranked:
+        row = rows.get(hit.id)
+        if row is None:
+            continue
+        snippet, highlights = make_snippet(row.content, terms)
+        results.append({
+            "summary_id": row.id,
+            "topic_stream_id": row.topic_stream_id,
+            "created_at": row.created_at,
+            "rank": hit.rank,
+            "snippet": snippet,
+            "highlights": highlights,
+        })
+    return {"results": results, "next_cursor": encode_cursor(ranked[-1].rank, ranked[-1].id) if has_more else None}
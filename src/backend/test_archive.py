@@ -0,0 +1,40 @@
+import pytest
+from datetime import datetime, timedelta
+
+import archive
+from models import TopicStream, Summary
+
+@pytest.fixture
+def hot_session_factory(session_factory, archive_db):
+    """Hot database with old and fresh summaries, plus a throwaway archive database"""
+    db = session_factory()
+    db.add(TopicStream(id=1, user_id=1, query="quantum computing"))
+    now = datetime.utcnow()
+    db.add(Summary(id=1, topic_stream_id=1, content="old " * 400, sources="[]", reasoning="why", created_at=now - timedelta(days=200)))
+    db.add(Summary(id=2, topic_stream_id=1, content="older", sources="[]", created_at=now - timedelta(days=300)))
+    db.add(Summary(id=3, topic_stream_id=1, content="fresh", sources="[]", created_at=now - timedelta(days=1)))
+    db.commit()
+    db.close()
+    return session_factory
+
+def test_archive_moves_only_old_summaries(hot_session_factory):
+    moved = archive.archive_old_summaries(hot_session_factory, older_than_days=90, batch_size=1)
+    assert moved == 2
+
+    db = hot_session_factory()
+    assert [s.id for s in db.query(Summary).all()] == [3]
+    db.close()
+
+    archived = archive.fetch_archived_summaries(1)
+    assert [(row.id, has_reasoning) for row, has_reasoning in archived] == [(1, True), (2, False)]
+    assert archived[0][0].content == "old " * 400
+
+def test_archived_summary_lookup_and_delete(hot_session_factory):
+    archive.archive_old_summaries(hot_session_factory, older_than_days=90)
+    assert archive.get_archived_summary(1, 1).reasoning == "why"
+    assert archive.get_archived_summary(1, 2) is None
+    assert archive.delete_archived_summaries([1]) == 2
+    assert archive.fetch_archived_summaries(1) == []
+
+def test_archiving_disabled(hot_session_factory):
+    assert archive.archive_old_summaries(hot_session_factory, older_than_days=0) == 0
@@ -0,0 +1,46 @@
+import time
+
+import auth_cache as auth_cache_module
+from auth_cache import AuthCache, AuthenticatedUser
+from models import User
+
+def test_hit_miss_and_expiry():
+    cache = AuthCache(max_entries=10, ttl_seconds=60)
+    user = AuthenticatedUser(id=1, email="a@test.com")
+    cache.put("token-a", user)
+    cache.put("token-expired", user, token_expires_at=time.time() - 1)
+
+    assert cache.get("token-a") == user
+    assert cache.get("token-expired") is None
+    assert cache.get("unknown") is None
+    assert cache.stats() == {"entries": 1, "hits": 1, "misses": 2}
+
+def test_bounded_lru():
+    cache = AuthCache(max_entries=2, ttl_seconds=60)
+    for i in range(3):
+        cache.put(f"token-{i}", AuthenticatedUser(id=i, email=f"{i}@test.com"))
+    assert cache.get("token-0") is None
+    assert cache.get("token-2") is not None
+
+def test_invalidate_user_drops_all_their_tokens():
+    cache = AuthCache(ttl_seconds=60)
+    cache.put("a1", AuthenticatedUser(id=1, email="a@test.com"))
+    cache.put("a2", AuthenticatedUser(id=1, email="a@test.com"))
+    cache.put("b1", AuthenticatedUser(id=2, email="b@test.com"))
+
+    cache.invalidate_user(1)
+
+    assert cache.get("a1") is None and cache.get("a2") is None
+    assert cache.get("b1") is not None
+
+def test_password_change_invalidates(session_factory, monkeypatch):
+    cache = AuthCache(ttl_seconds=60)
+    monkeypatch.setattr(auth_cache_module, "auth_cache", cache)
+    db = session_factory()
+    user = db.get(User, 1)
+    cache.put("token", AuthenticatedUser(id=1, email="a@test.com"))
+
+    user.hashed_password = "new"
+
+    assert cache.get("token") is None
+    db.close()
@@ -0,0 +1,147 @@
+import asyncio
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import app
+import bulk
+from auth_cache import AuthenticatedUser
+from models import User, TopicStream, ChangeLog, InitialSummaryStatus
+
+USER = AuthenticatedUser(1, "a@example.com")
+ITEM = {"query": "fusion", "update_frequency": "daily", "detail_level": "brief", "model_type": "sonar", "recency_filter": "1d"}
+
+@pytest.fixture
+def session_factory(session_factory, monkeypatch):
+    db = session_factory()
+    db.add(TopicStream(id=50, user_id=2, query="private"))
+    db.commit()
+    db.close()
+    monkeypatch.setattr(app, "SessionLocal", session_factory)
+    return session_factory
+
+def call(endpoint, *args, **kwargs):
+    response = endpoint(Request({"type": "http", "headers": []}), *args, **kwargs)
+    if asyncio.iscoroutine(response):
+        response = asyncio.run(response)
+    return orjson.loads(response.body)["results"]
+
+def call_and_drain(endpoint, *args, **kwargs):
+    """Call an endpoint and wait, in the same loop, for the background work it spawned."""
+    async def run():
+        response = await endpoint(Request({"type": "http", "headers": []}), *args, **kwargs)
+        await asyncio.gather(*app.background_tasks)
+        return response
+    return orjson.loads(asyncio.run(run()).body)["results"]
+
+def test_gather_bounded_limits_concurrency_and_keeps_order():
+    running = peak = 0
+
+    async def worker(item):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 * (5 - item % 5))
+        running -= 1
+        return item * 2
+
+    assert asyncio.run(bulk.gather_bounded(range(12), worker, limit=3)) == [item * 2 for item in range(12)]
+    assert peak == 3
+
+def test_bulk_create_fetches_first_summaries_in_the_background(session_factory, monkeypatch):
+    running = peak = 0
+
+    async def fake_refresh(db, topic_stream, ignore_all_previous_summaries_override=False):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.02)
+        running -= 1
+        if topic_stream.query == "broken":
+            raise RuntimeError("upstream down")
+        return type("Summary", (), {"id": 1000 + topic_stream.id})()
+
+    monkeypatch.setattr(app, "perform_search_and_create_summary", fake_refresh)
+    monkeypatch.setattr(app, "BULK_REFRESH_CONCURRENCY", 2)
+    items = [dict(ITEM, query=f"topic {i}") for i in range(4)] + [dict(ITEM, model_type="gpt-9"), dict(ITEM, query="broken")]
+    db = session_factory()
+    results = call_and_drain(app.bulk_create_topic_streams, app.BulkTopicStreamCreate(items=items), current_user=USER, db=db)
+
+    assert [result["status"] for result in results] == ["created"] * 4 + ["invalid", "created"]
+    assert results[0]["topic_stream"]["query"] == "topic 0"
+    # The response went out before any upstream search finished
+    assert results[0]["topic_stream"]["initial_summary_status"] == "pending"
+    assert peak == 2
+    db.expire_all()
+    assert db.get(TopicStream, results[0]["id"]).initial_summary_status == InitialSummaryStatus.READY
+    assert db.get(TopicStream, results[5]["id"]).initial_summary_status == InitialSummaryStatus.FAILED
+    assert db.query(TopicStream).filter(TopicStream.user_id == 1).count() == 5
+    db.close()
+
+def test_bulk_patch_pauses_and_reports_per_item(session_factory):
+    db = session_factory()
+    created = call(app.bulk_create_topic_streams, app.BulkTopicStreamCreate(items=[ITEM, ITEM], refresh=False), current_user=USER, db=db)
+    first, second = created[0]["id"], created[1]["id"]
+    # Both streams in one transaction, and with nothing to fetch they are ready right away
+    assert db.query(User.data_version).filter(User.id == 1).scalar() == 1
+    assert db.query(ChangeLog).count() == 2
+    assert created[0]["topic_stream"]["initial_summary_status"] == "ready"
+    patch = app.BulkTopicStreamPatch(items=[
+        {"id": first, "auto_update_enabled": False, "query": "fusion energy"},
+        {"id": second, "query": "renamed", "detail_level": "huge"},
+        {"id": 50, "auto_update_enabled": False},
+        {"id": first, "query": "again"},
+    ])
+    results = call(app.bulk_update_topic_streams, patch, current_user=USER, db=db)
+
+    assert [result["status"] for result in results] == ["updated", "invalid", "not_found", "invalid"]
+    assert results[0]["topic_stream"]["auto_update_enabled"] is False and results[0]["topic_stream"]["query"] == "fusion energy"
+    db.expire_all()
+    # The invalid item left its stream untouched, including the fields before the bad value
+    assert db.get(TopicStream, second).query == "fusion"
+    assert db.get(TopicStream, 50).auto_update_enabled is True
+    db.close()
+
+def test_bulk_refresh_skips_other_users_streams_and_caps_size(session_factory, monkeypatch):
+    async def fake_refresh(db, topic_stream, ignore_all_previous_summaries_override=False):
+        return type("Summary", (), {"id": 7})()
+
+    monkeypatch.setattr(app, "perform_search_and_create_summary", fake_refresh)
+    db = session_factory()
+    created = call(app.bulk_create_topic_streams, app.BulkTopicStreamCreate(items=[ITEM], refresh=False), current_user=USER, db=db)
+    results = call(app.bulk_refresh_topic_streams, app.BulkRefreshRequest(ids=[created[0]["id"], 50, created[0]["id"]]), current_user=USER)
+    assert results == [{"id": created[0]["id"], "status": "succeeded", "summary_id": 7}, {"id": 50, "status": "not_found"}]
+
+    monkeypatch.setattr(app, "BULK_MAX_ITEMS", 2)
+    with pytest.raises(HTTPException) as error:
+        call(app.bulk_refresh_topic_streams, app.BulkRefreshRequest(ids=[1, 2, 3]), current_user=USER)
+    assert error.value.status_code == 400
+    db.close()
+
+def test_refreshing_a_pending_stream_goes_through_the_first_summary_claim(session_factory, monkeypatch):
+    fetched = []
+
+    async def fake_refresh(db, topic_stream, ignore_all_previous_summaries_override=False):
+        fetched.append(topic_stream.id)
+        return type("Summary", (), {"id": 7})()
+
+    monkeypatch.setattr(app, "perform_search_and_create_summary", fake_refresh)
+    db = session_factory()
+    db.add_all([
+        TopicStream(id=60, user_id=1, query="waiting", initial_summary_status=InitialSummaryStatus.PENDING),
+        TopicStream(id=61, user_id=1, query="fetching", initial_summary_status=InitialSummaryStatus.RUNNING),
+    ])
+    db.commit()
+    results = call(app.bulk_refresh_topic_streams, app.BulkRefreshRequest(ids=[60, 61]), current_user=USER)
+    assert results == [{"id": 60, "status": "succeeded", "summary_id": 7}, {"id": 61, "status": "skipped"}]
+    assert fetched == [60]
+    db.expire_all()
+    assert db.get(TopicStream, 60).initial_summary_status == InitialSummaryStatus.READY
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.update_topic_stream_now(61, app.UpdateNowOptions(), current_user=USER, db=db))
+    assert error.value.status_code == 409
+    assert fetched == [60]
+    db.close()
@@ -0,0 +1,60 @@
+import pytest
+from datetime import datetime, timedelta
+
+from models import TopicStream, ChangeLog
+from change_log import record_changes, read_changes, prune_change_log, STREAM, SUMMARY, UPSERT, DELETE
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    db.add_all([TopicStream(id=1, user_id=1, query="a"), TopicStream(id=2, user_id=1, query="b"), TopicStream(id=3, user_id=2, query="c")])
+    db.commit()
+    db.close()
+    return session_factory
+
+def record(factory, changes):
+    db = factory()
+    record_changes(db, changes)
+    db.commit()
+    db.close()
+
+def test_no_cursor_is_a_reset(factory):
+    record(factory, [(STREAM, 1, 1, UPSERT)])
+    changes = read_changes(factory(), 1, None)
+    assert changes.reset and changes.cursor == 1
+
+def test_delta_collapses_to_latest_op_per_entity(factory):
+    record(factory, [(SUMMARY, 10, 1, UPSERT), (SUMMARY, 11, 1, UPSERT), (SUMMARY, 30, 3, UPSERT)])
+    record(factory, [(SUMMARY, 11, 1, DELETE), (STREAM, 1, 1, UPSERT)])
+    # Summaries of a stream deleted in the same batch are covered by the stream delete
+    record(factory, [(SUMMARY, 20, 2, UPSERT), (STREAM, 2, 2, DELETE)])
+
+    changes = read_changes(factory(), 1, 0)
+    assert not changes.reset and not changes.has_more
+    assert changes.upserted_summary_ids == [10]
+    assert changes.deleted_summary_ids == [11]
+    assert changes.upserted_stream_ids == [1]
+    assert changes.deleted_stream_ids == [2]
+    assert changes.cursor == 7
+
+    assert read_changes(factory(), 1, changes.cursor).upserted_summary_ids == []
+    assert read_changes(factory(), 2, 0).upserted_summary_ids == [30]
+
+def test_has_more_pages_through_the_log(factory):
+    record(factory, [(SUMMARY, i, 1, UPSERT) for i in range(5)])
+    first = read_changes(factory(), 1, 0, limit=3)
+    assert first.has_more and first.upserted_summary_ids == [0, 1, 2]
+    second = read_changes(factory(), 1, first.cursor, limit=3)
+    assert not second.has_more and second.upserted_summary_ids == [3, 4]
+
+def test_pruned_cursor_gets_reset(factory):
+    record(factory, [(SUMMARY, i, 1, UPSERT) for i in range(3)])
+    db = factory()
+    db.query(ChangeLog).update({ChangeLog.created_at: datetime.utcnow() - timedelta(days=60)})
+    db.commit()
+    db.close()
+
+    # The newest row survives so the gap below it stays visible
+    assert prune_change_log(factory, older_than_days=30) == 2
+    assert read_changes(factory(), 1, 0).reset
+    assert not read_changes(factory(), 1, 2).reset
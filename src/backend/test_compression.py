@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import create_engine, Column, Integer, MetaData, Table, select, text
+from utils.compression import CompressedText, compress_text, decompress_text, is_compressed
+
+LONG_TEXT = "<think>\n" + "The model weighs each source carefully. " * 200 + "\n</think>\n\n## Update\n\nShort answer."
+
+def test_short_text_stays_plain():
+    """Values below the threshold are stored untouched"""
+    assert compress_text("hello", threshold=1024) == "hello"
+    assert decompress_text("hello") == "hello"
+
+def test_round_trip_zlib():
+    """Compressed values round-trip and are smaller than the input"""
+    stored = compress_text(LONG_TEXT, threshold=64, codec="zlib")
+    assert is_compressed(stored)
+    assert len(stored) < len(LONG_TEXT.encode("utf-8"))
+    assert decompress_text(stored) == LONG_TEXT
+
+def test_incompressible_text_stays_plain():
+    """If compression does not shrink the value, the plain text is kept"""
+    unique = "abcdefghijklmnopqrstuvwxyz"
+    assert compress_text(unique, threshold=10) == unique
+
+def test_unknown_codec_raises():
+    with pytest.raises(ValueError):
+        decompress_text(b"TPZx" + b"garbage")
+
+def test_column_type_reads_plain_and_compressed_rows():
+    """Existing plain-text rows and new compressed rows are both readable through the column type"""
+    engine = create_engine("sqlite://")
+    metadata = MetaData()
+    table = Table("docs", metadata, Column("id", Integer, primary_key=True), Column("body", CompressedText(threshold=64)))
+    metadata.create_all(engine)
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO docs (id, body) VALUES (1, 'legacy plain row')"))
+        conn.execute(table.insert().values(id=2, body=LONG_TEXT))
+        raw = conn.execute(text("SELECT body FROM docs WHERE id = 2")).scalar()
+        assert is_compressed(raw)
+
+        rows = dict(conn.execute(select(table.c.id, table.c.body)).all())
+    assert rows[1] == "legacy plain row"
+    assert rows[2] == LONG_TEXT
@@ -0,0 +1,78 @@
+import asyncio
+import pytest
+from datetime import datetime
+from starlette.requests import Request
+
+from models import User, TopicStream
+from fast_response import listing_etag, etag_matches, not_modified
+from versioning import bump_stream_versions, bump_user_version
+from write_coalescer import SummaryWriteCoalescer
+
+def make_request(**headers):
+    return Request({"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    db.add_all([TopicStream(id=1, user_id=1, query="a"), TopicStream(id=2, user_id=2, query="b")])
+    db.commit()
+    db.close()
+    return session_factory
+
+def versions(factory):
+    db = factory()
+    try:
+        return (
+            dict(db.query(TopicStream.id, TopicStream.version).all()),
+            dict(db.query(User.id, User.data_version).all()),
+        )
+    finally:
+        db.close()
+
+def test_etag_varies_with_version_and_representation():
+    json_request, msgpack_request = make_request(accept="application/json"), make_request(accept="application/msgpack")
+    etag = listing_etag(json_request, "summaries", 1, 3, False, True)
+    assert etag == 'W/"summaries-1-3-0-1-json"'
+    assert listing_etag(json_request, "summaries", 1, 4, False, True) != etag
+    assert listing_etag(json_request, "summaries", 1, 3, True, True) != etag
+    assert listing_etag(msgpack_request, "summaries", 1, 3, False, True) != etag
+
+def test_if_none_match_uses_weak_comparison():
+    etag = 'W/"streams-1-5-json"'
+    assert etag_matches(make_request(if_none_match=etag), etag)
+    assert etag_matches(make_request(if_none_match='"other", "streams-1-5-json"'), etag)
+    assert etag_matches(make_request(if_none_match="*"), etag)
+    assert not etag_matches(make_request(if_none_match='W/"streams-1-4-json"'), etag)
+    assert not etag_matches(make_request(), etag)
+
+def test_not_modified_has_no_body():
+    response = not_modified('W/"x"')
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == 'W/"x"'
+
+def test_bumps_touch_only_affected_streams_and_owners(factory):
+    db = factory()
+    bump_stream_versions(db, [1, 1])
+    bump_user_version(db, 2)
+    db.commit()
+    db.close()
+    assert versions(factory) == ({1: 1, 2: 0}, {1: 1, 2: 1})
+
+def test_coalesced_summary_writes_bump_versions(factory):
+    coalescer = SummaryWriteCoalescer(factory, window_ms=50, max_batch=10)
+
+    async def write_all():
+        return await asyncio.gather(*[
+            coalescer.write_summary({"topic_stream_id": 2, "content": f"summary {i}", "sources": "[]", "created_at": datetime(2025, 1, 1, i)})
+            for i in range(3)
+        ])
+
+    try:
+        asyncio.run(write_all())
+    finally:
+        coalescer.shutdown()
+    stream_versions, user_versions = versions(factory)
+    # One flush, one bump: the counter only needs to move, not count rows
+    assert stream_versions[1] == 0 and stream_versions[2] >= 1
+    assert user_versions[1] == 0 and user_versions[2] == stream_versions[2]
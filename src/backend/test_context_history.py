@@ -0,0 +1,52 @@
+import pytest
+from datetime import datetime, timedelta
+
+from models import TopicStream, Summary
+from context_history import build_history_context, HISTORY_SEPARATOR
+from utils.tokenizer_utils import count_tokens_cached
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    session.add(TopicStream(id=1, user_id=1, query="topic"))
+    session.commit()
+    yield session
+    session.close()
+
+def add_summaries(db, contents, store_counts=True):
+    start = datetime(2025, 1, 1)
+    for i, content in enumerate(contents):
+        db.add(Summary(
+            topic_stream_id=1, content=content, created_at=start + timedelta(hours=i),
+            estimated_content_tokens=count_tokens_cached(content) if store_counts else None
+        ))
+    db.commit()
+
+def test_all_summaries_fit(db):
+    add_summaries(db, ["first update", "second update", "third update"])
+    history = build_history_context(db, 1, max_summaries=2, token_budget=10_000)
+    assert history.text == HISTORY_SEPARATOR.join(["second update", "third update"])
+    assert history.summaries_fetched == 2
+    assert history.summaries_included == 2
+    assert not history.truncated
+
+def test_overflowing_summary_is_truncated(db):
+    long_text = "word " * 2000
+    add_summaries(db, ["short first update", long_text])
+    budget = count_tokens_cached("short first update") + count_tokens_cached(HISTORY_SEPARATOR) + 100
+    history = build_history_context(db, 1, max_summaries=5, token_budget=budget)
+    assert history.truncated
+    assert history.summaries_included == 2
+    assert history.text.startswith("short first update" + HISTORY_SEPARATOR)
+    assert len(history.text) < len(long_text)
+
+def test_rows_without_stored_counts(db):
+    add_summaries(db, ["legacy one", "legacy two"], store_counts=False)
+    history = build_history_context(db, 1, max_summaries=5, token_budget=10_000)
+    assert history.text == HISTORY_SEPARATOR.join(["legacy one", "legacy two"])
+
+def test_nothing_fits(db):
+    add_summaries(db, ["word " * 2000])
+    history = build_history_context(db, 1, max_summaries=1, token_budget=10)
+    assert history.text is None
+    assert history.summaries_fetched == 1
@@ -0,0 +1,48 @@
+import time
+import asyncio
+import threading
+import pytest
+
+from cpu_executor import CpuExecutor, EventLoopLagMonitor
+
+def test_work_runs_off_the_event_loop_thread():
+    executor = CpuExecutor(workers=2, tokenizer_kind="thread")
+
+    async def main():
+        loop_thread = threading.get_ident()
+        cpu_thread = await executor.run(threading.get_ident)
+        tokenizer_thread = await executor.run_tokenizer(threading.get_ident)
+        return loop_thread, cpu_thread, tokenizer_thread
+
+    loop_thread, cpu_thread, tokenizer_thread = asyncio.run(main())
+    executor.shutdown()
+    assert cpu_thread != loop_thread and tokenizer_thread != loop_thread
+    assert executor.stats()["cpu"]["completed"] == 1
+    assert executor.stats()["tokenizer"]["in_flight"] == 0
+
+def test_inline_tokenizer_and_failures_are_counted():
+    executor = CpuExecutor(tokenizer_kind="inline")
+
+    async def main():
+        assert await executor.run_tokenizer(len, "abc") == 3
+        with pytest.raises(ZeroDivisionError):
+            await executor.run(lambda: 1 / 0)
+
+    asyncio.run(main())
+    executor.shutdown()
+    assert executor.stats()["cpu"]["failed"] == 1
+
+def test_lag_monitor_sees_a_blocked_loop():
+    monitor = EventLoopLagMonitor(interval_ms=5, stall_ms=30)
+
+    async def main():
+        monitor.start()
+        await asyncio.sleep(0.02)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.02)
+        await monitor.stop()
+
+    asyncio.run(main())
+    snapshot = monitor.snapshot()
+    assert snapshot["max_ms"] >= 50
+    assert snapshot["stalls"] >= 1
@@ -0,0 +1,54 @@
+import asyncio
+import orjson
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from starlette.requests import Request
+
+from app import get_dashboard
+from auth_cache import AuthenticatedUser
+from models import TopicStream, Summary
+
+def make_db(session_factory, streams=5, summaries=4):
+    db = session_factory()
+    db.add_all([TopicStream(id=i, user_id=1, query=f"stream {i}") for i in range(1, streams + 1)])
+    db.add(TopicStream(id=99, user_id=2, query="someone else"))
+    start = datetime(2025, 1, 1)
+    db.add_all([
+        Summary(topic_stream_id=stream_id, content=f"{stream_id}-{i} " + "x" * 50, sources="[]",
+                created_at=start + timedelta(hours=i), estimated_content_tokens=10)
+        for stream_id in [*range(1, streams + 1), 99] for i in range(summaries)
+    ])
+    db.commit()
+    return db
+
+def request(**headers):
+    return Request({"type": "http", "headers": [(k.replace("_", "-").encode(), v.encode()) for k, v in headers.items()]})
+
+def body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(collect())
+
+def test_latest_n_per_stream_in_two_queries(db_engine, session_factory):
+    db = make_db(session_factory)
+    statements = []
+    event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    response = get_dashboard(request(), summaries_per_stream=2, preview_chars=10, current_user=AuthenticatedUser(1, "a@example.com"), db=db)
+    streams = orjson.loads(body(response))
+
+    # Version lookup, streams, summaries - independent of the number of streams
+    assert len(statements) == 3
+    assert [stream["id"] for stream in streams] == [1, 2, 3, 4, 5]
+    first = streams[0]
+    assert first["total_stored_est_tokens"] == 40
+    assert [summary["content"] for summary in first["summaries"]] == ["1-3 xxxxxx", "1-2 xxxxxx"]
+    assert all(summary["content_truncated"] for summary in first["summaries"])
+
+def test_dashboard_etag_round_trip(session_factory):
+    db = make_db(session_factory, streams=1)
+    user = AuthenticatedUser(1, "a@example.com")
+    etag = get_dashboard(request(), 3, 0, current_user=user, db=db).headers["etag"]
+    assert get_dashboard(request(if_none_match=etag), 3, 0, current_user=user, db=db).status_code == 304
+    # Different shape, different representation
+    assert get_dashboard(request(if_none_match=etag), 1, 0, current_user=user, db=db).status_code == 200
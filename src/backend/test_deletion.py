@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from datetime import datetime
+from fastapi import BackgroundTasks, HTTPException
+
+import app
+import deletion
+from auth_cache import AuthenticatedUser
+from models import User, TopicStream, Summary, DeepDiveMessage
+
+@pytest.fixture
+def session_factory(session_factory, monkeypatch):
+    monkeypatch.setattr(deletion, "delete_archived_summaries", lambda stream_ids: 0)
+
+    db = session_factory()
+    db.get(User, 2).deleted_at = datetime.utcnow()
+    db.add_all([
+        TopicStream(id=1, user_id=1, query="kept"),
+        TopicStream(id=2, user_id=1, query="deleted", deleted_at=datetime.utcnow()),
+        TopicStream(id=3, user_id=2, query="deleted user's stream"),
+    ])
+    for stream_id in (1, 2, 3):
+        db.add_all([Summary(topic_stream_id=stream_id, content=f"summary {i}", created_at=datetime.utcnow()) for i in range(7)])
+    db.add(DeepDiveMessage(user_id=1, topic_stream_id=2, message="question"))
+    db.commit()
+    db.close()
+    return session_factory
+
+def test_purge_topic_stream_in_chunks(session_factory):
+    deletion.purge_topic_stream(session_factory, 2, chunk_size=3)
+
+    db = session_factory()
+    assert db.query(TopicStream).filter(TopicStream.id == 2).count() == 0
+    assert db.query(Summary).filter(Summary.topic_stream_id == 2).count() == 0
+    assert db.query(DeepDiveMessage).count() == 0
+    assert db.query(Summary).filter(Summary.topic_stream_id == 1).count() == 7
+    db.close()
+
+def test_resume_pending_purges(session_factory):
+    deletion.resume_pending_purges(session_factory)
+
+    db = session_factory()
+    assert [u.id for u in db.query(User).all()] == [1]
+    assert [s.id for s in db.query(TopicStream).all()] == [1]
+    assert db.query(Summary).count() == 7
+    db.close()
+
+def test_deleted_users_email_can_be_registered_again(session_factory):
+    # User 2 was soft-deleted while still holding its address; user 1 deletes their account now
+    db = session_factory()
+    app.delete_current_user(BackgroundTasks(), current_user=AuthenticatedUser(1, "a@example.com"), db=db)
+    db.close()
+    for email in ("a@example.com", "b@example.com"):
+        db = session_factory()
+        new_user = asyncio.run(app.create_user(app.UserCreate(email=email, password="secret"), db=db))
+        assert new_user.email == email and new_user.id not in (1, 2)
+        db.close()
+
+    db = session_factory()
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.create_user(app.UserCreate(email="a@example.com", password="secret"), db=db))
+    assert error.value.status_code == 400
+    db.close()
+    # The old rows still await their purge
+    db = session_factory()
+    assert {user.email for user in db.query(User).filter(User.deleted_at.isnot(None))} == {deletion.released_email(1), deletion.released_email(2)}
+    db.close()
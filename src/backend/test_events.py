@@ -0,0 +1,116 @@
+import asyncio
+import threading
+import orjson
+import pytest
+from fastapi import HTTPException
+
+import app
+from auth_cache import AuthenticatedUser
+from events import InProcessEventBus, OutboxEventBus, Event, sse_stream, SUMMARY_CREATED, JOB_STATUS, RESYNC_SSE
+
+def parse_sse(chunk: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n") if not line.startswith(":"))
+    return fields
+
+def test_event_serializes_as_sse():
+    chunk = Event(42, 1, SUMMARY_CREATED, {"summary_id": 7}).to_sse()
+    assert parse_sse(chunk) == {"id": "42", "event": "summary.created", "data": '{"summary_id":7}'}
+
+def test_replay_filters_by_user_and_detects_gaps():
+    bus = InProcessEventBus(buffer_size=3)
+    for i in range(5):
+        bus.publish(1 + i % 2, JOB_STATUS, {"i": i})
+    first_kept = bus._buffer[0].id
+    missed, gap = bus.replay(1, first_kept - 1)
+    assert [event.data["i"] for event in missed] == [2, 4]
+    assert not gap
+    _, gap = bus.replay(1, first_kept - 5)
+    assert gap
+
+def test_live_events_published_from_another_thread():
+    bus = InProcessEventBus()
+
+    async def scenario():
+        stream = sse_stream(bus, user_id=1, heartbeat_seconds=5)
+        assert await stream.__anext__() == b"retry: 3000\n\n"
+        pending = asyncio.ensure_future(stream.__anext__())
+        await asyncio.sleep(0.01)
+        publisher = threading.Thread(target=bus.publish_many, args=([(2, JOB_STATUS, {"other": True}), (1, SUMMARY_CREATED, {"summary_id": 9})],))
+        publisher.start()
+        chunk = await asyncio.wait_for(pending, timeout=2)
+        publisher.join()
+        assert bus.stats()["connections"] == 1
+        await stream.aclose()
+        return chunk
+
+    chunk = asyncio.run(scenario())
+    assert parse_sse(chunk)["event"] == SUMMARY_CREATED
+    assert bus.stats()["connections"] == 0
+
+def test_reconnect_replays_after_cursor_then_streams_live():
+    bus = InProcessEventBus(buffer_size=10)
+    bus.publish(1, JOB_STATUS, {"status": "running"})
+    cursor = bus._buffer[-1].id
+    bus.publish(1, SUMMARY_CREATED, {"summary_id": 1})
+
+    async def scenario():
+        stream = sse_stream(bus, user_id=1, last_event_id=cursor, heartbeat_seconds=5)
+        await stream.__anext__()  # retry hint
+        replayed = await stream.__anext__()
+        bus.publish(1, JOB_STATUS, {"status": "succeeded"})
+        live = await asyncio.wait_for(stream.__anext__(), timeout=2)
+        await stream.aclose()
+        return replayed, live
+
+    replayed, live = asyncio.run(scenario())
+    assert orjson.loads(parse_sse(replayed)["data"]) == {"summary_id": 1}
+    assert orjson.loads(parse_sse(live)["data"]) == {"status": "succeeded"}
+
+def test_too_old_cursor_gets_resync():
+    bus = InProcessEventBus(buffer_size=2)
+    for i in range(4):
+        bus.publish(1, JOB_STATUS, {"i": i})
+
+    async def scenario():
+        stream = sse_stream(bus, user_id=1, last_event_id=1, heartbeat_seconds=5)
+        await stream.__anext__()
+        chunk = await stream.__anext__()
+        await stream.aclose()
+        return chunk
+
+    assert asyncio.run(scenario()) == RESYNC_SSE
+
+def test_outbox_bus_shares_events_between_instances(session_factory):
+    publisher, subscriber = OutboxEventBus(session_factory), OutboxEventBus(session_factory)
+
+    async def scenario():
+        subscriber.poll_once()  # starts from the current end of the table
+        subscription = subscriber.subscribe(1)
+        publisher.publish_many([(1, SUMMARY_CREATED, {"summary_id": 3}), (2, SUMMARY_CREATED, {"summary_id": 4})])
+        assert subscriber.poll_once() == 2
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=2)
+        subscriber.unsubscribe(subscription)
+        return event
+
+    event = asyncio.run(scenario())
+    assert event.data == {"summary_id": 3}
+    missed, gap = publisher.replay(1, 0)
+    assert [e.id for e in missed] == [event.id] and not gap
+
+def test_events_ticket_is_single_use_and_not_an_access_token(session_factory, monkeypatch):
+    monkeypatch.setattr(app, "redeemed_event_tickets", {})
+    ticket = asyncio.run(app.create_events_ticket_endpoint(current_user=AuthenticatedUser(1, "a@example.com")))["ticket"]
+    user = asyncio.run(app.get_current_user_for_events(ticket=ticket, token=None, db=session_factory()))
+    assert (user.id, user.email) == (1, "a@example.com")
+    # Replayed from a log, or used as a bearer token on the rest of the API
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.get_current_user_for_events(ticket=ticket, token=None, db=session_factory()))
+    assert error.value.status_code == 401
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.get_current_user(app.create_events_ticket(1), session_factory()))
+    assert error.value.status_code == 401
+
+    monkeypatch.setattr(app, "EVENTS_TICKET_SECONDS", -1)
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(app.get_current_user_for_events(ticket=app.create_events_ticket(1), token=None, db=session_factory()))
+    assert error.value.status_code == 401
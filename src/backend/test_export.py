@@ -0,0 +1,77 @@
+import csv
+import gzip
+import io
+import asyncio
+from datetime import datetime, timedelta
+
+import orjson
+import pytest
+from fastapi import HTTPException
+
+import app
+import archive
+from auth_cache import AuthenticatedUser
+from export import iter_stream_summaries
+from models import TopicStream, Summary
+
+@pytest.fixture
+def session_factory(session_factory, archive_db):
+    db = session_factory()
+    db.add_all([TopicStream(id=1, user_id=1, query="fusion power"), TopicStream(id=2, user_id=1, query="rockets"),
+                TopicStream(id=3, user_id=2, query="private")])
+    now = datetime.utcnow()
+    db.add_all([Summary(id=i, topic_stream_id=1, content=f"fusion update {i}", sources=orjson.dumps([f"http://s/{i}"]).decode(),
+                        created_at=now - timedelta(days=10 * (6 - i))) for i in range(1, 6)])
+    db.add_all([Summary(id=6, topic_stream_id=2, content="launch, \"quoted\"\nnext line", sources="[]", created_at=now),
+                Summary(id=7, topic_stream_id=3, content="not mine", sources="[]", created_at=now)])
+    db.commit()
+    db.close()
+    archive.archive_old_summaries(session_factory, older_than_days=25)
+    return session_factory
+
+def read_body(response) -> bytes:
+    async def collect():
+        return b"".join([chunk async for chunk in response.body_iterator])
+    return asyncio.run(collect())
+
+def test_hot_then_archived_exactly_once_even_if_archived_mid_export(session_factory):
+    assert [s["id"] for s in iter_stream_summaries(session_factory, 1, batch_rows=2)] == [5, 4, 3, 2, 1]
+    assert [s["archived"] for s in iter_stream_summaries(session_factory, 1)] == [False, False, True, True, True]
+    assert [s["id"] for s in iter_stream_summaries(session_factory, 1, include_archived=False)] == [5, 4]
+
+    summaries = iter_stream_summaries(session_factory, 1, batch_rows=1)
+    assert next(summaries)["id"] == 5
+    # Summary 4 moves to the archive between pages
+    archive.archive_old_summaries(session_factory, older_than_days=15)
+    assert [s["id"] for s in summaries] == [4, 3, 2, 1]
+
+def test_export_formats(session_factory, monkeypatch):
+    monkeypatch.setattr(app, "SessionLocal", session_factory)
+    db = session_factory()
+    user = AuthenticatedUser(1, "a@example.com")
+
+    lines = [orjson.loads(line) for line in read_body(app.export_all_topic_streams(
+        format="ndjson", gzip=False, include_archived=True, include_reasoning=False, current_user=user, db=db)).splitlines()]
+    assert [(line["type"], line["id"]) for line in lines] == [
+        ("topic_stream", 1), ("summary", 5), ("summary", 4), ("summary", 3), ("summary", 2), ("summary", 1),
+        ("topic_stream", 2), ("summary", 6)]
+
+    response = app.export_topic_stream(2, format="csv", gzip=True, include_archived=True, include_reasoning=False, current_user=user, db=db)
+    assert response.headers["content-disposition"] == 'attachment; filename="trendpulse-stream-2.csv.gz"'
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(read_body(response)).decode())))
+    assert [(row["id"], row["topic_stream_query"], row["content"]) for row in rows] == [("6", "rockets", "launch, \"quoted\"\nnext line")]
+
+    markdown = read_body(app.export_topic_stream(1, format="md", gzip=False, include_archived=True, include_reasoning=False, current_user=user, db=db)).decode()
+    assert markdown.startswith("# fusion power\n\n## ") and "(archived)" in markdown and "- http://s/1\n" in markdown
+    db.close()
+
+def test_export_rejects_unknown_format_and_other_users_streams(session_factory):
+    db = session_factory()
+    user = AuthenticatedUser(1, "a@example.com")
+    with pytest.raises(HTTPException) as error:
+        app.export_topic_stream(1, format="xml", gzip=False, include_archived=True, include_reasoning=False, current_user=user, db=db)
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        app.export_topic_stream(3, format="csv", gzip=False, include_archived=True, include_reasoning=False, current_user=user, db=db)
+    assert error.value.status_code == 404
+    db.close()
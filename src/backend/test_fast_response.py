@@ -0,0 +1,47 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import msgpack
+import orjson
+from starlette.requests import Request
+
+from app import SummaryResponse, TopicStreamResponse
+from fast_response import fast_response, summary_row_to_dict
+from models import UpdateFrequency, DuplicatePolicy, InitialSummaryStatus
+
+def make_request(accept="application/json"):
+    return Request({"type": "http", "headers": [(b"accept", accept.encode())]})
+
+ROW = SimpleNamespace(
+    id=7, content="## Update", sources='["https://a.example"]', created_at=datetime(2025, 1, 2, 3, 4, 5, 678901),
+    model=None, prompt_tokens=1, completion_tokens=2, total_tokens=3, estimated_content_tokens=4, reasoning="hidden"
+)
+
+def test_summary_json_matches_response_model():
+    payload = summary_row_to_dict(ROW, has_reasoning=True, include_reasoning=False)
+    fast = json.loads(fast_response(make_request(), [payload]).body)
+    expected = json.loads(SummaryResponse(**payload).model_dump_json())
+    assert fast == [expected]
+    assert fast[0]["reasoning"] is None and fast[0]["model"] == ""
+
+def test_enums_serialize_to_values():
+    stream = {"id": 1, "query": "q", "update_frequency": UpdateFrequency.DAILY, "detail_level": "brief",
+              "model_type": "sonar", "recency_filter": "1d", "last_updated": datetime(2025, 1, 1),
+              "system_prompt": None, "temperature": 0.7, "context_history_level": "last_1",
+              "total_stored_est_tokens": 0, "auto_update_enabled": True, "duplicate_policy": DuplicatePolicy.COLLAPSE,
+              "initial_summary_status": InitialSummaryStatus.PENDING}
+    fast = orjson.loads(fast_response(make_request(), stream).body)
+    assert fast == json.loads(TopicStreamResponse(**dict(stream, update_frequency="daily", duplicate_policy="collapse", initial_summary_status="pending")).model_dump_json())
+
+def test_msgpack_negotiation():
+    response = fast_response(make_request("application/msgpack"), [summary_row_to_dict(ROW, False, True)])
+    assert response.media_type == "application/msgpack"
+    assert response.headers["vary"] == "Accept"
+    decoded = msgpack.unpackb(response.body)
+    assert decoded[0]["created_at"] == "2025-01-02T03:04:05.678901"
+    assert decoded[0]["reasoning"] == "hidden"
+
+def test_bad_sources_fall_back_to_empty_list():
+    row = SimpleNamespace(**dict(vars(ROW), sources="not json"))
+    assert summary_row_to_dict(row, False, False)["sources"] == []
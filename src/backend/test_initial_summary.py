@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import app
+from auth_cache import AuthenticatedUser
+from initial_summary import produce_initial_summary, pending_initial_summaries
+from models import TopicStream, InitialSummaryStatus
+from scheduler import TopicStreamScheduler
+
+@pytest.fixture
+def session_factory(session_factory):
+    db = session_factory()
+    db.add_all([TopicStream(id=1, user_id=1, query="fusion", initial_summary_status=InitialSummaryStatus.PENDING),
+                TopicStream(id=2, user_id=1, query="rockets", initial_summary_status=InitialSummaryStatus.RUNNING),
+                TopicStream(id=3, user_id=1, query="old")])
+    db.commit()
+    db.close()
+    return session_factory
+
+def status(factory, topic_stream_id):
+    db = factory()
+    try:
+        return db.get(TopicStream, topic_stream_id).initial_summary_status
+    finally:
+        db.close()
+
+class FakeSearch:
+    def __init__(self, fail=False):
+        self.calls, self.fail = [], fail
+
+    async def __call__(self, db, topic_stream, ignore_all_previous_summaries_override=False):
+        self.calls.append(topic_stream.id)
+        await asyncio.sleep(0.02)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return SimpleNamespace(id=100 + topic_stream.id)
+
+def test_only_one_path_fetches_the_first_summary(session_factory):
+    search = FakeSearch()
+
+    async def race():
+        return await asyncio.gather(*(produce_initial_summary(session_factory, search, 1, 1) for _ in range(3)))
+
+    results = asyncio.run(race())
+    assert sorted(result["status"] for result in results) == ["skipped", "skipped", "succeeded"]
+    assert search.calls == [1]
+    assert status(session_factory, 1) == InitialSummaryStatus.READY
+    # Streams that were never pending are left alone
+    assert asyncio.run(produce_initial_summary(session_factory, search, 1, 3))["status"] == "skipped"
+
+def test_failure_is_recorded(session_factory):
+    result = asyncio.run(produce_initial_summary(session_factory, FakeSearch(fail=True), 1, 1))
+    assert result == {"id": 1, "status": "failed", "error": "upstream down"}
+    assert status(session_factory, 1) == InitialSummaryStatus.FAILED
+
+def test_restart_releases_interrupted_claims(session_factory):
+    assert sorted(pending_initial_summaries(session_factory)) == [(1, 1), (2, 1)]
+    assert status(session_factory, 2) == InitialSummaryStatus.PENDING
+
+def test_create_returns_pending_and_fills_in_background(session_factory, monkeypatch):
+    search = FakeSearch()
+    monkeypatch.setattr(app, "SessionLocal", session_factory)
+    monkeypatch.setattr(app, "perform_search_and_create_summary", search)
+    db = session_factory()
+    payload = app.TopicStreamCreate(query="quantum", update_frequency="daily", detail_level="brief", model_type="sonar", recency_filter="1d")
+
+    async def create():
+        stream = await app.create_topic_stream(payload, current_user=AuthenticatedUser(1, "a@example.com"), db=db)
+        created = (stream.id, stream.initial_summary_status)
+        assert search.calls == []
+        await asyncio.gather(*app.background_tasks)
+        return created
+
+    topic_stream_id, initial_status = asyncio.run(create())
+    assert initial_status == InitialSummaryStatus.PENDING
+    assert search.calls == [topic_stream_id]
+    assert status(session_factory, topic_stream_id) == InitialSummaryStatus.READY
+    db.close()
+
+def test_scheduled_tick_goes_through_the_claim(session_factory):
+    search = FakeSearch()
+    scheduler = SimpleNamespace(db_session_factory=session_factory, update_function_coro=search, remove_topic_stream=lambda stream_id: None)
+    # Stream 2 is being fetched by another path: the tick leaves it alone
+    TopicStreamScheduler._scheduled_update_job(scheduler, 2)
+    assert search.calls == []
+    TopicStreamScheduler._scheduled_update_job(scheduler, 1)
+    TopicStreamScheduler._scheduled_update_job(scheduler, 1)
+    # First tick fetched the first summary via the claim, the second was a regular update
+    assert search.calls == [1, 1]
+    assert status(session_factory, 1) == InitialSummaryStatus.READY
+
+def test_resume_fetches_pending_streams_and_swallows_errors(session_factory):
+    search = FakeSearch(fail=True)
+    scheduler = SimpleNamespace(db_session_factory=session_factory, update_function_coro=search)
+    # Runs on its own thread at startup, so a failing upstream must not raise out of it
+    TopicStreamScheduler._resume_initial_summaries(scheduler)
+    assert sorted(search.calls) == [1, 2]
+    assert status(session_factory, 1) == InitialSummaryStatus.FAILED
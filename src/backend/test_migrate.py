@@ -0,0 +1,18 @@
+from sqlalchemy import create_engine, inspect, text
+
+import migrate
+from alembic.script import ScriptDirectory
+
+def test_fresh_database_is_created_and_stamped(tmp_path, monkeypatch):
+    monkeypatch.setattr(migrate, "ensure_archive_schema", lambda: None)
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+
+    migrate.run_migrations(engine)
+
+    assert {"users", "topic_streams", "summaries", "deep_dive_messages"} <= set(inspect(engine).get_table_names())
+    head = ScriptDirectory.from_config(migrate.alembic_config()).get_current_head()
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT version_num FROM alembic_version")).scalar() == head
+
+    # A second run is a no-op upgrade
+    migrate.run_migrations(engine)
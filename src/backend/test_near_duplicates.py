@@ -0,0 +1,69 @@
+import pytest
+from datetime import datetime, timedelta
+
+from models import TopicStream, Summary, ChangeLog
+from near_duplicates import find_near_duplicate, collapse_into
+from context_history import build_history_context
+from utils.simhash import simhash, hamming_distance
+
+TEXT = " ".join(f"Paragraph {i} covers the latest funding round, the regulatory response and market reaction." for i in range(40))
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    session.add_all([TopicStream(id=1, user_id=1, query="a"), TopicStream(id=2, user_id=1, query="b")])
+    session.commit()
+    yield session
+    session.close()
+
+def add(db, summary_id, content, hours, topic_stream_id=1, **values):
+    db.add(Summary(id=summary_id, topic_stream_id=topic_stream_id, content=content, sources="[]", fingerprint=simhash(content),
+                   created_at=datetime(2025, 1, 1) + timedelta(hours=hours), estimated_content_tokens=10, **values))
+    db.commit()
+
+def test_simhash_is_close_for_small_edits_and_far_for_different_text():
+    edited = TEXT.replace("Paragraph 7 covers", "Paragraph 7 now covers")
+    assert simhash(TEXT) == simhash(TEXT.upper())
+    assert hamming_distance(simhash(TEXT), simhash(edited)) <= 6
+    assert hamming_distance(simhash(TEXT), simhash("A completely unrelated note about weather in the mountains this week.")) > 6
+    assert simhash("  ...  ") is None
+    # Stored in a signed 64-bit SQLite INTEGER
+    assert all(-2 ** 63 <= simhash(f"text {i} sample words") < 2 ** 63 for i in range(50))
+
+def test_recent_window_and_exact_repeats(db):
+    add(db, 1, TEXT, 0)
+    for i in range(2, 8):
+        add(db, i, f"Unrelated update number {i} about something else entirely, with its own wording.", i)
+    add(db, 8, TEXT, 0, topic_stream_id=2)
+
+    near = TEXT.replace("market reaction", "market response", 1)
+    # Summary 1 has fallen out of the 5-summary window and only an exact repeat reaches it
+    assert find_near_duplicate(db, 1, simhash(near), window=5) is None
+    assert find_near_duplicate(db, 1, simhash(near), window=10) == 1
+    assert find_near_duplicate(db, 1, simhash(TEXT), window=5) == 1
+    assert find_near_duplicate(db, 2, simhash("Unrelated update number 3 about something else entirely, with its own wording.")) is None
+
+def test_collapse_overwrites_the_original(db):
+    add(db, 1, TEXT, 0)
+    newer = TEXT + " One more sentence."
+    created_at = datetime(2025, 2, 1)
+    summary = collapse_into(db, 1, dict(topic_stream_id=1, content=newer, sources='["https://example.com/new"]',
+                                        created_at=created_at, fingerprint=simhash(newer)))
+    assert summary.content == newer and summary.created_at == created_at
+    assert db.query(Summary).count() == 1
+    assert db.get(TopicStream, 1).last_updated == created_at
+    assert db.query(ChangeLog.entity, ChangeLog.entity_id, ChangeLog.op).all() == [("summary", 1, "upsert")]
+
+def test_flagged_duplicates_are_left_out_of_history(db):
+    add(db, 1, "original", 0)
+    add(db, 2, "original again", 1, duplicate_of_id=1)
+    history = build_history_context(db, 1, max_summaries=5, token_budget=1000)
+    assert history.summaries_fetched == 1 and history.text == "original"
+
+def test_collapse_only_matches_the_recent_window(db):
+    add(db, 1, TEXT, 0)
+    for i in range(2, 8):
+        add(db, i, f"Unrelated update number {i} about something else entirely, with its own wording.", i)
+    # An exact repeat of an old summary is not a match when the match would be rewritten
+    assert find_near_duplicate(db, 1, simhash(TEXT), window=5, exact_repeats=False) is None
+    assert find_near_duplicate(db, 1, simhash(TEXT), window=10, exact_repeats=False) == 1
@@ -0,0 +1,51 @@
+import time
+import asyncio
+import pytest
+from passlib.context import CryptContext
+
+import password_hashing
+from models import User
+from password_hashing import PasswordHasher, HashingPoolFull, rehash_user_password
+
+FAST_CONTEXT = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+
+class SlowContext:
+    def hash(self, password):
+        time.sleep(0.2)
+        return password
+
+def test_verify_reports_outdated_hashes():
+    hasher = PasswordHasher(context=CryptContext(schemes=["bcrypt"], bcrypt__rounds=5))
+    old_hash = FAST_CONTEXT.hash("secret")
+
+    assert asyncio.run(hasher.verify("secret", old_hash)) == (True, True)
+    assert asyncio.run(hasher.verify("wrong", old_hash)) == (False, False)
+    hasher.shutdown()
+
+def test_full_queue_is_rejected():
+    hasher = PasswordHasher(workers=1, max_queue=1, context=SlowContext())
+
+    async def burst():
+        return await asyncio.gather(*[hasher.hash("pw") for _ in range(3)], return_exceptions=True)
+
+    results = asyncio.run(burst())
+    hasher.shutdown()
+    assert results.count("pw") == 2
+    assert sum(isinstance(result, HashingPoolFull) for result in results) == 1
+    assert hasher.stats()["rejected"] == 1
+    assert hasher.stats()["pending"] == 0
+
+def test_rehash_skips_changed_passwords(session_factory, monkeypatch):
+    monkeypatch.setattr(password_hashing, "password_hasher", PasswordHasher(context=FAST_CONTEXT))
+    db = session_factory()
+    db.get(User, 1).hashed_password = "old"
+    db.get(User, 2).hashed_password = "changed"
+    db.commit()
+
+    rehash_user_password(session_factory, 1, "secret", "old")
+    rehash_user_password(session_factory, 2, "secret", "old")
+
+    db.expire_all()
+    assert FAST_CONTEXT.verify("secret", db.get(User, 1).hashed_password)
+    assert db.get(User, 2).hashed_password == "changed"
+    db.close()
@@ -0,0 +1,17 @@
+from utils.reasoning_utils import split_reasoning
+
+def test_no_reasoning():
+    """Plain answers pass through with no reasoning part"""
+    assert split_reasoning("## Update\n\nNothing to hide.") == ("## Update\n\nNothing to hide.", None)
+    assert split_reasoning(None) == ("", None)
+
+def test_think_block_is_split_out():
+    answer, reasoning = split_reasoning("<think>\nweighing sources\n</think>\n\n## Update\n\nThe answer.")
+    assert answer == "## Update\n\nThe answer."
+    assert reasoning == "weighing sources"
+
+def test_multiple_and_unclosed_blocks():
+    """Several blocks are joined; a block cut off by max_tokens still counts as reasoning"""
+    answer, reasoning = split_reasoning("<THINK>first</THINK>Answer part.<think>second, never closed")
+    assert answer == "Answer part."
+    assert reasoning == "first\n\nsecond, never closed"
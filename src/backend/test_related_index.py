@@ -0,0 +1,68 @@
+import orjson
+import pytest
+from starlette.requests import Request
+
+import app
+from auth_cache import AuthenticatedUser
+from models import TopicStream, Summary
+from related_index import RelatedIndex, vectorize
+
+QUANTUM = "IBM unveiled a quantum computing processor with more qubits and lower error rates."
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    db.add_all([TopicStream(id=1, user_id=1, query="chips"), TopicStream(id=2, user_id=1, query="physics"), TopicStream(id=3, user_id=2, query="other")])
+    db.add_all([
+        Summary(id=1, topic_stream_id=1, content=QUANTUM, sources="[]"),
+        Summary(id=2, topic_stream_id=2, content="Google reports quantum computing error correction progress with new qubits.", sources="[]"),
+        Summary(id=3, topic_stream_id=1, content="Football transfer window closes with record spending by clubs.", sources="[]"),
+        Summary(id=4, topic_stream_id=3, content=QUANTUM, sources="[]"),
+    ])
+    db.commit()
+    db.close()
+    return session_factory
+
+def test_similar_text_scores_higher():
+    query = vectorize(QUANTUM)
+    assert abs(float(query @ query) - 1.0) < 1e-5
+    assert query @ vectorize("Quantum computing qubits error rates improve") > query @ vectorize("Football clubs spend record sums")
+
+def test_rebuild_query_scoping_and_updates(factory, tmp_path):
+    index = RelatedIndex(str(tmp_path / "related.idx"), dim=512)
+    assert not index.is_usable()
+    assert index.rebuild(factory) == 4
+
+    hits = index.top_k(index.vector_for(1), topic_stream_ids=[1, 2], k=5, exclude_ids=[1])
+    # Other users' streams are never candidates
+    assert [summary_id for summary_id, _ in hits] == [2, 3]
+
+    # Re-indexing an id supersedes its old record
+    index.add([(3, 1, QUANTUM)])
+    assert len(index) == 5
+    assert [summary_id for summary_id, _ in index.top_k(vectorize(QUANTUM, 512), [1], k=5)][:2] in ([1, 3], [3, 1])
+    # Drops 3 (both records) and 4 once they are deleted
+    db = factory()
+    db.query(Summary).filter(Summary.id.in_([3, 4])).delete()
+    db.commit()
+    db.close()
+    assert index.compact(factory) == 3
+    assert len(index) == 2 and index.vector_for(3) is None
+
+def test_related_endpoint_drops_deleted_summaries(factory, tmp_path, monkeypatch):
+    index = RelatedIndex(str(tmp_path / "related.idx"), dim=512)
+    index.rebuild(factory)
+    monkeypatch.setattr(app, "related_index", index)
+    db = factory()
+    user = AuthenticatedUser(1, "a@example.com")
+    request = Request({"type": "http", "headers": []})
+
+    body = orjson.loads(app.get_related_summaries(request, 1, limit=5, current_user=user, db=db).body)
+    # 3 is unrelated and 4 belongs to someone else
+    assert body["summary_id"] == 1
+    assert [(result["summary_id"], result["topic_stream_query"]) for result in body["results"]] == [(2, "physics")]
+
+    # Deleted since the index was built: filtered out before compaction gets to it
+    db.query(Summary).filter(Summary.id == 2).delete()
+    db.commit()
+    assert orjson.loads(app.get_related_summaries(request, 1, limit=5, current_user=user, db=db).body)["results"] == []
@@ -0,0 +1,88 @@
+import sqlite3
+
+import pytest
+
+from models import TopicStream, Summary
+from utils.compression import compress_text
+from search import ensure_search_schema, sync_search_index, search_summaries, parse_search_query, make_snippet, decode_cursor
+
+@pytest.fixture
+def db(db_engine, session_factory):
+    session = session_factory()
+    session.add_all([TopicStream(id=1, user_id=1, query="a"), TopicStream(id=2, user_id=1, query="b"), TopicStream(id=3, user_id=2, query="c")])
+    session.add(Summary(id=1, topic_stream_id=1, content="Existing summary about fusion reactors", sources="[]"))
+    session.commit()
+    # Rows written before the index exists get backfilled
+    ensure_search_schema(db_engine)
+    yield session
+    session.close()
+
+def add(db, summary_id, topic_stream_id, content):
+    db.add(Summary(id=summary_id, topic_stream_id=topic_stream_id, content=content, sources="[]"))
+    db.commit()
+    sync_search_index(db.get_bind())
+
+def ids(page):
+    return [result["summary_id"] for result in page["results"]]
+
+def test_compressed_content_is_indexed_and_scoped_per_user(db):
+    add(db, 2, 2, "Fusion startup raises funding. " + "Plasma physics details. " * 100)
+    add(db, 3, 3, "Another user's fusion news")
+
+    assert sorted(ids(search_summaries(db, 1, "fusion"))) == [1, 2]
+    assert ids(search_summaries(db, 1, "fusion", topic_stream_id=2)) == [2]
+    assert ids(search_summaries(db, 2, "fusion")) == [3]
+    assert ids(search_summaries(db, 1, "plasma")) == [2]
+
+def test_updates_and_deletes_keep_the_index_in_sync(db):
+    summary = db.get(Summary, 1)
+    summary.content = "Rewritten around tokamaks"
+    db.commit()
+    sync_search_index(db.get_bind())
+    assert ids(search_summaries(db, 1, "fusion")) == []
+    assert ids(search_summaries(db, 1, "tokamak*")) == [1]
+
+    db.delete(summary)
+    db.commit()
+    sync_search_index(db.get_bind())
+    assert ids(search_summaries(db, 1, "tokamaks")) == []
+
+def test_plain_connections_can_write_summaries(db, db_engine):
+    # No tp_decompress on this connection: the triggers only queue the changes
+    connection = sqlite3.connect(db_engine.url.database)
+    compressed = compress_text("Stellarator results " * 100, threshold=0)
+    connection.execute("INSERT INTO summaries (id, topic_stream_id, content, sources, created_at) VALUES (2, 1, ?, '[]', '2025-01-01')", (compressed,))
+    connection.execute("UPDATE summaries SET content = 'Stellarator and tokamak results' WHERE id = 2")
+    connection.execute("UPDATE summaries SET content = 'Fusion moved on' WHERE id = 1")
+    connection.execute("DELETE FROM summaries WHERE id = 1")
+    connection.commit()
+    connection.close()
+    assert ids(search_summaries(db, 1, "stellarator")) == []
+
+    assert sync_search_index(db.get_bind(), batch_size=1) == 2
+    assert ids(search_summaries(db, 1, "fusion")) == []
+    assert ids(search_summaries(db, 1, "stellarator tokamak")) == [2]
+
+def test_keyset_pages_cover_every_match_once(db):
+    for i in range(2, 9):
+        add(db, i, 1 + i % 2, "fusion " * i + "filler text")
+
+    seen, after = [], None
+    while True:
+        page = search_summaries(db, 1, "fusion", limit=3, after=after)
+        seen.extend(ids(page))
+        if not page["next_cursor"]:
+            break
+        after = decode_cursor(page["next_cursor"])
+    assert sorted(seen) == list(range(1, 9))
+    assert len(seen) == len(set(seen))
+
+def test_user_input_never_reaches_fts5_syntax():
+    assert parse_search_query('fusion NEAR( "tokamak reactor" plas*') == ('"fusion" AND "NEAR" AND "tokamak reactor" AND "plas"*', ["fusion", "NEAR", "tokamak", "reactor", "plas"])
+    assert parse_search_query('" * ( ') == ("", [])
+
+def test_snippet_highlights_matches_in_the_window():
+    content = "intro " * 100 + "the Fusion reactor " + "outro " * 100
+    snippet, highlights = make_snippet(content, ["fusion"], max_chars=80)
+    assert snippet.startswith("…") and snippet.endswith("…")
+    assert [snippet[start:end] for start, end in highlights] == ["Fusion"]
@@ -0,0 +1,22 @@
+from utils import tokenizer_utils
+from utils.tokenizer_utils import token_bounds, fits_token_budget
+
+def test_bounds_come_from_words_and_bytes():
+    assert token_bounds("hello world " * 50) == (100, 600)
+    # Multi-byte characters count once per byte; only ASCII whitespace separates words
+    assert token_bounds("Résumé naïve café") == (3, 21)
+    assert token_bounds("100\u00a0km") == (1, 7)
+    assert token_bounds("") == (0, 0)
+
+def test_fits_token_budget_only_encodes_between_the_bounds(monkeypatch):
+    calls = []
+    text = "hello world " * 50
+    monkeypatch.setattr(tokenizer_utils, "count_tokens", lambda text: calls.append(text) or 120)
+
+    assert fits_token_budget(text, 600)
+    assert not fits_token_budget(text, 99)
+    assert calls == []
+
+    assert fits_token_budget(text, 120)
+    assert not fits_token_budget(text, 119)
+    assert len(calls) == 2
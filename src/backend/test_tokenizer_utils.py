@@ -0,0 +1,38 @@
+import pytest
+from utils import tokenizer_utils
+from utils.tokenizer_utils import truncate_text_by_tokens
+
+@pytest.fixture
+def encoded(monkeypatch):
+    """Count one token per word and record every text that gets encoded."""
+    calls = []
+    def fake_count_tokens(text):
+        calls.append(text)
+        return len(text.split())
+    monkeypatch.setattr(tokenizer_utils, "count_tokens", fake_count_tokens)
+    monkeypatch.setattr(tokenizer_utils, "_token_count_cache", type(tokenizer_utils._token_count_cache)())
+    return calls
+
+TEXT = "One two three. Four five six.\n\nSeven eight nine. Ten eleven twelve.\n\nThirteen fourteen."
+
+def test_text_within_budget_is_unchanged(encoded):
+    assert truncate_text_by_tokens(TEXT, 100) == TEXT
+
+def test_cuts_on_paragraph_boundary(encoded):
+    assert truncate_text_by_tokens(TEXT, 12) == "One two three. Four five six.\n\nSeven eight nine. Ten eleven twelve...."
+
+def test_cuts_on_sentence_boundary(encoded):
+    assert truncate_text_by_tokens(TEXT, 9) == "One two three. Four five six.\n\nSeven eight nine...."
+
+def test_cuts_long_sentence_on_word_boundary(encoded):
+    assert truncate_text_by_tokens("alpha beta gamma delta epsilon", 3) == "alpha beta gamma..."
+
+def test_never_splits_multibyte_characters(encoded):
+    result = truncate_text_by_tokens("naïve café " * 50, 7)
+    assert result.encode("utf-8").decode("utf-8") == result
+    assert result.startswith("naïve café naïve") and result.endswith("...")
+
+def test_work_is_bounded_by_budget(encoded):
+    huge = "word " * 200_000
+    truncate_text_by_tokens(huge + "\n\n" + huge, 10)
+    assert max(len(text) for text in encoded) <= 10 * tokenizer_utils.TRUNCATION_MAX_CHARS_PER_TOKEN
@@ -0,0 +1,113 @@
+from datetime import datetime, timezone
+
+import orjson
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+import app
+import trends
+from auth_cache import AuthenticatedUser
+from models import TopicStream, Summary
+from trends import TrendCounters, extract_terms, DAY
+
+NOW = 1_800_000_000.0
+
+def make_counters():
+    counters = TrendCounters(min_users=2)
+    # A month of steady background chatter about rates from several users
+    for day in range(30):
+        for user_id in (1, 2, 3):
+            counters.add("Central banks discussed interest rates again.", user_id, at=NOW - (30 - day) * DAY)
+    return counters
+
+def test_extract_terms_entities_and_words():
+    features = extract_terms("The Federal Reserve and Bank of England met. NVIDIA shares rose [1] https://example.com/x")
+    assert features["e:federal reserve"] == ("entity", "Federal Reserve")
+    assert features["e:bank of england"] == ("entity", "Bank of England")
+    assert features["e:nvidia"] == ("entity", "NVIDIA")
+    assert "t:shares" in features and "t:the" not in features
+    assert not any("example" in key for key in features)
+
+def test_rising_term_beats_steady_background():
+    counters = make_counters()
+    for hour in range(6):
+        counters.add("NVIDIA unveiled a new Blackwell chip.", 1 + hour % 2, at=NOW - hour * 3600)
+    top = counters.top_rising("day", limit=5, now=NOW)
+    assert top and top[0]["term"] in ("NVIDIA", "nvidia", "blackwell", "chip", "unveiled")
+    assert all(item["term"] not in ("rates", "interest") for item in top)
+    assert {item["kind"] for item in counters.top_rising("day", kind="entity", now=NOW)} == {"entity"}
+
+def test_terms_from_a_single_user_are_never_listed(session_factory, monkeypatch):
+    db = session_factory()
+    db.add_all([TopicStream(id=i, user_id=1, query=f"stream {i}") for i in range(1, 4)] + [TopicStream(id=4, user_id=2, query="other")])
+    db.commit()
+    db.close()
+
+    counters = make_counters()
+    counters.ready = True
+    monkeypatch.setattr(trends, "trend_counters", counters)
+    summary = lambda topic_stream_id, hour: {"id": hour, "topic_stream_id": topic_stream_id, "content": "Project Zanzibar internal roadmap.",
+                                             "created_at": datetime.fromtimestamp(NOW - hour * 3600, timezone.utc).replace(tzinfo=None)}
+    # One user following the topic in three streams is still one user
+    trends.count_new_summaries([summary(1 + hour % 3, hour) for hour in range(6)], session_factory)
+    assert not any("zanzibar" in item["term"].lower() for item in counters.top_rising("day", limit=50, now=NOW))
+    trends.count_new_summaries([summary(4, 0)], session_factory)
+    assert any("zanzibar" in item["term"].lower() for item in counters.top_rising("day", limit=50, now=NOW))
+
+def test_summaries_written_during_startup_are_counted_once(session_factory, monkeypatch, tmp_path):
+    db = session_factory()
+    db.add(TopicStream(id=1, user_id=1, query="chips"))
+    db.add_all([Summary(id=i, topic_stream_id=1, content="Nvidia unveiled a new chip.") for i in (1, 2)])
+    db.commit()
+    db.close()
+    monkeypatch.setattr(trends, "trend_counters", TrendCounters(min_users=1))
+    monkeypatch.setattr(trends, "_held_summaries", [])
+    flushed = lambda summary_id: {"id": summary_id, "topic_stream_id": 1, "content": "Nvidia unveiled a new chip.",
+                                  "created_at": datetime.utcnow()}
+    path = str(tmp_path / "trends.npz")
+
+    # Summary 2 is in the table the bootstrap reads, summary 3 was committed after it
+    trends.count_new_summaries([flushed(2), flushed(3)], session_factory)
+    assert trends.trend_counters.summaries_counted == 0
+    trends.load_or_bootstrap_trends(session_factory, path)
+    assert trends.trend_counters.summaries_counted == 3
+
+    # After a restart the snapshot load would replace anything counted before it
+    monkeypatch.setattr(trends, "trend_counters", TrendCounters(min_users=1))
+    trends.count_new_summaries([flushed(4)], session_factory)
+    trends.load_or_bootstrap_trends(session_factory, path)
+    assert trends.trend_counters.summaries_counted == 4
+    trends.count_new_summaries([flushed(5)], session_factory)
+    assert trends.trend_counters.summaries_counted == 5 and trends._held_summaries == []
+
+def test_snapshot_round_trip_and_prune(tmp_path):
+    counters = make_counters()
+    counters.add("Nvidia unveiled a new chip.", 1, at=NOW)
+    counters.add("Nvidia unveiled a new chip.", 2, at=NOW)
+    path = str(tmp_path / "trends.npz")
+    counters.save(path)
+    restored = TrendCounters(min_users=2)
+    assert restored.load(path)
+    assert restored.top_rising("day", now=NOW) == counters.top_rising("day", now=NOW)
+    assert restored.stats() == counters.stats()
+    # Different settings: the snapshot is ignored
+    assert not TrendCounters(min_users=5).load(path)
+
+    small = TrendCounters(max_terms=4, min_users=1)
+    small.add("alpha beta gamma delta epsilon", 1, at=NOW)
+    assert len(small) == 2
+
+def test_trends_endpoint_validates_window_and_kind(monkeypatch):
+    counters = make_counters()
+    monkeypatch.setattr(app, "trend_counters", counters)
+    user = AuthenticatedUser(1, "a@example.com")
+    request = Request({"type": "http", "headers": []})
+    body = orjson.loads(app.get_trends(request, window="week", limit=500, kind=None, current_user=user).body)
+    assert body["window"] == "week" and isinstance(body["terms"], list)
+    with pytest.raises(HTTPException) as error:
+        app.get_trends(request, window="year", limit=10, kind=None, current_user=user)
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException) as error:
+        app.get_trends(request, window="day", limit=10, kind="topic", current_user=user)
+    assert error.value.status_code == 400
@@ -0,0 +1,42 @@
+import json
+import pytest
+
+import update_summary_tokens
+from models import TopicStream, Summary
+
+@pytest.fixture
+def session_factory(session_factory):
+    db = session_factory()
+    db.add(TopicStream(id=1, user_id=1, query="topic"))
+    db.add_all([Summary(id=i, topic_stream_id=1, content="token " * (i * 10)) for i in range(1, 11)])
+    db.add(Summary(id=11, topic_stream_id=1, content="already counted", estimated_content_tokens=999))
+    db.commit()
+    db.close()
+    return session_factory
+
+def token_counts(factory):
+    db = factory()
+    counts = {s.id: s.estimated_content_tokens for s in db.query(Summary).all()}
+    db.close()
+    return counts
+
+def test_backfill_in_chunks(session_factory, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    updated = update_summary_tokens.update_existing_summary_tokens(session_factory, chunk_size=3, checkpoint_path=str(checkpoint))
+
+    assert updated == 10
+    counts = token_counts(session_factory)
+    assert all(counts[i] > 0 for i in range(1, 11))
+    assert counts[11] == 999
+    assert not checkpoint.exists()
+
+def test_resume_from_checkpoint(session_factory, tmp_path):
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_text(json.dumps({"last_id": 6, "processed": 6}))
+
+    updated = update_summary_tokens.update_existing_summary_tokens(session_factory, chunk_size=3, checkpoint_path=str(checkpoint))
+
+    assert updated == 4
+    counts = token_counts(session_factory)
+    assert all(counts[i] is None for i in range(1, 7))
+    assert all(counts[i] > 0 for i in range(7, 11))
@@ -0,0 +1,73 @@
+import pytest
+import asyncio
+from datetime import datetime, timedelta
+from sqlalchemy import event
+
+from models import TopicStream, Summary
+from write_coalescer import SummaryWriteCoalescer
+
+@pytest.fixture
+def factory(session_factory):
+    db = session_factory()
+    db.add_all([TopicStream(id=1, user_id=1, query="a"), TopicStream(id=2, user_id=1, query="b")])
+    db.commit()
+    db.close()
+    return session_factory
+
+def test_concurrent_writes_share_one_commit(db_engine, factory):
+    commits = []
+    event.listen(db_engine, "commit", lambda conn: commits.append(1))
+
+    coalescer = SummaryWriteCoalescer(factory, window_ms=200, max_batch=10)
+    base_time = datetime(2025, 1, 1)
+
+    async def write_all():
+        return await asyncio.gather(*[
+            coalescer.write_summary({
+                "topic_stream_id": 1 + (i % 2),
+                "content": f"summary {i}",
+                "sources": "[]",
+                "created_at": base_time + timedelta(minutes=i),
+            })
+            for i in range(6)
+        ])
+
+    ids = asyncio.run(write_all())
+    coalescer.shutdown()
+
+    assert len(commits) == 1
+    assert len(set(ids)) == 6
+
+    db = factory()
+    contents = {s.id: s.content for s in db.query(Summary).all()}
+    assert [contents[new_id] for new_id in ids] == [f"summary {i}" for i in range(6)]
+    last_updated = {s.id: s.last_updated for s in db.query(TopicStream).all()}
+    assert last_updated[1] == base_time + timedelta(minutes=4)
+    assert last_updated[2] == base_time + timedelta(minutes=5)
+    db.close()
+
+def test_failed_flush_propagates_to_callers(factory):
+    coalescer = SummaryWriteCoalescer(factory, window_ms=10)
+    future = coalescer.submit({"topic_stream_id": 1, "content": None, "created_at": datetime.utcnow()})
+    with pytest.raises(Exception, match="NOT NULL"):
+        future.result(timeout=5)
+    coalescer.shutdown()
+
+def test_bad_row_fails_only_its_own_caller(factory):
+    coalescer = SummaryWriteCoalescer(factory, window_ms=200, max_batch=10)
+    flushed = []
+    coalescer.add_listener(flushed.extend)
+    now = datetime.utcnow()
+    futures = [
+        coalescer.submit({"topic_stream_id": 1 + (i % 2), "content": None if i == 3 else f"summary {i}", "sources": "[]", "created_at": now})
+        for i in range(6)
+    ]
+    with pytest.raises(Exception, match="NOT NULL"):
+        futures[3].result(timeout=5)
+    ids = [future.result(timeout=5) for i, future in enumerate(futures) if i != 3]
+    coalescer.shutdown()
+
+    assert sorted(row["id"] for row in flushed) == sorted(ids)
+    db = factory()
+    assert sorted(s.content for s in db.query(Summary).all()) == [f"summary {i}" for i in range(6) if i != 3]
+    db.close()
@@ -0,0 +1,322 @@
+import os
+import re
+import time
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from database import SessionLocal
+from models import Summary, TopicStream
+from related_index import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# Trending terms across every stream's summaries. Each summary adds 1 to the counters of the distinct
+# terms and entities it mentions. Counters are exponentially time-decayed, one per window time
+# constant, so "recent mentions" needs no buckets and no rescans. A term is rising when its short-window
+# rate is well above its longer-window baseline. Counters live in numpy arrays indexed through a
+# vocabulary dict and are snapshotted to TRENDS_SNAPSHOT_PATH, so a restart picks up where it left off.
+TRENDS_SNAPSHOT_PATH = os.getenv("TRENDS_SNAPSHOT_PATH", "./trendpulse_trends.npz")
+TRENDS_SNAPSHOT_MINUTES = int(os.getenv("TRENDS_SNAPSHOT_MINUTES", "10"))
+# Vocabulary cap; past it, the half with the least 30-day weight is dropped
+TRENDS_MAX_TERMS = int(os.getenv("TRENDS_MAX_TERMS", "200000"))
+# A term is only reported once it was mentioned in the streams of this many different users, so one
+# user's private topic never shows up in everyone's trends, however many streams they follow it in
+TRENDS_MIN_USERS = int(os.getenv("TRENDS_MIN_USERS", "3"))
+# Minimum decayed mention count in the short window
+TRENDS_MIN_COUNT = float(os.getenv("TRENDS_MIN_COUNT", "2"))
+# Without a snapshot, seed the counters from this many days of summaries (once)
+TRENDS_BOOTSTRAP_DAYS = int(os.getenv("TRENDS_BOOTSTRAP_DAYS", "30"))
+
+DAY = 86400.0
+# Decay time constants (seconds); a window compares one counter against the next, longer one
+DECAY_SECONDS = (1 * DAY, 7 * DAY, 30 * DAY)
+WINDOWS = {"day": 0, "week": 1}
+TERM, ENTITY = "term", "entity"
+
+_URL = re.compile(r"https?://\S+|\[\d+\]")
+_WORD = re.compile(r"[^\W\d_][\w'-]*[^\W_]|[^\W\d_]{2}", re.UNICODE)
+# Runs of two to four Capitalised words on one line ("Federal Reserve", "Bank of England") or an acronym ("NVIDIA", "AI")
+_ENTITY = re.compile(r"\b(?:[A-Z][a-z][\w&'-]*(?: +(?:of +|de +|the +)?[A-Z][\w&'-]+){1,3}|[A-Z][A-Z0-9-]{0,9}[A-Z0-9])\b")
+# Words every summary uses; they never trend but would fill the vocabulary
+TREND_STOPWORDS = STOPWORDS | frozenset("""
+information update updates latest recent recently report reports reported according said says including however
+although today yesterday week weeks month months year years based several many much well like within without
+provide provides provided previous following summary key developments development news source sources
+""".split())
+
+
+def extract_terms(text: str) -> Dict[str, Tuple[str, str]]:
+    """Distinct terms in `text` as {key: (kind, display form)}: lowercased words plus capitalised entities."""
+    text = _URL.sub(" ", text)
+    features: Dict[str, Tuple[str, str]] = {}
+    for match in _ENTITY.finditer(text):
+        words = match.group(0).split()
+        # "The Federal Reserve", "Today Nvidia": sentence-initial capitals aren't part of the name
+        while words and words[0].lower() in TREND_STOPWORDS:
+            words.pop(0)
+        if not words or all(word.lower() in TREND_STOPWORDS for word in words):
+            continue
+        entity = " ".join(words)
+        features.setdefault(f"e:{entity.lower()}", (ENTITY, entity))
+    for word in _WORD.findall(text.lower()):
+        if len(word) > 2 and word not in TREND_STOPWORDS:
+            features.setdefault(f"t:{word}", (TERM, word))
+    return features
+
+
+class TrendCounters:
+    """
+    Forward-decayed counters: a mention at time t adds exp((t - t0) / tau) and a read at `now`
+    multiplies by exp(-(now - t0) / tau). An insert touches only the mentioned terms' cells; t0 is
+    moved forward (rescaling every cell once) before the factors get large.
+    """
+
+    def __init__(self, decay_seconds: Tuple[float, ...] = DECAY_SECONDS, max_terms: int = TRENDS_MAX_TERMS,
+                 min_users: int = TRENDS_MIN_USERS):
+        self.decay = np.asarray(decay_seconds, dtype=np.float64)
+        self.max_terms = max_terms
+        self.min_users = max(1, min_users)
+        self._lock = threading.Lock()
+        self.t0 = time.time()
+        self.keys: List[str] = []
+        self.display: List[str] = []
+        self.vocabulary: Dict[str, int] = {}
+        self.counts = np.zeros((len(self.decay), 1024), dtype=np.float64)
+        self.is_entity = np.zeros(1024, dtype=bool)
+        # First `min_users` distinct user ids (stream owners) seen per term (-1 = free slot)
+        self.users = np.full((1024, self.min_users), -1, dtype=np.int64)
+        self.summaries_counted = 0
+        # Set once the snapshot is loaded (or the counters seeded); nothing is saved before that
+        self.ready = False
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _grow(self):
+        self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)], axis=1)
+        self.is_entity = np.concatenate([self.is_entity, np.zeros_like(self.is_entity)])
+        self.users = np.concatenate([self.users, np.full_like(self.users, -1)])
+
+    def _index(self, key: str, kind: str, display: str) -> int:
+        index = self.vocabulary.get(key)
+        if index is None:
+            index = len(self.keys)
+            if index == self.counts.shape[1]:
+                self._grow()
+            self.vocabulary[key] = index
+            self.keys.append(key)
+            self.display.append(display)
+            self.is_entity[index] = kind == ENTITY
+        return index
+
+    def _rebase(self, now: float):
+        self.counts *= np.exp(-(now - self.t0) / self.decay)[:, None]
+        self.t0 = now
+
+    def add(self, text: str, user_id: int, at: Optional[float] = None):
+        """Count one summary's distinct terms at unix time `at` (default now). `user_id` owns its stream."""
+        features = extract_terms(text)
+        if not features:
+            return
+        at = time.time() if at is None else at
+        with self._lock:
+            if (at - self.t0) / self.decay.min() > 30:
+                self._rebase(at)
+            indexes = np.fromiter((self._index(key, kind, display) for key, (kind, display) in features.items()),
+                                  dtype=np.int64, count=len(features))
+            self.counts[:, indexes] += np.exp((at - self.t0) / self.decay)[:, None]
+            for index in indexes:
+                slots = self.users[index]
+                if user_id not in slots:
+                    free = np.flatnonzero(slots == -1)
+                    if len(free):
+                        slots[free[0]] = user_id
+            self.summaries_counted += 1
+            if len(self.keys) > self.max_terms:
+                self._prune()
+
+    def _prune(self):
+        """Keep the half of the vocabulary with the most long-window weight."""
+        size = len(self.keys)
+        keep = np.sort(np.argsort(-self.counts[-1, :size], kind="stable")[: self.max_terms // 2])
+        self.counts = np.ascontiguousarray(self.counts[:, keep])
+        self.is_entity = self.is_entity[keep]
+        self.users = np.ascontiguousarray(self.users[keep])
+        self.keys = [self.keys[i] for i in keep]
+        self.display = [self.display[i] for i in keep]
+        self.vocabulary = {key: i for i, key in enumerate(self.keys)}
+        logger.info(f"[Trends] Pruned vocabulary from {size} to {len(self.keys)} terms.")
+
+    def top_rising(self, window: str = "day", limit: int = 20, kind: Optional[str] = None,
+                   now: Optional[float] = None, min_count: float = TRENDS_MIN_COUNT) -> List[Dict[str, Any]]:
+        """
+        Terms whose mention rate over the window's decay constant most exceeds their rate over the next
+        longer one, scored like a Poisson z-score: (rate - baseline) / sqrt(baseline + 1), rates per day.
+        """
+        row = WINDOWS[window]
+        now = time.time() if now is None else now
+        with self._lock:
+            size = len(self.keys)
+            if not size:
+                return []
+            decay = np.exp(-(now - self.t0) / self.decay[row:row + 2])
+            recent = self.counts[row, :size] * decay[0]
+            baseline = self.counts[row + 1, :size] * decay[1]
+            rate = recent / (self.decay[row] / DAY)
+            baseline_rate = baseline / (self.decay[row + 1] / DAY)
+            score = (rate - baseline_rate) / np.sqrt(baseline_rate + 1.0)
+            eligible = (recent >= min_count) & (score > 0) & ((self.users[:size] != -1).sum(axis=1) >= self.min_users)
+            if kind is not None:
+                eligible &= self.is_entity[:size] == (kind == ENTITY)
+            candidates = np.flatnonzero(eligible)
+            if len(candidates) > limit:
+                candidates = candidates[np.argpartition(-score[candidates], limit - 1)[:limit]]
+            candidates = candidates[np.argsort(-score[candidates], kind="stable")]
+            return [{
+                "term": self.display[i],
+                "kind": ENTITY if self.is_entity[i] else TERM,
+                "score": round(float(score[i]), 3),
+                "recent_mentions": round(float(recent[i]), 2),
+                "baseline_mentions": round(float(baseline[i]), 2),
+            } for i in candidates]
+
+    def save(self, path: str = TRENDS_SNAPSHOT_PATH):
+        """Write the counters to `path` atomically (numpy arrays only, no pickle)."""
+        with self._lock:
+            size = len(self.keys)
+            arrays = dict(
+                t0=np.float64(self.t0), decay=self.decay, counts=self.counts[:, :size], users=self.users[:size],
+                keys=np.asarray(self.keys, dtype=str), is_entity=self.is_entity[:size],
+                display=np.asarray(self.display, dtype=str), summaries_counted=np.int64(self.summaries_counted),
+            )
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path: str = TRENDS_SNAPSHOT_PATH) -> bool:
+        """Replace the counters with a snapshot. False (and unchanged) if it is missing or has other windows."""
+        try:
+            with np.load(path, allow_pickle=False) as snapshot:
+                # Snapshots with per-stream slots predate the per-user gate and can't be converted
+                if ("users" not in snapshot.files or not np.array_equal(snapshot["decay"], self.decay)
+                        or snapshot["users"].shape[1] != self.min_users):
+                    logger.warning(f"[Trends] Snapshot {path} was written with other settings; ignoring it.")
+                    return False
+                keys = snapshot["keys"].tolist()
+                counts, users = snapshot["counts"], snapshot["users"]
+                capacity = max(1024, 1 << max(0, len(keys) - 1).bit_length())
+                with self._lock:
+                    self.t0 = float(snapshot["t0"])
+                    self.keys, self.display = keys, snapshot["display"].tolist()
+                    self.vocabulary = {key: i for i, key in enumerate(keys)}
+                    self.counts = np.zeros((len(self.decay), capacity), dtype=np.float64)
+                    self.counts[:, :len(keys)] = counts
+                    self.is_entity = np.zeros(capacity, dtype=bool)
+                    self.is_entity[:len(keys)] = snapshot["is_entity"]
+                    self.users = np.full((capacity, self.min_users), -1, dtype=np.int64)
+                    self.users[:len(keys)] = users
+                    self.summaries_counted = int(snapshot["summaries_counted"])
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.error(f"[Trends] Could not load snapshot {path}: {e}", exc_info=True)
+            return False
+        logger.info(f"[Trends] Loaded {len(self.keys)} terms from {path}.")
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {"terms": len(self.keys), "summaries_counted": self.summaries_counted}
+
+
+# Shared instance fed by the write coalescer and served by GET /trends
+trend_counters = TrendCounters()
+
+
+def unix_time(created_at: datetime) -> float:
+    """Summary timestamps are naive UTC."""
+    return created_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+# Summaries committed before the counters are loaded or seeded, as (summary id, content, user id, unix time).
+# Counted straight away, they would be wiped by the snapshot load or counted again by the bootstrap.
+_held_summaries: List[Tuple[int, str, int, float]] = []
+_held_lock = threading.Lock()
+
+
+def count_summaries(entries: List[Tuple[int, str, int, float]]):
+    """Count (summary id, content, user id, unix time) entries, holding them back until the counters are ready."""
+    with _held_lock:
+        if not trend_counters.ready:
+            _held_summaries.extend(entries)
+            return
+    for _, content, user_id, at in entries:
+        trend_counters.add(content, user_id, at)
+
+
+def _mark_ready(seeded_through_id: int = 0):
+    """Count the held-back summaries the bootstrap didn't read (ids above `seeded_through_id`), then open up."""
+    with _held_lock:
+        for summary_id, content, user_id, at in _held_summaries:
+            if summary_id > seeded_through_id:
+                trend_counters.add(content, user_id, at)
+        _held_summaries.clear()
+        trend_counters.ready = True
+
+
+def count_new_summaries(summaries: List[Dict[str, Any]], db_session_factory=SessionLocal):
+    """Write-coalescer listener. Flagged near-duplicates are skipped so a repeated story isn't counted twice."""
+    summaries = [summary for summary in summaries if summary.get("duplicate_of_id") is None]
+    if not summaries:
+        return
+    db = db_session_factory()
+    try:
+        owners = dict(db.query(TopicStream.id, TopicStream.user_id).filter(
+            TopicStream.id.in_({summary["topic_stream_id"] for summary in summaries})
+        ).all())
+    finally:
+        db.close()
+    count_summaries([
+        (summary["id"], summary["content"], owners[summary["topic_stream_id"]], unix_time(summary["created_at"]))
+        for summary in summaries if summary["topic_stream_id"] in owners
+    ])
+
+
+def load_or_bootstrap_trends(db_session_factory=SessionLocal, path: str = TRENDS_SNAPSHOT_PATH):
+    """Load the snapshot; without one, seed once from the last TRENDS_BOOTSTRAP_DAYS of summaries."""
+    if trend_counters.load(path) or TRENDS_BOOTSTRAP_DAYS <= 0:
+        _mark_ready()
+        return
+    db = db_session_factory()
+    try:
+        since = datetime.utcnow() - timedelta(days=TRENDS_BOOTSTRAP_DAYS)
+        last_id = 0
+        while True:
+            batch = db.query(Summary.id, TopicStream.user_id, Summary.content, Summary.created_at).join(
+                TopicStream, TopicStream.id == Summary.topic_stream_id
+            ).filter(
+                Summary.id > last_id, Summary.created_at >= since, Summary.duplicate_of_id.is_(None)
+            ).order_by(Summary.id).limit(500).all()
+            if not batch:
+                break
+            for row in batch:
+                trend_counters.add(row.content, row.user_id, unix_time(row.created_at))
+            last_id = batch[-1].id
+    finally:
+        db.close()
+    logger.info(f"[Trends] Seeded counters from {trend_counters.summaries_counted} summaries of the last {TRENDS_BOOTSTRAP_DAYS} days.")
+    # Summaries held back while seeding are in the table too; only those committed after its last read still count
+    _mark_ready(last_id)
+    save_trends_snapshot(path)
+
+
+def save_trends_snapshot(path: str = TRENDS_SNAPSHOT_PATH):
+    if not trend_counters.ready:
+        return
+    try:
+        trend_counters.save(path)
+    except Exception as e:
+        logger.error(f"[Trends] Error writing snapshot {path}: {e}", exc_info=True)
@@ -1,51 +1,147 @@
 # Script to update estimated_content_tokens for existing summaries
+#
+# Streams summaries in id order, tokenizes them in batches and commits chunk by chunk. After every
+# commit the last processed id is written to a checkpoint file, so an interrupted run picks up where
+# it stopped when started again with the same --checkpoint path.
 
 import os
 import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
 
 # Add the backend directory to the system path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__))))
 
+from sqlalchemy import select, update, or_
+
 from database import SessionLocal
 from models import Summary
-from utils.tokenizer_utils import count_tokens
+from versioning import bump_stream_versions
+from change_log import record_changes, STREAM, UPSERT
+from utils.tokenizer_utils import count_tokens_batch
+
+DEFAULT_CHECKPOINT = "update_summary_tokens.checkpoint.json"
+
+def load_checkpoint(path: str) -> dict:
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"last_id": 0, "processed": 0}
+
+def save_checkpoint(path: str, checkpoint: dict):
+    if not path:
+        return
+    # Write-then-rename so a crash mid-write never leaves a corrupt checkpoint behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
 
-def update_existing_summary_tokens():
-    db = SessionLocal()
+def _count_in_pool(pool, processes, texts, num_threads):
+    if pool is None:
+        return count_tokens_batch(texts, num_threads=num_threads)
+    # Split the chunk across worker processes; each worker still batch-encodes its slice
+    slice_size = max(1, -(-len(texts) // processes))
+    slices = [texts[i:i + slice_size] for i in range(0, len(texts), slice_size)]
+    counts = []
+    for slice_counts in pool.map(count_tokens_batch, slices, [num_threads] * len(slices)):
+        counts.extend(slice_counts)
+    return counts
+
+def update_existing_summary_tokens(
+    session_factory=SessionLocal,
+    chunk_size: int = 1000,
+    threads: int = 8,
+    processes: int = 0,
+    checkpoint_path: str = DEFAULT_CHECKPOINT,
+    recount: bool = False,
+) -> int:
+    """
+    Backfill estimated_content_tokens and return the number of rows updated in this run.
+
+    Only rows with a NULL/0 count are touched unless `recount` is set, so values written by new
+    summaries are never overwritten. Each chunk is read with a fresh keyset query (id > checkpoint)
+    streamed via yield_per, so memory stays bounded by `chunk_size` and no read cursor is held open
+    across commits (SQLite would otherwise block the chunk commits).
+    """
+    checkpoint = load_checkpoint(checkpoint_path)
+    if checkpoint["last_id"]:
+        print(f"Resuming after summary ID {checkpoint['last_id']} ({checkpoint['processed']} rows already processed).")
+
+    pending_filter = [] if recount else [or_(Summary.estimated_content_tokens.is_(None), Summary.estimated_content_tokens == 0)]
+    pool = ProcessPoolExecutor(max_workers=processes) if processes > 0 else None
+    started = time.perf_counter()
+    updated = 0
+    db = session_factory()
     try:
-        # Fetch all summaries that have estimated_content_tokens as NULL or 0
-        # Or simply fetch all and re-calculate for safety/consistency
-        summaries_to_update = db.query(Summary).all()
-        
-        print(f"Found {len(summaries_to_update)} summaries to process.")
-        
-        for summary in summaries_to_update:
-            # Only update if the estimated_content_tokens is None or 0
-            # This prevents overwriting correctly calculated values from new summaries
-            if summary.estimated_content_tokens is None or summary.estimated_content_tokens == 0:
-                if summary.content:
-                    token_count = count_tokens(summary.content)
-                    summary.estimated_content_tokens = token_count
-                    print(f"Updating Summary ID {summary.id}: Content length {len(summary.content)}, Estimated tokens {token_count}")
-                else:
-                    summary.estimated_content_tokens = 0
-                    print(f"Summary ID {summary.id} has no content, setting estimated tokens to 0.")
-                # No commit yet, batch commits later
-                
-        # Commit all changes in one transaction
-        db.commit()
-        print("Database commit successful.")
-        
-    except Exception as e:
+        while True:
+            chunk_started = time.perf_counter()
+            statement = select(Summary.id, Summary.topic_stream_id, Summary.content).where(
+                Summary.id > checkpoint["last_id"], *pending_filter
+            ).order_by(Summary.id).limit(chunk_size).execution_options(yield_per=chunk_size)
+
+            ids, texts, stream_ids = [], [], set()
+            for row in db.execute(statement):
+                ids.append(row.id)
+                texts.append(row.content or "")
+                stream_ids.add(row.topic_stream_id)
+            if not ids:
+                break
+
+            counts = _count_in_pool(pool, processes, texts, threads)
+            db.execute(update(Summary), [
+                {"id": summary_id, "estimated_content_tokens": token_count}
+                for summary_id, token_count in zip(ids, counts)
+            ])
+            # Token totals show up in the listings, so cached copies and synced clients must refresh the streams
+            bump_stream_versions(db, stream_ids)
+            record_changes(db, [(STREAM, stream_id, stream_id, UPSERT) for stream_id in sorted(stream_ids)])
+            db.commit()
+
+            checkpoint["last_id"] = ids[-1]
+            checkpoint["processed"] += len(ids)
+            save_checkpoint(checkpoint_path, checkpoint)
+            updated += len(ids)
+
+            chunk_rate = len(ids) / max(time.perf_counter() - chunk_started, 1e-9)
+            overall_rate = updated / max(time.perf_counter() - started, 1e-9)
+            print(f"Updated {updated} summaries (through ID {ids[-1]}): {chunk_rate:.0f} rows/s this chunk, {overall_rate:.0f} rows/s overall.")
+
+        elapsed = time.perf_counter() - started
+        print(f"Done: {updated} summaries updated in {elapsed:.1f}s ({updated / max(elapsed, 1e-9):.0f} rows/s).")
+        # A finished run leaves nothing to resume
+        if checkpoint_path and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+        return updated
+    except Exception:
         db.rollback()
-        print(f"An error occurred: {e}")
-        # Log the full traceback for better debugging
-        import traceback
-        traceback.print_exc()
+        print(f"Stopped after summary ID {checkpoint['last_id']}; run again to resume from the checkpoint.")
+        raise
     finally:
         db.close()
+        if pool is not None:
+            pool.shutdown()
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill estimated_content_tokens for existing summaries.")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Rows tokenized and committed per transaction.")
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 4, help="Threads used by tiktoken's encode_batch.")
+    parser.add_argument("--processes", type=int, default=0, help="Worker processes to spread each chunk over (0 = tokenize in this process).")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Checkpoint file used to resume an interrupted run.")
+    parser.add_argument("--recount", action="store_true", help="Recount every summary, not just those without a count.")
+    args = parser.parse_args()
 
-if __name__ == "__main__":
     print("Starting script to update summary tokens...")
-    update_existing_summary_tokens()
-    print("Script finished.") 
\ No newline at end of file
+    update_existing_summary_tokens(
+        chunk_size=args.chunk_size,
+        threads=args.threads,
+        processes=args.processes,
+        checkpoint_path=args.checkpoint,
+        recount=args.recount,
+    )
+    print("Script finished.")
+
+if __name__ == "__main__":
+    main()
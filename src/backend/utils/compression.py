@@ -0,0 +1,95 @@
+# src/backend/utils/compression.py
+import os
+import zlib
+import logging
+from typing import Optional, Union
+
+from sqlalchemy.types import TypeDecorator, Text
+
+logger = logging.getLogger(__name__)
+
+# zstd is optional - fall back to zlib (stdlib) when the package is not installed
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Every compressed value starts with this marker followed by a one-byte codec id.
+# Uncompressed rows are plain TEXT, so reads can tell the two apart without a flag column.
+COMPRESSION_MAGIC = b"TPZ"
+CODEC_ZLIB = b"z"
+CODEC_ZSTD = b"s"
+
+# Values smaller than this (UTF-8 bytes) are stored as plain text - compressing them saves little
+# and costs a decompress on every read.
+COMPRESSION_THRESHOLD_BYTES = int(os.getenv("SUMMARY_COMPRESSION_THRESHOLD_BYTES", "1024"))
+COMPRESSION_CODEC = os.getenv("SUMMARY_COMPRESSION_CODEC", "zstd" if zstandard else "zlib")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+def compress_text(text: Optional[str], threshold: Optional[int] = None, codec: Optional[str] = None) -> Optional[Union[str, bytes]]:
+    """Compress text into a tagged blob, or return it unchanged if it is below the threshold or does not shrink."""
+    if text is None:
+        return None
+    threshold = COMPRESSION_THRESHOLD_BYTES if threshold is None else threshold
+    raw = text.encode("utf-8")
+    if len(raw) < threshold:
+        return text
+
+    codec = codec or COMPRESSION_CODEC
+    if codec == "zstd" and zstandard is not None:
+        payload = CODEC_ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    else:
+        payload = CODEC_ZLIB + zlib.compress(raw, ZLIB_LEVEL)
+
+    compressed = COMPRESSION_MAGIC + payload
+    if len(compressed) >= len(raw):
+        return text
+    return compressed
+
+
+def decompress_text(value: Optional[Union[str, bytes, memoryview]]) -> Optional[str]:
+    """Inverse of compress_text. Plain strings pass through untouched."""
+    if value is None or isinstance(value, str):
+        return value
+    value = bytes(value)
+    if not value.startswith(COMPRESSION_MAGIC):
+        # A blob that was not written by us - best effort decode
+        return value.decode("utf-8", errors="replace")
+
+    codec = value[len(COMPRESSION_MAGIC):len(COMPRESSION_MAGIC) + 1]
+    body = value[len(COMPRESSION_MAGIC) + 1:]
+    if codec == CODEC_ZLIB:
+        return zlib.decompress(body).decode("utf-8")
+    if codec == CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Value was compressed with zstd but the 'zstandard' package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(body).decode("utf-8")
+    raise ValueError(f"Unknown compression codec marker: {codec!r}")
+
+
+def is_compressed(value) -> bool:
+    return isinstance(value, (bytes, memoryview)) and bytes(value[:len(COMPRESSION_MAGIC)]) == COMPRESSION_MAGIC
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text column that is transparently compressed at rest.
+    Values at or above the threshold are stored as tagged zstd/zlib blobs (SQLite stores them
+    in the same TEXT column), smaller values stay as plain text. Reads accept both forms.
+    """
+    impl = Text
+    cache_ok = True
+
+    def __init__(self, *args, threshold: Optional[int] = None, **kwargs):
+        self.threshold = threshold
+        super().__init__(*args, **kwargs)
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, threshold=self.threshold)
+
+    def process_result_value(self, value, dialect):
+        return decompress_text(value)
@@ -0,0 +1,30 @@
+# src/backend/utils/reasoning_utils.py
+import re
+from typing import Optional, Tuple
+
+THINK_BLOCK_PATTERN = re.compile(r"<think>(.*?)</think>", re.IGNORECASE | re.DOTALL)
+UNCLOSED_THINK_PATTERN = re.compile(r"<think>(.*)$", re.IGNORECASE | re.DOTALL)
+
+REASONING_SEPARATOR = "\n\n"
+
+
+def split_reasoning(content: Optional[str]) -> Tuple[str, Optional[str]]:
+    """
+    Split reasoning-model output into (answer, reasoning).
+    All <think>...</think> blocks are moved into the reasoning part. A trailing <think> block that was
+    never closed (response cut off by max_tokens) is treated as reasoning as well.
+    Returns reasoning=None when the content has no reasoning segments.
+    """
+    if not content or "<think>" not in content.lower():
+        return content or "", None
+
+    reasoning_parts = [match.strip() for match in THINK_BLOCK_PATTERN.findall(content)]
+    answer = THINK_BLOCK_PATTERN.sub("", content)
+
+    unclosed = UNCLOSED_THINK_PATTERN.search(answer)
+    if unclosed:
+        reasoning_parts.append(unclosed.group(1).strip())
+        answer = answer[:unclosed.start()]
+
+    reasoning = REASONING_SEPARATOR.join(part for part in reasoning_parts if part)
+    return answer.strip(), reasoning or None
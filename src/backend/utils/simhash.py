@@ -0,0 +1,32 @@
+# src/backend/utils/simhash.py
+import re
+import hashlib
+from collections import Counter
+from typing import Optional
+
+FINGERPRINT_BITS = 64
+# Words per shingle; single-word changes then move only the few shingles that contain them
+SHINGLE_WORDS = 3
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def simhash(text: str) -> Optional[int]:
+    """
+    64-bit SimHash over word trigrams of the lowercased text, as a signed integer (SQLite INTEGER
+    range). Texts with a few words changed get hashes a few bits apart. None for text without words.
+    """
+    words = _WORD.findall(text.lower())
+    if not words:
+        return None
+    shingles = Counter(" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1)))
+    weights = [0] * FINGERPRINT_BITS
+    for shingle, count in shingles.items():
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if value >> bit & 1 else -count
+    fingerprint = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint >= 1 << (FINGERPRINT_BITS - 1) else fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return ((a ^ b) & ((1 << FINGERPRINT_BITS) - 1)).bit_count()
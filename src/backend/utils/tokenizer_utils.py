@@ -1,58 +1,191 @@
 # src/backend/utils/tokenizer_utils.py
-import tiktoken
+import os
+import re
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+from typing import List, NamedTuple, Sequence
 
 logger = logging.getLogger(__name__)
 
-ENCODING = None
-try:
-    ENCODING = tiktoken.get_encoding("cl100k_base")
-    logger.info("tiktoken: Using 'cl100k_base' encoding.")
-except Exception:
-    try:
-        ENCODING = tiktoken.get_encoding("p50k_base")
-        logger.info("tiktoken: Using 'p50k_base' encoding as fallback.")
-    except Exception as e:
-        logger.error(f"tiktoken: Critical - Failed to load any standard tiktoken encodings. Token counting will be highly approximate. Error: {e}")
+# The encoding is loaded on first use (or by prewarm_encoding at startup) rather than at import, since
+# tiktoken may have to download and parse the BPE file. Point TIKTOKEN_CACHE_DIR at a directory holding
+# the cached BPE files to avoid the download; a `tiktoken_cache` directory next to the backend is used
+# when present.
+BUNDLED_TIKTOKEN_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tiktoken_cache")
+if "TIKTOKEN_CACHE_DIR" not in os.environ and os.path.isdir(BUNDLED_TIKTOKEN_CACHE_DIR):
+    os.environ["TIKTOKEN_CACHE_DIR"] = BUNDLED_TIKTOKEN_CACHE_DIR
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+def get_encoding():
+    """Return the tiktoken encoding, loading it on first call. Returns None if no encoding could be loaded."""
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if _encoding_loaded:
+            return _encoding
+        try:
+            import tiktoken
+            try:
+                _encoding = tiktoken.get_encoding("cl100k_base")
+                logger.info("tiktoken: Using 'cl100k_base' encoding.")
+            except Exception:
+                _encoding = tiktoken.get_encoding("p50k_base")
+                logger.info("tiktoken: Using 'p50k_base' encoding as fallback.")
+        except Exception as e:
+            logger.error(f"tiktoken: Critical - Failed to load any standard tiktoken encodings. Token counting will be highly approximate. Error: {e}")
+        # A failed load is not retried, so counting never blocks on the network again
+        _encoding_loaded = True
+        return _encoding
+
+def prewarm_encoding() -> threading.Thread:
+    """Load the encoding in a background thread so the first request doesn't pay for it."""
+    thread = threading.Thread(target=get_encoding, name="tiktoken-prewarm", daemon=True)
+    thread.start()
+    return thread
 
 def count_tokens(text: str) -> int:
     if not text:
         return 0
-    if ENCODING:
+    encoding = get_encoding()
+    if encoding:
         try:
-            return len(ENCODING.encode(text))
+            return len(encoding.encode(text))
         except Exception as e:
             logger.error(f"tiktoken: Error encoding text for token count: {e}. Falling back to char count for this text.")
             return len(text) // 4 
     logger.warning("tiktoken: ENCODING not available, falling back to character count for token estimation.")
     return len(text) // 4
 
+def count_tokens_batch(texts: Sequence[str], num_threads: int = 8) -> List[int]:
+    """Count tokens for many texts at once; tiktoken's encode_batch spreads the work over `num_threads`."""
+    texts = [text or "" for text in texts]
+    encoding = get_encoding()
+    if encoding:
+        try:
+            return [len(tokens) for tokens in encoding.encode_batch(texts, num_threads=num_threads)]
+        except Exception as e:
+            logger.error(f"tiktoken: Error batch-encoding {len(texts)} texts: {e}. Falling back to per-text counting.")
+            return [count_tokens(text) for text in texts]
+    return [len(text) // 4 for text in texts]
+
+# LRU of token counts keyed by a content digest. Hashing is far cheaper than a BPE encode, and the same
+# summaries are counted again and again when they are reused as history context.
+TOKEN_COUNT_CACHE_SIZE = int(os.getenv("TOKEN_COUNT_CACHE_SIZE", "4096"))
+_token_count_cache: "OrderedDict[bytes, int]" = OrderedDict()
+_token_count_cache_lock = threading.Lock()
+
+def _content_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+def count_tokens_cached(text: str) -> int:
+    if not text:
+        return 0
+    key = _content_digest(text)
+    with _token_count_cache_lock:
+        cached = _token_count_cache.get(key)
+        if cached is not None:
+            _token_count_cache.move_to_end(key)
+            return cached
+
+    token_count = count_tokens(text)
+    with _token_count_cache_lock:
+        _token_count_cache[key] = token_count
+        _token_count_cache.move_to_end(key)
+        while len(_token_count_cache) > TOKEN_COUNT_CACHE_SIZE:
+            _token_count_cache.popitem(last=False)
+    return token_count
+
+# --- Hard token bounds ---
+# cl100k/p50k are byte-level BPE encoders with whitespace pre-tokenization: every token covers at least
+# one byte, and words separated by ASCII whitespace never share a token. So words <= tokens <= bytes
+# holds for any text, and a budget outside that range is decided without running the encoder.
+class TokenBounds(NamedTuple):
+    lower: int
+    upper: int
+
+def token_bounds(text: str) -> TokenBounds:
+    """Guaranteed bounds on the exact token count, from the text's byte length and word count."""
+    if not text:
+        return TokenBounds(0, 0)
+    data = text.encode("utf-8")
+    # bytes.split() splits on ASCII whitespace only, which the pre-tokenizers also split on
+    return TokenBounds(len(data.split()), len(data))
+
+def fits_token_budget(text: str, budget: int) -> bool:
+    """Exact budget check that only runs the encoder when the budget falls between the hard bounds."""
+    bounds = token_bounds(text)
+    if bounds.upper <= budget:
+        return True
+    if bounds.lower > budget:
+        return False
+    return count_tokens(text) <= budget
+
+# Truncation walks the text paragraph by paragraph, then sentence by sentence inside the paragraph
+# that overflows, and finally binary-searches a word-boundary prefix of the sentence that overflows.
+# Only chunks that can still fit are encoded, so work and memory scale with the budget rather than
+# the input, and cuts are made on str offsets so a multi-byte character is never split.
+_TRUNCATION_LEVELS = (re.compile(r"\n\s*\n"), re.compile(r"(?<=[.!?])\s+|\n"))
+# No real token spans more characters than this; longer chunks are known not to fit without encoding them
+TRUNCATION_MAX_CHARS_PER_TOKEN = 64
+
+def _iter_chunks(text: str, start: int, stop: int, pattern):
+    # Lazily yield (start, end) offsets, keeping each separator with the chunk before it
+    position = start
+    for match in pattern.finditer(text, start, stop):
+        if match.end() > position:
+            yield position, match.end()
+            position = match.end()
+    if position < stop:
+        yield position, stop
+
+def _fit_prefix(text: str, start: int, stop: int, budget: int) -> int:
+    # Binary search for the longest prefix within the budget, then back off to a word boundary
+    low, high = start, min(stop, start + budget * TRUNCATION_MAX_CHARS_PER_TOKEN)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if count_tokens(text[start:middle]) <= budget:
+            low = middle
+        else:
+            high = middle - 1
+    if low < stop:
+        boundary = max(text.rfind(" ", start, low), text.rfind("\n", start, low))
+        if boundary > start:
+            low = boundary
+    return low
+
+def _fit_chunks(text: str, start: int, stop: int, budget: int, level: int) -> int:
+    """Return the end offset of the longest run of whole chunks from `start` that fits `budget`."""
+    used = 0
+    for chunk_start, chunk_end in _iter_chunks(text, start, stop, _TRUNCATION_LEVELS[level]):
+        remaining = budget - used
+        chunk_tokens = None
+        if chunk_end - chunk_start <= remaining * TRUNCATION_MAX_CHARS_PER_TOKEN:
+            chunk_tokens = count_tokens_cached(text[chunk_start:chunk_end])
+        if chunk_tokens is not None and chunk_tokens <= remaining:
+            used += chunk_tokens
+            continue
+        # This chunk overflows: fill what is left of the budget from inside it at the next finer level
+        if level + 1 < len(_TRUNCATION_LEVELS):
+            return _fit_chunks(text, chunk_start, chunk_end, remaining, level + 1)
+        return _fit_prefix(text, chunk_start, chunk_end, remaining)
+    return stop
+
 def truncate_text_by_tokens(text: str, max_tokens: int) -> str:
     if not text or max_tokens <= 0:
         return ""
-    if ENCODING:
-        try:
-            tokens = ENCODING.encode(text)
-            if len(tokens) > max_tokens:
-                truncated_tokens = tokens[:max_tokens]
-                try:
-                    return ENCODING.decode(truncated_tokens) + "..."
-                except Exception: # Handle potential issues decoding partial tokens
-                    try:
-                        return ENCODING.decode(truncated_tokens[:-1]) + "..." # Try one less token
-                    except Exception as e_dec:
-                        logger.warning(f"tiktoken: Decoding truncated tokens failed severely: {e_dec}. Using aggressive char-based fallback.")
-                        # Fallback to a very rough character-based truncation if decode fails
-                        # Average token length can vary, 3 is a conservative guess for chars/token
-                        char_limit_approx = max_tokens * 3 
-                        return text[:char_limit_approx] + "..." if len(text) > char_limit_approx else text
-            return text
-        except Exception as e:
-            logger.error(f"tiktoken: Error truncating text by tokens: {e}. Falling back to char count for this text.")
-            # Fallback to character based if encoding fails
-            char_limit = max_tokens * 4 
-            return text[:char_limit] + "..." if len(text) > char_limit else text
-            
-    logger.warning("tiktoken: ENCODING not available, falling back to character count for truncation.")
-    char_limit = max_tokens * 4 
-    return text[:char_limit] + "..." if len(text) > char_limit else text 
\ No newline at end of file
+    if not get_encoding():
+        logger.warning("tiktoken: ENCODING not available, falling back to character count for truncation.")
+    try:
+        end = _fit_chunks(text, 0, len(text), max_tokens, 0)
+    except Exception as e:
+        logger.error(f"tiktoken: Error truncating text by tokens: {e}. Falling back to char count for this text.")
+        end = min(len(text), max_tokens * 4)
+    if end >= len(text):
+        return text
+    return text[:end].rstrip() + "..."
@@ -0,0 +1,35 @@
+from typing import Iterable
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from models import User, TopicStream
+
+# Version counters behind the listing ETags. TopicStream.version changes whenever that stream's
+# summaries listing could change; User.data_version whenever the user's stream listing could change
+# (stream settings, new/removed summaries via last_updated and token totals). Bumps join the caller's
+# transaction, so a counter never moves without the data it describes.
+
+
+def bump_stream_versions(db: Session, stream_ids: Iterable[int]):
+    """Bump the given streams' versions and their owners' data versions. Does not commit."""
+    stream_ids = sorted(set(stream_ids))
+    if not stream_ids:
+        return
+    db.execute(
+        update(TopicStream).where(TopicStream.id.in_(stream_ids)).values(version=TopicStream.version + 1),
+        execution_options={"synchronize_session": False}
+    )
+    owners = select(TopicStream.user_id).where(TopicStream.id.in_(stream_ids))
+    db.execute(
+        update(User).where(User.id.in_(owners)).values(data_version=User.data_version + 1),
+        execution_options={"synchronize_session": False}
+    )
+
+
+def bump_user_version(db: Session, user_id: int):
+    """Bump a user's data version (stream created/edited/hidden). Does not commit."""
+    db.execute(
+        update(User).where(User.id == user_id).values(data_version=User.data_version + 1),
+        execution_options={"synchronize_session": False}
+    )
@@ -0,0 +1,165 @@
+import os
+import time
+import queue
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List
+
+from sqlalchemy import insert, update
+
+from database import SessionLocal
+from models import Summary, TopicStream
+from versioning import bump_stream_versions
+from change_log import record_changes, SUMMARY, UPSERT
+
+logger = logging.getLogger(__name__)
+
+# Flush when the oldest pending write has waited this long, or when this many writes are queued.
+SUMMARY_WRITE_WINDOW_MS = int(os.getenv("SUMMARY_WRITE_WINDOW_MS", "50"))
+SUMMARY_WRITE_MAX_BATCH = int(os.getenv("SUMMARY_WRITE_MAX_BATCH", "50"))
+
+
+class SummaryWriteCoalescer:
+    """
+    Collects summary inserts (and the matching TopicStream.last_updated bumps) from concurrent update
+    jobs and writes them in one transaction per short window. SQLite has a single writer, so N jobs
+    finishing together cost one commit/fsync instead of N.
+
+    Callers get a Future resolving to the new summary id. New ids come back through INSERT ... RETURNING,
+    so there is no refresh round trip afterwards.
+
+    Callers must not hold an open write transaction on the same database while waiting, or the flush
+    will block on the SQLite write lock.
+    """
+
+    def __init__(self, session_factory=SessionLocal, window_ms: int = SUMMARY_WRITE_WINDOW_MS, max_batch: int = SUMMARY_WRITE_MAX_BATCH):
+        self.session_factory = session_factory
+        self.window_seconds = window_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        self._listeners: List[Callable[[List[Dict[str, Any]]], None]] = []
+
+    def add_listener(self, listener: Callable[[List[Dict[str, Any]]], None]):
+        """
+        Call `listener` on the flush thread after each committed batch, with the batch's summary
+        values plus their new "id". Listener errors are logged and never affect the writes.
+        """
+        self._listeners.append(listener)
+
+    def _ensure_started(self):
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._stop_event.clear()
+                self._thread = threading.Thread(target=self._run, name="summary-write-coalescer", daemon=True)
+                self._thread.start()
+
+    def submit(self, summary_values: Dict[str, Any]) -> Future:
+        """Queue one summary insert. `summary_values` are Summary column values and must include created_at."""
+        future = Future()
+        self._ensure_started()
+        self._queue.put((summary_values, future))
+        return future
+
+    async def write_summary(self, summary_values: Dict[str, Any]) -> int:
+        return await asyncio.wrap_future(self.submit(summary_values))
+
+    def _run(self):
+        logger.info("[WriteCoalescer] Flush thread started.")
+        while not (self._stop_event.is_set() and self._queue.empty()):
+            try:
+                first = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.monotonic() + self.window_seconds
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._flush(batch)
+        logger.info("[WriteCoalescer] Flush thread stopped.")
+
+    def _flush(self, batch: List[tuple]):
+        committed: List[Dict[str, Any]] = []
+        self._write_or_split(batch, committed)
+
+        if self._listeners and committed:
+            for listener in self._listeners:
+                try:
+                    listener(committed)
+                except Exception as e:
+                    logger.error(f"[WriteCoalescer] Listener {getattr(listener, '__name__', listener)} failed: {e}", exc_info=True)
+
+    def _write_or_split(self, batch: List[tuple], committed: List[Dict[str, Any]]):
+        """
+        Write `batch` in one transaction. If that fails, retry each half on its own, so one bad row
+        (e.g. its stream was purged while it waited) only fails its own caller.
+        """
+        rows = [values for values, _ in batch]
+        try:
+            new_ids = self._write(rows)
+        except Exception as e:
+            if len(batch) == 1:
+                logger.error(f"[WriteCoalescer] Error writing summary for stream {rows[0].get('topic_stream_id')}: {e}", exc_info=True)
+                batch[0][1].set_exception(e)
+                return
+            logger.warning(f"[WriteCoalescer] Batch of {len(rows)} summaries failed ({e}), retrying in halves.")
+            middle = len(batch) // 2
+            self._write_or_split(batch[:middle], committed)
+            self._write_or_split(batch[middle:], committed)
+            return
+
+        for (values, future), new_id in zip(batch, new_ids):
+            future.set_result(new_id)
+            committed.append(dict(values, id=new_id))
+
+    def _write(self, rows: List[Dict[str, Any]]) -> List[int]:
+        # Latest created_at per stream becomes that stream's last_updated
+        last_updated_by_stream = {}
+        for values in rows:
+            stream_id = values["topic_stream_id"]
+            if stream_id not in last_updated_by_stream or values["created_at"] > last_updated_by_stream[stream_id]:
+                last_updated_by_stream[stream_id] = values["created_at"]
+
+        db = self.session_factory()
+        try:
+            new_ids = db.scalars(
+                insert(Summary).returning(Summary.id, sort_by_parameter_order=True),
+                rows
+            ).all()
+            db.execute(
+                update(TopicStream),
+                [{"id": stream_id, "last_updated": last_updated} for stream_id, last_updated in last_updated_by_stream.items()]
+            )
+            bump_stream_versions(db, last_updated_by_stream)
+            record_changes(db, [(SUMMARY, new_id, values["topic_stream_id"], UPSERT) for values, new_id in zip(rows, new_ids)])
+            db.commit()
+            logger.debug(f"[WriteCoalescer] Flushed {len(rows)} summaries for {len(last_updated_by_stream)} streams in one transaction.")
+            return new_ids
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def shutdown(self, timeout: float = 5.0):
+        """Flush anything still queued and stop the flush thread."""
+        self._stop_event.set()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=timeout)
+        logger.info("[WriteCoalescer] Shut down.")
+
+
+# Shared instance used by the API and the scheduler thread
+summary_writer = SummaryWriteCoalescer()